@@ -0,0 +1,184 @@
+"""
+Бенчмарк цикла опроса на заглушках из tests/utils.py.
+Прогоняет get_api_answer -> check_response -> parse_status -> send_message
+для ответов от 1 до 100 000 работ и для 1-10 000 студентов, измеряет
+процессорное время, выделения памяти и пропускную способность.
+
+Запуск:
+    python benchmarks/bench_poll_cycle.py            # вывести результаты
+    python benchmarks/bench_poll_cycle.py --save     # сохранить базу
+    python benchmarks/bench_poll_cycle.py --compare  # сравнить с базой
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from http import HTTPStatus
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BASE_DIR, os.path.join(BASE_DIR, 'tests')]
+
+import homework  # noqa: E402
+import utils  # noqa: E402
+
+BASELINE_FILE = os.path.join(BASE_DIR, 'benchmarks', 'baseline.json')
+HOMEWORK_SIZES = (1, 10, 100, 1000, 10000, 100000)
+QUICK_HOMEWORK_SIZES = (1, 100, 10000)
+QUICK_TENANT_SIZES = (1, 100, 1000)
+REGRESSION = '{case}: {metric} {baseline:.6g} -> {current:.6g} (+{ratio:.0%})'
+REPORT = (
+    '{case:<22} cpu/cycle {cpu_per_cycle:.6f} s  '
+    'retained/cycle {retained_per_cycle:>10.0f} B  '
+    'peak {peak_bytes:>12} B  '
+    'throughput {homeworks_per_second:>12.0f} hw/s'
+)
+TENANT_SIZES = (1, 10, 100, 1000, 10000)
+TOLERANCE = 0.2
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def make_payload(size, timestamp=1000198000):
+    """Ответ API с size работами."""
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'hw{number}',
+                'status': STATUSES[number % len(STATUSES)],
+            }
+            for number in range(size)
+        ],
+        'current_date': timestamp,
+    }
+
+
+def poll_cycle(get, bot, token, chat_id, timestamp):
+    """Один цикл опроса студента на заглушках."""
+    response = homework.request_api_answer(
+        timestamp, homework.make_headers(token), get
+    )
+    for item in homework.check_response(response):
+        homework.send_to_chat(bot, chat_id, homework.parse_status(item))
+    return response['current_date']
+
+
+def run_case(homeworks, tenants):
+    """Все студенты опрашиваются по одному разу."""
+    payload = make_payload(homeworks)
+
+    def get(*args, **kwargs):
+        return utils.MockResponseGET(
+            http_status=HTTPStatus.OK, data=payload
+        )
+
+    bot = utils.MockTelegramBot()
+    tokens = [(f'token{number}', number) for number in range(tenants)]
+
+    def cycle():
+        for token, chat_id in tokens:
+            poll_cycle(get, bot, token, chat_id, 0)
+
+    return cycle
+
+
+def measure(homeworks, tenants, min_time=0.2):
+    """Процессорное время, выделения и пропускная способность случая."""
+    cycle = run_case(homeworks, tenants)
+    cycle()
+    rounds = 0
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    while True:
+        cycle()
+        rounds += 1
+        if time.process_time() - cpu_start >= min_time:
+            break
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    snapshot = tracemalloc.take_snapshot()
+    cycle()
+    allocated = sum(
+        stat.size_diff for stat in
+        tracemalloc.take_snapshot().compare_to(snapshot, 'filename')
+        if stat.size_diff > 0
+    )
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    cycles = rounds * tenants
+    return {
+        'homeworks': homeworks,
+        'tenants': tenants,
+        'cpu_per_cycle': cpu / cycles,
+        'retained_per_cycle': allocated / tenants,
+        'peak_bytes': peak - before,
+        'cycles_per_second': cycles / wall,
+        'homeworks_per_second': cycles * homeworks / wall,
+    }
+
+
+def run_suite(homework_sizes, tenant_sizes):
+    """Прогон по размеру ответа и по числу студентов."""
+    results = {}
+    cases = [(size, 1) for size in homework_sizes]
+    cases += [(1, size) for size in tenant_sizes if size != 1]
+    for homeworks, tenants in cases:
+        case = f'hw={homeworks} tenants={tenants}'
+        results[case] = measure(homeworks, tenants)
+        print(REPORT.format(case=case, **results[case]))
+    return results
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Случаи, ставшие медленнее или прожорливее базы больше допуска."""
+    regressions = []
+    for case, current in results.items():
+        if case not in baseline:
+            continue
+        for metric in ('cpu_per_cycle', 'peak_bytes', 'retained_per_cycle'):
+            old, new = baseline[case][metric], current[metric]
+            if old and new > old * (1 + tolerance):
+                regressions.append(REGRESSION.format(
+                    case=case, metric=metric, baseline=old, current=new,
+                    ratio=new / old - 1
+                ))
+    return regressions
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--quick', action='store_true',
+                        help='сокращённый набор случаев')
+    parser.add_argument('--save', action='store_true',
+                        help='сохранить результаты как базу')
+    parser.add_argument('--compare', action='store_true',
+                        help='сравнить с сохранённой базой')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    results = run_suite(
+        QUICK_HOMEWORK_SIZES if args.quick else HOMEWORK_SIZES,
+        QUICK_TENANT_SIZES if args.quick else TENANT_SIZES,
+    )
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.compare:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(line)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+r"""
+Локальные заглушки API Практикум.Домашка и Telegram Bot API.
+Практикум: фильтрация по from_date, current_date, ответы 401/500,
+отказы с ключами error/code и настраиваемая задержка. Статусы работ
+детерминированно меняются раз в change_period секунд, поэтому заглушка
+не хранит состояние и выдерживает тысячи студентов.
+Telegram: POST /bot<token>/sendMessage, при превышении лимита — 429
+с retry_after, как у настоящего API; getUpdates возвращает пустой список.
+
+Запуск:
+    python benchmarks/fake_servers.py --practicum-port 8001 \
+        --telegram-port 8002 --latency 0.05 --error-rate 0.01
+
+Движок подключается к заглушкам переменными окружения
+PRACTICUM_ENDPOINT=http://127.0.0.1:8001/api/user_api/homework_statuses/
+и TELEGRAM_API_URL=http://127.0.0.1:8002/bot; homework.py читает только
+PRACTICUM_ENDPOINT.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HOMEWORK_CYCLE = ('reviewing', 'rejected', 'reviewing', 'approved')
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+SERVERS_STARTED = (
+    'Практикум: http://{host}:{practicum}, Telegram: http://{host}:{telegram}'
+)
+UNAUTHORIZED = {
+    'code': 'not_authenticated',
+    'message': 'Учетные данные не были предоставлены.',
+    'source': '__response__',
+}
+REFUSALS = (
+    ('error', {'error': {'error': 'Wrong from_date format'}}),
+    ('code', {'code': 'UnknownError', 'message': 'Сервис недоступен'}),
+)
+
+
+class Stats:
+    """Потокобезопасные счётчики заглушки."""
+
+    def __init__(self):
+        """Пустые счётчики."""
+        self._lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, name):
+        """Увеличиваем счётчик name."""
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + 1
+
+    def snapshot(self):
+        """Копия счётчиков."""
+        with self._lock:
+            return dict(self.values)
+
+
+def student_homeworks(token, count, change_period, now):
+    """Работы студента на момент now: (работа, время изменения)."""
+    seed = int(hashlib.md5(token.encode()).hexdigest(), 16)
+    homeworks = []
+    for number in range(count):
+        offset = (seed >> number) % change_period
+        phase = int((now + offset) // change_period)
+        homeworks.append(({
+            'id': number,
+            'homework_name': f'{token[:8]}__hw{number}',
+            'lesson_name': f'Спринт {number}',
+            'reviewer_comment': '',
+            'status': HOMEWORK_CYCLE[phase % len(HOMEWORK_CYCLE)],
+        }, phase * change_period - offset))
+    return homeworks
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Общая часть заглушек: ответ JSON, задержка, /stats."""
+
+    protocol_version = 'HTTP/1.1'
+    config = None
+    stats = None
+
+    def send_json(self, status, data):
+        """Ответ JSON с кодом status."""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def delay(self):
+        """Искусственная задержка ответа."""
+        latency = self.config.latency
+        if latency:
+            time.sleep(random.uniform(latency / 2, latency * 1.5))
+
+    def serve_stats(self):
+        """Счётчики заглушки по GET /stats."""
+        self.send_json(200, self.stats.snapshot())
+
+    def log_message(self, format, *args):
+        """Не пишем в лог каждый запрос."""
+
+
+class PracticumHandler(FakeHandler):
+    """Заглушка API Практикум.Домашка."""
+
+    def do_GET(self):
+        """Ответ на запрос статусов работ."""
+        url = urlsplit(self.path)
+        if url.path == '/stats':
+            return self.serve_stats()
+        self.stats.inc('requests')
+        self.delay()
+        if url.path != PRACTICUM_PATH:
+            self.stats.inc('not_found')
+            return self.send_json(404, {'detail': 'Not found'})
+        auth = self.headers.get('Authorization', '')
+        if not auth.startswith('OAuth ') or auth[6:].startswith('bad'):
+            self.stats.inc('unauthorized')
+            return self.send_json(401, UNAUTHORIZED)
+        roll = random.random()
+        if roll < self.config.error_rate:
+            self.stats.inc('server_error')
+            return self.send_json(500, {})
+        if roll < self.config.error_rate + self.config.refusal_rate:
+            kind, body = random.choice(REFUSALS)
+            self.stats.inc(f'refusal_{kind}')
+            return self.send_json(200, body)
+        try:
+            from_date = int(parse_qs(url.query)['from_date'][0])
+        except (KeyError, ValueError):
+            self.stats.inc('bad_request')
+            return self.send_json(400, {'error': 'from_date'})
+        now = int(time.time())
+        homeworks = [
+            homework for homework, updated in student_homeworks(
+                auth[6:], self.config.homeworks, self.config.change_period,
+                now
+            )
+            if updated >= from_date
+        ]
+        self.stats.inc('ok')
+        self.send_json(200, {'homeworks': homeworks, 'current_date': now})
+
+
+class TelegramHandler(FakeHandler):
+    """Заглушка Telegram Bot API: sendMessage с лимитом на чат."""
+
+    def do_GET(self):
+        """Счётчики заглушки."""
+        if urlsplit(self.path).path == '/stats':
+            return self.serve_stats()
+        self.send_json(404, {'ok': False, 'error_code': 404})
+
+    def do_POST(self):
+        """Ответ на вызов метода Bot API."""
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        self.stats.inc('requests')
+        self.delay()
+        data = json.loads(body or b'{}')
+        if not self.path.endswith(('/sendMessage', '/getUpdates')):
+            return self.send_json(
+                404, {'ok': False, 'error_code': 404,
+                      'description': 'Not Found'}
+            )
+        if self.path.endswith('/getUpdates'):
+            time.sleep(min(float(data.get('timeout', 0)), 1))
+            return self.send_json(200, {'ok': True, 'result': []})
+        chat_id = int(data.get('chat_id', 0))
+        if self.config.flood_limited(chat_id):
+            self.stats.inc('flood')
+            return self.send_json(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests: retry after 1',
+                'parameters': {'retry_after': 1},
+            })
+        self.stats.inc('messages')
+        self.send_json(200, {'ok': True, 'result': {
+            'message_id': self.stats.snapshot()['messages'],
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': data.get('text', ''),
+        }})
+
+
+class FakeConfig:
+    """Параметры заглушек."""
+
+    def __init__(self, latency=0.0, error_rate=0.0, refusal_rate=0.0,
+                 homeworks=3, change_period=300, chat_rate=0.0):
+        """chat_rate > 0 включает лимит сообщений в секунду на чат."""
+        self.latency = latency
+        self.error_rate = error_rate
+        self.refusal_rate = refusal_rate
+        self.homeworks = homeworks
+        self.change_period = change_period
+        self.chat_rate = chat_rate
+        self._lock = threading.Lock()
+        self._last_message = {}
+
+    def flood_limited(self, chat_id):
+        """Превышен ли лимит сообщений для чата."""
+        if not self.chat_rate:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_message.get(chat_id)
+            if last is not None and now - last < 1 / self.chat_rate:
+                return True
+            self._last_message[chat_id] = now
+        return False
+
+
+def make_server(handler, config, host='127.0.0.1', port=0):
+    """Сервер заглушки с собственными счётчиками."""
+    handler_class = type(handler.__name__, (handler,), {
+        'config': config, 'stats': Stats()
+    })
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    return server
+
+
+def start_servers(config, host='127.0.0.1', practicum_port=0,
+                  telegram_port=0):
+    """Запускаем обе заглушки в фоновых потоках."""
+    servers = (
+        make_server(PracticumHandler, config, host, practicum_port),
+        make_server(TelegramHandler, config, host, telegram_port),
+    )
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def main():
+    """Запуск заглушек из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--practicum-port', type=int, default=8001)
+    parser.add_argument('--telegram-port', type=int, default=8002)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='средняя задержка ответа, секунд')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='доля ответов 500')
+    parser.add_argument('--refusal-rate', type=float, default=0.0,
+                        help='доля отказов с ключом error или code '
+                             '(поровну)')
+    parser.add_argument('--homeworks', type=int, default=3,
+                        help='работ у каждого студента')
+    parser.add_argument('--change-period', type=int, default=300,
+                        help='период смены статуса работы, секунд')
+    parser.add_argument('--chat-rate', type=float, default=0.0,
+                        help='лимит сообщений в секунду на чат (0 - нет)')
+    args = parser.parse_args()
+    config = FakeConfig(
+        args.latency, args.error_rate, args.refusal_rate, args.homeworks,
+        args.change_period, args.chat_rate
+    )
+    practicum, telegram = start_servers(
+        config, args.host, args.practicum_port, args.telegram_port
+    )
+    print(SERVERS_STARTED.format(
+        host=args.host, practicum=practicum.server_port,
+        telegram=telegram.server_port
+    ))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Нагрузочный тест движка на локальных заглушках.
+Заглушки Практикума и Telegram запускаются в отдельном процессе,
+движок опрашивает tenants студентов через настоящие сокеты в течение
+duration секунд. В конце печатаются пропускная способность,
+задержки запросов (p50/p95/p99/max) и число доставленных сообщений.
+
+Запуск:
+    python benchmarks/load_test.py --tenants 2000 --duration 30
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [BASE_DIR, os.path.dirname(os.path.abspath(__file__))]
+
+import requests  # noqa: E402
+from telegram import Bot  # noqa: E402
+from telegram.utils.request import Request  # noqa: E402
+
+import fake_servers  # noqa: E402
+import homework  # noqa: E402
+from homework_bot import engine  # noqa: E402
+from homework_bot.client import PracticumClient  # noqa: E402
+from homework_bot.outbound import OutboundQueue  # noqa: E402
+from homework_bot.scheduler import PollScheduler  # noqa: E402
+
+REPORT = (
+    'Студентов: {tenants}, длительность: {duration:.1f} с\n'
+    'Запросов к API: {requests} ({rps:.1f} в секунду)\n'
+    'Задержка запроса, с: p50 {p50:.4f}, p95 {p95:.4f}, '
+    'p99 {p99:.4f}, max {max:.4f}\n'
+    'Ответы заглушки Практикума: {practicum}\n'
+    'Ответы заглушки Telegram: {telegram}\n'
+    'Процессорное время бота: {cpu:.2f} с'
+)
+
+
+def run_fakes(config, ports):
+    """Процесс с заглушками: сообщает порты и работает до завершения."""
+    practicum, telegram = fake_servers.start_servers(config)
+    ports.send((practicum.server_port, telegram.server_port))
+    ports.recv()
+
+
+def percentile(values, share):
+    """Перцентиль share (0..1) списка values."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def timed(get, latencies):
+    """Обёртка над get, запоминающая задержку каждого запроса."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return get(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+async def load(tenants, bot, get, concurrency, duration):
+    """Работа движка в течение duration секунд."""
+    outbound = OutboundQueue(bot, global_rate=10 ** 6, chat_rate=10 ** 6)
+    outbound.start()
+    try:
+        await asyncio.wait_for(asyncio.gather(
+            outbound.run(),
+            engine.run(tenants, outbound, concurrency=concurrency, get=get),
+        ), duration)
+    except asyncio.TimeoutError:
+        pass
+
+
+def main():
+    """Точка входа нагрузочного теста."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--period', type=float, default=5,
+                        help='интервал опроса одного студента, секунд')
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--refusal-rate', type=float, default=0.0)
+    parser.add_argument('--change-period', type=int, default=60)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    config = fake_servers.FakeConfig(
+        args.latency, args.error_rate, args.refusal_rate,
+        change_period=args.change_period
+    )
+    parent, child = multiprocessing.Pipe()
+    fakes = multiprocessing.Process(
+        target=run_fakes, args=(config, child), daemon=True
+    )
+    fakes.start()
+    practicum_port, telegram_port = parent.recv()
+    homework.ENDPOINT = (
+        f'http://127.0.0.1:{practicum_port}{fake_servers.PRACTICUM_PATH}'
+    )
+    bot = Bot(
+        token='1234:load',
+        base_url=f'http://127.0.0.1:{telegram_port}/bot',
+        request=Request(con_pool_size=args.concurrency),
+    )
+    engine.START_SPREAD = args.period
+    tenants = [
+        engine.Tenant(
+            token=f'student{number}', chat_id=str(number),
+            timestamp=0, scheduler=PollScheduler(
+                args.period, review_period=args.period,
+                idle_max_period=args.period
+            )
+        )
+        for number in range(args.tenants)
+    ]
+    client = PracticumClient(pool_maxsize=args.concurrency)
+    latencies = []
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    asyncio.run(load(
+        tenants, bot, timed(client.get, latencies), args.concurrency,
+        args.duration
+    ))
+    duration = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    print(REPORT.format(
+        tenants=args.tenants, duration=duration, requests=len(latencies),
+        rps=len(latencies) / duration,
+        p50=statistics.median(latencies) if latencies else 0.0,
+        p95=percentile(latencies, 0.95), p99=percentile(latencies, 0.99),
+        max=max(latencies, default=0.0),
+        practicum=requests.get(
+            f'http://127.0.0.1:{practicum_port}/stats', timeout=5
+        ).json(),
+        telegram=requests.get(
+            f'http://127.0.0.1:{telegram_port}/stats', timeout=5
+        ).json(),
+        cpu=cpu,
+    ))
+    client.close()
+    parent.send(None)
+    fakes.join(timeout=5)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,22 +9,52 @@ import logging
 import os
 import sys
 import time
+from collections import namedtuple
+from concurrent.futures import Future
+from functools import partial
 
-import requests
 from dotenv import load_dotenv
-from telegram import Bot, TelegramError
 
+from homework_bot import metrics
+from homework_bot.breaker import get_breaker
+from homework_bot.cassette import (cassette_clock, close_cassette,
+                                   open_cassette, replaying, start_timestamp,
+                                   wrap_bot, wrap_get)
+from homework_bot.deadline import (Deadline, check, cycle_deadline, limit,
+                                   use_deadline)
+from homework_bot.errors import ErrorCache, fingerprint
+from homework_bot.fanout import Delivery, fan_out, parse_chat_ids
+from homework_bot.fastjson import decode_json
+from homework_bot.health import HEALTH
+from homework_bot.hedge import HEDGE_REQUESTS, get_hedger
+from homework_bot.index import ChangeIndex
+from homework_bot.lazy import lazy_import
+from homework_bot.logs import start_log_listener
+from homework_bot.pipeline import Pipeline
+from homework_bot.scheduler import PollScheduler
+from homework_bot.shutdown import SHUTDOWN_DONE, Shutdown
+from homework_bot.state import StateStore, tenant_key
+from homework_bot.tracing import span, start_tracing, stop_tracing
+from homework_bot.watchdog import start_memory_watchdog, stop_memory_watchdog
+
+requests = lazy_import('requests')
+telegram = lazy_import('telegram')
 load_dotenv()
 
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
-ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+ENDPOINT = os.getenv(
+    'PRACTICUM_ENDPOINT',
+    'https://practicum.yandex.ru/api/user_api/homework_statuses/'
+)
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 ANS_KEY_ERROR = 'Ответ API не содержит ключа "{key}"'
 BOT_ADVANCE = 'Бот отправил сообщение: {message}'
 CASES_TOKENS = ('PRACTICUM_TOKEN', 'TELEGRAM_TOKEN', 'TELEGRAM_CHAT_ID')
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 5))
+CYCLE_DEADLINE = float(os.getenv('CYCLE_DEADLINE', 60))
 BOT_ERROR = 'Бот не смог отправить сообщение {error}'
 DATA_ERROR = 'Ожидается словарь, получен {type_data}'
 DENIAL_OF_SERVICE = (
@@ -40,6 +70,11 @@ HOMEWORK_VERDICTS: dict[str: str] = {
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 JOB_KEY_ERROR = 'Словарь "homeworks" не содержит ключа "{key}"'
+LOG_FORMAT = (
+    '%(asctime)s - %(filename)s - '
+    '%(funcName)s - %(lineno)d - '
+    '%(levelname)s - %(message)s'
+)
 MESSAGE_ERROR = 'Сбой в работе программы: {error}'
 RESPONSE_ERROR = (
     'Неожиданный ответ сервера {url}. '
@@ -49,7 +84,9 @@ RESPONSE_ERROR = (
     'timeout: {timeout}'
 )
 RATING_JOB = 'Оценка работы {verdict}'
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 25))
 RETRY_PERIOD = 600
+SEND_TIMEOUT = float(os.getenv('SEND_TIMEOUT', 10))
 SERVER_ADVANCE = 'Получен ответ от сервиса Яндекс-практикум'
 SERVER_ERROR = (
     'Ошибка при запросе к сервису: url {url}. '
@@ -62,10 +99,19 @@ STATUS_JOB = 'Статус работы {status}'
 STATUS_JOB_ERROR = 'Неизвестный статус работы {status}'
 START_BOT = 'Бот запущен'
 STATUS_HOMEWORK = 'Изменился статус проверки работы "{name}". {verdict}'
-TIMEOUT = 30
 TOKENS_ERROR = 'Отсутствует обязательная переменная окружения: {}'
 TYPE_KEY_ERROR = 'Тип данных homeworks не является списком, получен {type_key}'
 
+DELIVERY = Delivery()
+Fetched = namedtuple(
+    'Fetched', ('timestamp', 'response', 'error', 'delay', 'deadline'),
+    defaults=(None, None),
+)
+Parsed = namedtuple(
+    'Parsed', ('previous', 'current', 'messages', 'error', 'deadline'),
+    defaults=(None,),
+)
+
 
 def check_tokens():
     """Проверка загрузки переменных окружения."""
@@ -75,43 +121,93 @@ def check_tokens():
             variable_error += f'{name} '
     if variable_error:
         logging.critical(TOKENS_ERROR.format(variable_error), exc_info=True)
+        metrics.ERRORS.inc(path='tokens')
         raise ValueError(TOKENS_ERROR.format(variable_error))
 
 
 def send_message(bot, message):
-    """Отправляем сообщение в Telegram-чат."""
+    """Отправляем сообщение во все чаты из TELEGRAM_CHAT_ID."""
+    return fan_out(
+        deliver_to_chat, bot, parse_chat_ids(TELEGRAM_CHAT_ID), message,
+        DELIVERY
+    )
+
+
+def send_error(bot, message):
+    """Отправляем ошибку; повтор с другими деталями считается той же."""
+    return fan_out(
+        deliver_to_chat, bot, parse_chat_ids(TELEGRAM_CHAT_ID), message,
+        DELIVERY, fingerprint(message)
+    )
+
+
+def deliver_to_chat(bot, chat_id, message):
+    """Отправляем сообщение в чат; ошибка Telegram пробрасывается."""
+    with metrics.SEND_SECONDS.time():
+        bot.send_message(chat_id, message, timeout=limit(SEND_TIMEOUT))
+    HEALTH.sent()
+    logging.debug(BOT_ADVANCE.format(message=message))
+
+
+def send_to_chat(bot, chat_id, message):
+    """Отправляем сообщение в указанный Telegram-чат."""
     try:
-        bot.send_message(TELEGRAM_CHAT_ID, message)
-        logging.debug(BOT_ADVANCE.format(message=message))
+        deliver_to_chat(bot, chat_id, message)
         return True
-    except TelegramError as error:
+    except telegram.TelegramError as error:
         logging.error(BOT_ERROR.format(error=error), exc_info=True)
+        metrics.ERRORS.inc(path='telegram_send')
         return False
 
 
 def get_api_answer(timestamp):
     """Запрос к сервису Яндекс-практикум."""
+    return request_api_answer(timestamp, HEADERS)
+
+
+def make_headers(token):
+    """Заголовки запроса к API для токена студента."""
+    return {'Authorization': f'OAuth {token}'}
+
+
+def request_api_answer(timestamp, headers, get=None):
+    """Запрос к сервису Яндекс-практикум с заголовками студента."""
     request_params = dict(
         url=ENDPOINT,
-        headers=HEADERS,
+        headers=headers,
         params={'from_date': timestamp},
-        timeout=(TIMEOUT, TIMEOUT)
+        timeout=(limit(CONNECT_TIMEOUT), limit(READ_TIMEOUT))
     )
-    try:
-        response = requests.get(**request_params)
-    except requests.exceptions.RequestException as error:
-        raise ConnectionError(
-            SERVER_ERROR.format(error=error, **request_params)
-        )
-    else:
-        logging.debug(SERVER_ADVANCE)
-    if response.status_code != 200:
-        raise ValueError(
-            RESPONSE_ERROR.format(code=response.status_code, **request_params)
+    get = get or requests.get
+    if HEDGE_REQUESTS:
+        get = partial(get_hedger(ENDPOINT).call, get)
+    get = wrap_get(get)
+    with span('get_api_answer', {'http.url': ENDPOINT}) as current:
+        try:
+            with metrics.HTTP_SECONDS.time():
+                response = get_breaker(ENDPOINT).call(get, **request_params)
+        except requests.exceptions.RequestException as error:
+            metrics.ERRORS.inc(path='request_exception')
+            raise ConnectionError(
+                SERVER_ERROR.format(error=error, **request_params)
+            )
+        else:
+            logging.debug(SERVER_ADVANCE)
+        current.set_attribute('http.status_code', response.status_code)
+        current.set_attribute(
+            'http.response_content_length',
+            len(getattr(response, 'content', None) or b'')
         )
-    response_json = response.json()
+        if response.status_code != 200:
+            metrics.ERRORS.inc(path='response_status')
+            raise ValueError(RESPONSE_ERROR.format(
+                code=response.status_code, **request_params
+            ))
+        with span('response.json'), metrics.JSON_SECONDS.time():
+            response_json = decode_json(response)
     for key_refusal in ('error', 'code'):
         if key_refusal in response_json:
+            metrics.ERRORS.inc(path='denial_of_service')
             raise ValueError(
                 DENIAL_OF_SERVICE.format(
                     key_refusal=key_refusal,
@@ -119,18 +215,22 @@ def get_api_answer(timestamp):
                     **request_params
                 )
             )
+    HEALTH.polled()
     return response_json
 
 
 def check_response(response):
     """Проверяем ответ API."""
     if not isinstance(response, dict):
+        metrics.ERRORS.inc(path='response_type')
         raise TypeError(DATA_ERROR.format(type_data={type(response)}))
     if 'homeworks' not in response:
+        metrics.ERRORS.inc(path='homeworks_key')
         raise KeyError(ANS_KEY_ERROR.format(key='homeworks'))
     homeworks = response.get('homeworks')
     if not isinstance(homeworks, list):
         logging.error(TYPE_KEY_ERROR.format(type_key={type(homeworks)}))
+        metrics.ERRORS.inc(path='homeworks_type')
         raise TypeError(TYPE_KEY_ERROR.format(type_key={type(homeworks)}))
     return homeworks
 
@@ -139,50 +239,203 @@ def parse_status(homework):
     """Определяем статус домашней работы."""
     name = homework.get('homework_name')
     if name is None:
+        metrics.ERRORS.inc(path='homework_name')
         raise KeyError(JOB_KEY_ERROR.format(key='homeworks_name'))
     status = homework.get('status')
     logging.debug(STATUS_JOB.format(status=status))
     if status is None:
+        metrics.ERRORS.inc(path='homework_status')
         raise KeyError(JOB_KEY_ERROR.format(key='homeworks_status'))
     verdict = HOMEWORK_VERDICTS.get(status)
     logging.debug(RATING_JOB.format(verdict={verdict}))
     if verdict is None:
+        metrics.ERRORS.inc(path='unknown_status')
         raise ValueError(STATUS_JOB_ERROR.format(status=status))
     return STATUS_HOMEWORK.format(name=name, verdict=verdict)
 
 
+def status_messages(homeworks):
+    """Пары (работа, текст уведомления о её статусе)."""
+    for homework in homeworks:
+        with span('parse_status'):
+            message = parse_status(homework)
+        yield homework, message
+
+
+def deliver_changes(bot, messages, index, send=None):
+    """Отправляем уведомления о работах, статус которых изменился."""
+    send = send or send_message
+    delivered = True
+    for homework, message in messages:
+        if not index.changed(homework):
+            continue
+        check()
+        with span('send_message'):
+            sent = send(bot, message)
+        if sent:
+            index.commit(homework)
+        else:
+            delivered = False
+    return delivered
+
+
+def send_changes(bot, homeworks, index, send=None):
+    """Сообщаем обо всех работах, статус которых изменился."""
+    if not homeworks:
+        return True
+    return deliver_changes(
+        bot, status_messages(index.changes(homeworks)), index, send
+    )
+
+
+def parse_answer(scheduler, index, key, fetched):
+    """Стадия разбора; задержку до следующего опроса кладём в fetched.delay.
+
+    Опрос ждёт эту задержку, поэтому расписание учитывает ответ
+    текущего цикла, а не предыдущего.
+    """
+    try:
+        return parse_changes(scheduler, index, key, fetched)
+    finally:
+        if fetched.delay is not None:
+            fetched.delay.set_result(scheduler.next_delay())
+
+
+def parse_changes(scheduler, index, key, fetched):
+    """Проверяем ответ API и готовим уведомления только об изменениях."""
+    if fetched.error is not None:
+        metrics.ERRORS.inc(path='cycle')
+        scheduler.fail()
+        return Parsed(
+            fetched.timestamp, fetched.timestamp, [], fetched.error,
+            fetched.deadline,
+        )
+    messages = []
+    try:
+        with span('check_response'), metrics.VALIDATION_SECONDS.time():
+            homeworks = check_response(fetched.response)
+        metrics.LAST_POLL_AGE.touch(tenant=key)
+        scheduler.observe(homeworks)
+        for homework, message in status_messages(
+            index.changes(homeworks or [])
+        ):
+            messages.append((homework, message))
+    except Exception as error:
+        metrics.ERRORS.inc(path='cycle')
+        scheduler.fail()
+        return Parsed(
+            fetched.timestamp, fetched.timestamp, messages, error,
+            fetched.deadline,
+        )
+    return Parsed(
+        fetched.timestamp,
+        fetched.response.get('current_date', fetched.timestamp),
+        messages, None, fetched.deadline,
+    )
+
+
+def notify_answer(bot, index, errors, store, key, parsed):
+    """Стадия отправки: дата опроса сдвигается после доставки уведомлений.
+
+    Уведомления укладываются в остаток дедлайна, открытого при запросе.
+    """
+    error = parsed.error
+    try:
+        with use_deadline(parsed.deadline or Deadline(CYCLE_DEADLINE)):
+            delivered = deliver_changes(bot, parsed.messages, index)
+    except Exception as send_error:
+        error, delivered = error or send_error, False
+    if error is not None:
+        report_error(bot, errors, error)
+    send_error_summary(bot, errors)
+    timestamp = parsed.current if delivered and error is None else (
+        parsed.previous
+    )
+    store.save(key, timestamp, errors.dumps())
+    store.flush()
+    return timestamp
+
+
+def report_error(bot, errors, error, send=None):
+    """Сообщаем об ошибке, если она не повторяет недавно отправленную."""
+    message = MESSAGE_ERROR.format(error=error)
+    logging.error(message)
+    if errors.check(message) and (send or send_error)(bot, message):
+        errors.remember(message)
+
+
+def send_error_summary(bot, errors, send=None):
+    """Отправляем сводку подавленных повторов ошибок, если пора."""
+    summary = errors.summary()
+    if summary and (send or send_message)(bot, summary):
+        errors.summarized()
+
+
 def main():
     """Основная функция для запуска Бот-ассистента."""
     check_tokens()
-    bot = Bot(token=TELEGRAM_TOKEN)
+    bot = telegram.Bot(token=TELEGRAM_TOKEN)
+    start_tracing()
+    start_memory_watchdog()
+    open_cassette()
+    bot = wrap_bot(bot)
     logging.debug(START_BOT)
-    timestamp = int(time.time())
-    message_cache = ''
-    while True:
-        try:
-            response = get_api_answer(timestamp)
-            homeworks = check_response(response)
-            if homeworks and send_message(bot, parse_status(homeworks[0])):
-                timestamp = response.get('current_date', timestamp)
-        except Exception as error:
-            message = MESSAGE_ERROR.format(error=error)
-            logging.error(message)
-            if message != message_cache and send_message(bot, message):
-                message_cache = message
-        time.sleep(RETRY_PERIOD)
+    metrics.start_metrics_server()
+    store = StateStore(path=':memory:') if replaying() else StateStore()
+    key = tenant_key(PRACTICUM_TOKEN)
+    timestamp, error_cache = store.load(
+        key, start_timestamp(int(time.time()))
+    )
+    clock = cassette_clock()
+    errors = ErrorCache.loads(error_cache, clock=clock)
+    index = ChangeIndex.load(store, key)
+    scheduler = PollScheduler(RETRY_PERIOD, clock=clock)
+    HEALTH.expect(RETRY_PERIOD)
+    pipeline = Pipeline(
+        partial(parse_answer, scheduler, index, key),
+        partial(notify_answer, bot, index, errors, store, key),
+    )
+    shutdown = Shutdown()
+    shutdown.install()
+    try:
+        while True:
+            timestamp = pipeline.latest(timestamp, wait=replaying())
+            delay = Future()
+            with span('poll_cycle', {'tenant.id': key}):
+                with cycle_deadline(CYCLE_DEADLINE) as deadline:
+                    try:
+                        fetched = Fetched(
+                            timestamp, get_api_answer(timestamp), None, delay,
+                            deadline
+                        )
+                    except Exception as error:
+                        fetched = Fetched(
+                            timestamp, None, error, delay, deadline
+                        )
+                with shutdown.interruptible():
+                    pipeline.submit(fetched)
+                    delay = 0 if replaying() else delay.result()
+                HEALTH.cycled()
+            HEALTH.expect(delay)
+            with shutdown.interruptible():
+                time.sleep(delay)
+    finally:
+        shutdown.restore()
+        pipeline.close()
+        store.close()
+        close_cassette()
+        stop_tracing()
+        stop_memory_watchdog()
+        if shutdown.requested:
+            logging.info(SHUTDOWN_DONE)
 
 
 if __name__ == '__main__':
+    if '--profile-startup' in sys.argv[1:]:
+        from homework_bot.startup import profile_startup
+        sys.exit(profile_startup())
     logging.basicConfig(
         level=logging.DEBUG,
-        format=(
-            '%(asctime)s - %(filename)s - '
-            '%(funcName)s - %(lineno)d - '
-            '%(levelname)s - %(message)s'
-        ),
-        handlers=[
-            logging.FileHandler(__file__ + '.log'),
-            logging.StreamHandler(sys.stdout),
-        ],
+        handlers=[start_log_listener(__file__ + '.log', LOG_FORMAT)],
     )
     main()
@@ -0,0 +1,5 @@
+"""
+Движок опроса API Практикум.Домашка для множества студентов.
+Переиспользует функции модуля homework и хранит состояние
+каждого студента отдельно.
+"""
@@ -0,0 +1,19 @@
+"""Запуск движка: python -m homework_bot."""
+
+import logging
+
+import homework
+from homework_bot import engine, supervisor
+from homework_bot.logs import start_log_listener
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.DEBUG,
+        handlers=[
+            start_log_listener('homework_bot.log', homework.LOG_FORMAT)
+        ],
+    )
+    if supervisor.WORKERS > 1:
+        supervisor.main()
+    else:
+        engine.main()
@@ -0,0 +1,35 @@
+"""
+Структуры с ограниченным размером для долгоживущего состояния.
+Бот работает месяцами, поэтому всё, что копится по студенту (индексы
+статусов, кэши), ограничено: при переполнении вытесняется запись,
+которая дольше всех не обновлялась, а вытеснение считается в метрике.
+"""
+
+from collections import OrderedDict
+
+from homework_bot import metrics
+
+EVICTIONS = metrics.Counter(
+    'homework_bounded_evictions_total',
+    'Записи, вытесненные из ограниченных структур.'
+)
+
+
+class BoundedDict(OrderedDict):
+    """Словарь не больше maxsize записей с вытеснением давно обновлённых."""
+
+    def __init__(self, maxsize, name='', items=()):
+        """Словарь name на maxsize записей."""
+        super().__init__()
+        self.maxsize = maxsize
+        self.name = name
+        self.update(items)
+
+    def __setitem__(self, key, value):
+        """Запись становится самой свежей; лишние вытесняются."""
+        if key in self:
+            self.move_to_end(key)
+        super().__setitem__(key, value)
+        while len(self) > self.maxsize:
+            self.popitem(last=False)
+            EVICTIONS.inc(structure=self.name)
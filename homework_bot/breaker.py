@@ -0,0 +1,130 @@
+"""
+Предохранитель (circuit breaker) запросов к API.
+Один предохранитель на адрес сервиса, общий для всех студентов.
+После BREAKER_THRESHOLD ошибок подряд (таймауты, обрыв соединения,
+ответы 5xx) запросы не отправляются BREAKER_RESET секунд, затем
+пропускается единственный пробный запрос: удачный замыкает цепь,
+неудачный снова размыкает её.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from homework_bot import metrics
+
+BREAKER_RESET = float(os.getenv('BREAKER_RESET', 60))
+BREAKER_THRESHOLD = int(os.getenv('BREAKER_THRESHOLD', 5))
+CIRCUIT_CLOSED = 'Сервис {endpoint} снова отвечает, запросы возобновлены'
+CIRCUIT_OPEN = 'Сервис {endpoint} недоступен, запросы приостановлены'
+CIRCUIT_OPENED = (
+    'Сервис {endpoint} не ответил {failures} раз подряд, '
+    'запросы приостановлены на {reset:.0f} с'
+)
+CLOSED = 'closed'
+HALF_OPEN = 'half_open'
+OPEN = 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = metrics.Gauge(
+    'homework_circuit_state',
+    'Состояние предохранителя: 0 - замкнут, 1 - проба, 2 - разомкнут.'
+)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """Предохранитель запросов к одному сервису."""
+
+    def __init__(self, endpoint, threshold=BREAKER_THRESHOLD,
+                 reset=BREAKER_RESET, clock=time.monotonic):
+        """Размыкается после threshold ошибок подряд на reset секунд."""
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.reset = reset
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.set(STATE_VALUES[CLOSED], endpoint=endpoint)
+
+    def _set_state(self, state):
+        """Меняем состояние и значение метрики."""
+        self.state = state
+        CIRCUIT_STATE.set(STATE_VALUES[state], endpoint=self.endpoint)
+
+    def acquire(self):
+        """Разрешение на запрос; ConnectionError, пока цепь разомкнута."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if (
+                self.state == OPEN
+                and self.clock() - self.opened_at >= self.reset
+            ):
+                self._set_state(HALF_OPEN)
+                return
+        metrics.ERRORS.inc(path='circuit_open')
+        raise ConnectionError(CIRCUIT_OPEN.format(endpoint=self.endpoint))
+
+    def success(self):
+        """Сервис ответил: замыкаем цепь."""
+        with self._lock:
+            if self.state != CLOSED:
+                logging.info(CIRCUIT_CLOSED.format(endpoint=self.endpoint))
+                self._set_state(CLOSED)
+            self.failures = 0
+
+    def failure(self):
+        """Сервис не ответил: после threshold ошибок размыкаем цепь."""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.failures >= self.threshold
+            ):
+                logging.warning(CIRCUIT_OPENED.format(
+                    endpoint=self.endpoint, failures=self.failures,
+                    reset=self.reset
+                ))
+                self.opened_at = self.clock()
+                self._set_state(OPEN)
+
+    def call(self, get, **kwargs):
+        """Запрос get через предохранитель; 5xx считается ошибкой."""
+        self.acquire()
+        try:
+            response = get(**kwargs)
+        except BaseException:
+            self.failure()
+            raise
+        if response.status_code >= 500:
+            self.failure()
+        else:
+            self.success()
+        return response
+
+
+def get_breaker(endpoint):
+    """Общий предохранитель для адреса endpoint."""
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(endpoint)
+        return _breakers[endpoint]
+
+
+def reset_breakers():
+    """Забываем состояние всех предохранителей."""
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def circuit_states():
+    """Состояние предохранителя каждого адреса."""
+    with _breakers_lock:
+        return {
+            endpoint: breaker.state for endpoint, breaker in _breakers.items()
+        }
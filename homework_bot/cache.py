@@ -0,0 +1,91 @@
+"""
+Кэш последних статусов работ студента для ответов на команды.
+Циклы опроса дополняют кэш изменёнными работами, поэтому команда
+/status обычно отвечает без запроса к API. Полный запрос делается только
+при промахе (кэш пуст или старше STATUS_TTL секунд), а одновременные
+промахи одного студента ждут один общий запрос. Кэш ограничен
+STATUS_CACHE_SIZE работами.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from homework_bot.bounded import BoundedDict
+from homework_bot.state import homework_key
+
+STATUS_CACHE_SIZE = int(os.getenv('STATUS_CACHE_SIZE', 1000))
+STATUS_TTL = int(os.getenv('STATUS_TTL', 300))
+
+
+class StatusCache:
+    """Работы студента: ключ работы -> последний ответ API по ней."""
+
+    def __init__(self, ttl=STATUS_TTL, clock=time.monotonic,
+                 size=STATUS_CACHE_SIZE):
+        """Кэш, устаревающий через ttl секунд."""
+        self.ttl = ttl
+        self.size = size
+        self.clock = clock
+        self.homeworks = None
+        self.updated = None
+        self._lock = threading.Lock()
+        self._loading = None
+
+    def fresh(self):
+        """Полон ли кэш и не устарел ли он."""
+        return (
+            self.homeworks is not None
+            and self.clock() - self.updated < self.ttl
+        )
+
+    def replace(self, homeworks):
+        """Полный список работ студента."""
+        with self._lock:
+            self.homeworks = BoundedDict(self.size, 'status_cache', (
+                (homework_key(homework), homework) for homework in homeworks
+            ))
+            self.updated = self.clock()
+
+    def merge(self, homeworks):
+        """Дополняем кэш результатом очередного цикла опроса.
+
+        Ответ с from_date содержит только изменившиеся работы, поэтому
+        он продлевает кэш, только если полный список уже загружен.
+        """
+        with self._lock:
+            if self.homeworks is None:
+                return
+            for homework in homeworks:
+                self.homeworks[homework_key(homework)] = homework
+            self.updated = self.clock()
+
+    def get(self):
+        """Работы из кэша или None при промахе."""
+        with self._lock:
+            if not self.fresh():
+                return None
+            return list(self.homeworks.values())
+
+    def fetch(self, loader):
+        """Работы из кэша; при промахе loader() вызывается один раз."""
+        with self._lock:
+            if self.fresh():
+                return list(self.homeworks.values())
+            future, owner = self._loading, self._loading is None
+            if owner:
+                future = self._loading = Future()
+        if not owner:
+            return future.result()
+        try:
+            homeworks = loader()
+            self.replace(homeworks)
+            future.set_result(list(homeworks))
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        finally:
+            with self._lock:
+                self._loading = None
+        return list(homeworks)
@@ -0,0 +1,291 @@
+"""
+Запись и воспроизведение обмена бота с API и Telegram (кассета JSONL).
+С CASSETTE_MODE=record каждый запрос к API (параметры, статус, тело,
+время ответа) и каждое сообщение в Telegram дописываются строкой в
+CASSETTE_FILE. С CASSETTE_MODE=replay ответы API берутся из кассеты по
+порядку без сети, сообщения не отправляются, а пишутся в CASSETTE_OUTPUT,
+и пауза между циклами пропускается: день работы проигрывается за секунды.
+Состояние берётся не из STATE_FILE, а с нуля в памяти, а часы бота
+идут по записанному времени запросов, поэтому окна повторов ошибок и
+сводки совпадают с записанным прогоном.
+Когда ответы кончаются, бот завершает работу со сводкой. Сообщения двух
+прогонов сравниваются командой
+python -m homework_bot.cassette cassette.jsonl replay.jsonl.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from functools import partial
+
+from homework_bot.lazy import lazy_import
+
+requests = lazy_import('requests')
+
+CASSETTE_DIVERGED = 'Запрос с from_date {actual} вместо записанного {expected}'
+CASSETTE_DONE = (
+    'Кассета проиграна: запросов {requests}, сообщений {messages}, '
+    'расхождений from_date {diverged}. Записано за {recorded:.0f} с, '
+    'проиграно за {elapsed:.2f} с, процессорное время {cpu:.2f} с'
+)
+CASSETTE_FILE = os.getenv('CASSETTE_FILE', 'cassette.jsonl')
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', '')
+CASSETTE_MODE_ERROR = 'Неизвестный режим кассеты: {mode}'
+CASSETTE_OUTPUT = os.getenv('CASSETTE_OUTPUT', 'replay.jsonl')
+MESSAGES_DIFFER = 'Сообщение {number}:\n- {expected}\n+ {actual}'
+MESSAGES_SAME = 'Сообщения совпадают: {count}'
+RECORD = 'record'
+REPLAY = 'replay'
+
+_active = None
+
+
+class Replayed:
+    """Ответ API, восстановленный из кассеты."""
+
+    def __init__(self, status_code, text):
+        """Ответ со статусом status_code и телом text."""
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+
+    def json(self):
+        """Тело ответа в виде JSON."""
+        return json.loads(self.text)
+
+
+class Recorder:
+    """Запись обмена с API и Telegram в кассету."""
+
+    def __init__(self, path, mode='a'):
+        """Кассета в файле path."""
+        self.file = open(path, mode, encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, entry):
+        """Дописываем строку кассеты."""
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self.file.write(line)
+            self.file.flush()
+
+    def get(self, get, **kwargs):
+        """Запрос к API с записью ответа или ошибки."""
+        entry = {'type': 'request', 'at': time.time(),
+                 'params': kwargs.get('params')}
+        start = time.perf_counter()
+        try:
+            response = get(**kwargs)
+        except requests.exceptions.RequestException as error:
+            entry.update(elapsed=time.perf_counter() - start, error=str(error))
+            self.write(entry)
+            raise
+        entry.update(
+            elapsed=time.perf_counter() - start,
+            status=response.status_code, body=response.text,
+        )
+        self.write(entry)
+        return response
+
+    def bot(self, bot):
+        """Бот, записывающий отправленные сообщения."""
+        return RecordingBot(bot, self)
+
+    def close(self):
+        """Закрываем файл кассеты."""
+        self.file.close()
+
+
+class RecordingBot:
+    """Обёртка бота: сообщения отправляются и записываются в кассету."""
+
+    def __init__(self, bot, recorder):
+        """Обёртка над bot с записью в recorder."""
+        self._bot = bot
+        self.recorder = recorder
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Отправляем сообщение и записываем его."""
+        entry = {'type': 'message', 'at': time.time(),
+                 'chat_id': chat_id, 'text': text}
+        start = time.perf_counter()
+        try:
+            result = self._bot.send_message(chat_id, text, **kwargs)
+        except Exception as error:
+            entry.update(elapsed=time.perf_counter() - start, error=str(error))
+            self.recorder.write(entry)
+            raise
+        entry.update(elapsed=time.perf_counter() - start)
+        self.recorder.write(entry)
+        return result
+
+    def __getattr__(self, name):
+        """Остальные методы — методы исходного бота."""
+        return getattr(self._bot, name)
+
+
+class ReplayBot:
+    """Бот воспроизведения: сообщения пишутся в файл вместо отправки."""
+
+    def __init__(self, player):
+        """Бот, пишущий сообщения в вывод player."""
+        self.player = player
+
+    def send_message(self, chat_id, text, **kwargs):
+        """Записываем сообщение вместо отправки."""
+        self.player.messages += 1
+        self.player.output.write(
+            {'type': 'message', 'chat_id': chat_id, 'text': text}
+        )
+        return True
+
+
+class Player:
+    """Воспроизведение ответов API из кассеты."""
+
+    def __init__(self, path, output):
+        """Ответы из кассеты path, сообщения — в файл output."""
+        with open(path, encoding='utf-8') as file:
+            self.requests = deque(
+                entry for entry in map(json.loads, filter(str.strip, file))
+                if entry['type'] == 'request'
+            )
+        self.recorded = (
+            self.requests[-1]['at'] - self.requests[0]['at']
+            if self.requests else 0
+        )
+        self.now = self.requests[0]['at'] if self.requests else time.time()
+        self.output = Recorder(output, mode='w')
+        self.played = self.messages = self.diverged = 0
+        self.started = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def start(self, default):
+        """from_date первого записанного запроса."""
+        if not self.requests:
+            return default
+        return self.requests[0]['params'].get('from_date', default)
+
+    def get(self, get, **kwargs):
+        """Следующий ответ из кассеты; SystemExit, когда они кончились."""
+        if not self.requests:
+            logging.info(self.summary())
+            raise SystemExit(0)
+        entry = self.requests.popleft()
+        self.now = entry['at']
+        self.played += 1
+        expected = entry['params'].get('from_date')
+        actual = (kwargs.get('params') or {}).get('from_date')
+        if expected != actual:
+            self.diverged += 1
+            logging.warning(
+                CASSETTE_DIVERGED.format(actual=actual, expected=expected)
+            )
+        if 'error' in entry:
+            raise requests.exceptions.ConnectionError(entry['error'])
+        return Replayed(entry['status'], entry['body'])
+
+    def clock(self):
+        """Время последнего проигранного запроса по записи."""
+        return self.now
+
+    def summary(self):
+        """Сводка проигрывания."""
+        return CASSETTE_DONE.format(
+            requests=self.played, messages=self.messages,
+            diverged=self.diverged, recorded=self.recorded,
+            elapsed=time.perf_counter() - self.started,
+            cpu=time.process_time() - self.cpu,
+        )
+
+    def bot(self, bot):
+        """Бот, пишущий сообщения в вывод проигрывания."""
+        return ReplayBot(self)
+
+    def close(self):
+        """Закрываем файл вывода."""
+        self.output.close()
+
+
+def open_cassette(mode=CASSETTE_MODE, path=CASSETTE_FILE,
+                  output=CASSETTE_OUTPUT):
+    """Включаем кассету в режиме mode; без режима кассета не нужна."""
+    global _active
+    if not mode:
+        _active = None
+    elif mode == RECORD:
+        _active = Recorder(path)
+    elif mode == REPLAY:
+        _active = Player(path, output)
+    else:
+        raise ValueError(CASSETTE_MODE_ERROR.format(mode=mode))
+    return _active
+
+
+def close_cassette():
+    """Выключаем кассету."""
+    global _active
+    if _active is not None:
+        _active.close()
+        _active = None
+
+
+def wrap_get(get):
+    """Функция запроса к API с учётом включённой кассеты."""
+    return get if _active is None else partial(_active.get, get)
+
+
+def wrap_bot(bot):
+    """Бот с учётом включённой кассеты."""
+    return bot if _active is None else _active.bot(bot)
+
+
+def replaying():
+    """Идёт ли воспроизведение кассеты."""
+    return isinstance(_active, Player)
+
+
+def start_timestamp(default):
+    """Начальный from_date: из кассеты при воспроизведении."""
+    return _active.start(default) if replaying() else default
+
+
+def cassette_clock():
+    """Часы бота: записанное время запросов при воспроизведении."""
+    return _active.clock if replaying() else time.time
+
+
+def messages(path):
+    """Тексты сообщений из кассеты или вывода проигрывания."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            entry['text']
+            for entry in map(json.loads, filter(str.strip, file))
+            if entry['type'] == 'message' and 'error' not in entry
+        ]
+
+
+def compare(expected_path, actual_path, stream=None):
+    """Печатаем расхождения сообщений двух прогонов; 0, если их нет."""
+    stream = stream or sys.stdout
+    expected, actual = messages(expected_path), messages(actual_path)
+    differences = 0
+    for number in range(max(len(expected), len(actual))):
+        left = expected[number] if number < len(expected) else None
+        right = actual[number] if number < len(actual) else None
+        if left != right:
+            differences += 1
+            print(MESSAGES_DIFFER.format(
+                number=number + 1, expected=left, actual=right
+            ), file=stream)
+    if not differences:
+        print(MESSAGES_SAME.format(count=len(expected)), file=stream)
+    return int(bool(differences))
+
+
+if __name__ == '__main__':
+    sys.exit(compare(*sys.argv[1:3]))
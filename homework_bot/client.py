@@ -0,0 +1,73 @@
+"""
+HTTP-клиент API Практикум.Домашка с пулом keep-alive соединений.
+Соединения (вместе с TLS-сессией) переиспользуются между опросами,
+поэтому рукопожатие выполняется только при открытии нового соединения.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+POOL_BLOCK = os.getenv('POOL_BLOCK', '1') == '1'
+POOL_CONNECTIONS = int(os.getenv('POOL_CONNECTIONS', 10))
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', 100))
+POOL_STATS = (
+    'Пул соединений: запросов {requests}, '
+    'переиспользовано {hits}, новых соединений {misses}'
+)
+
+
+class PracticumClient:
+    """Клиент с пулом соединений и счётчиками попаданий в пул."""
+
+    def __init__(self, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK):
+        """Пул на pool_maxsize соединений с каждым хостом."""
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.adapter.poolmanager.pools.dispose_func = self._dispose
+        self.session = requests.Session()
+        self.session.headers['Connection'] = 'keep-alive'
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retired = 0
+
+    def get(self, url, **kwargs):
+        """GET-запрос через общий пул соединений."""
+        with self._lock:
+            self._requests += 1
+        return self.session.get(url, **kwargs)
+
+    def _dispose(self, pool):
+        """Учитываем соединения пула, вытесненного из PoolManager."""
+        with self._lock:
+            self._retired += pool.num_connections
+        pool.close()
+
+    def stats(self):
+        """Счётчики переиспользования соединений."""
+        pools = self.adapter.poolmanager.pools
+        opened = sum(
+            pool.num_connections
+            for pool in (pools.get(key) for key in pools.keys())
+            if pool is not None
+        )
+        with self._lock:
+            misses = self._retired + opened
+            total = self._requests
+        return {
+            'requests': total,
+            'hits': max(total - misses, 0),
+            'misses': misses,
+        }
+
+    def close(self):
+        """Закрываем все соединения пула."""
+        self.session.close()
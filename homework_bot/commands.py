@@ -0,0 +1,147 @@
+"""
+Команды бота: /status и /last.
+Ответы берутся из кэша статусов студента (StatusCache); запрос к API
+делается только при промахе кэша. Обновления Telegram читаются
+long polling'ом (getUpdates) в фоновой задаче.
+"""
+
+import asyncio
+import logging
+
+import homework
+from homework_bot.validator import check_response
+
+COMMAND_POLL_TIMEOUT = 30
+COMMAND_RETRY_PERIOD = 5
+LAST_HOMEWORK = 'Последняя работа "{name}". {verdict}'
+NO_HOMEWORKS = 'Работ пока нет.'
+STATUS_LINE = '"{name}". {verdict}'
+STUDENT_ANSWER = '{name}:\n{text}'
+STUDENT_CHAT = 'Студент из чата {chat_id}'
+UNKNOWN_VERDICT = 'Статус {status}'
+UPDATES_ERROR = 'Не удалось получить команды из Telegram: {error}'
+
+
+def parse_command(text):
+    """Команда из текста сообщения: '/status@bot 1' -> '/status'."""
+    if not text or not text.startswith('/'):
+        return None
+    return text.split()[0].split('@')[0].lower()
+
+
+def verdict(homework_item):
+    """Вердикт по статусу работы."""
+    status = homework_item.get('status')
+    return homework.HOMEWORK_VERDICTS.get(
+        status, UNKNOWN_VERDICT.format(status=status)
+    )
+
+
+def format_status(homeworks):
+    """Ответ на /status: статусы всех работ."""
+    if not homeworks:
+        return NO_HOMEWORKS
+    return '\n'.join(
+        STATUS_LINE.format(
+            name=item.get('homework_name'), verdict=verdict(item)
+        )
+        for item in homeworks
+    )
+
+
+def format_last(homeworks):
+    """Ответ на /last: статус последней изменённой работы."""
+    if not homeworks:
+        return NO_HOMEWORKS
+    last = max(homeworks, key=lambda item: str(item.get('date_updated', '')))
+    return LAST_HOMEWORK.format(
+        name=last.get('homework_name'), verdict=verdict(last)
+    )
+
+
+COMMANDS = {
+    '/last': format_last,
+    '/status': format_status,
+}
+
+
+def fetch_homeworks(tenant, get=None):
+    """Все работы студента: запрос к API с from_date=0."""
+    return check_response(
+        homework.request_api_answer(0, tenant.headers, get)
+    )
+
+
+def answer(tenant, command, get=None):
+    """Текст ответа на команду студента."""
+    homeworks = tenant.status.fetch(lambda: fetch_homeworks(tenant, get))
+    return COMMANDS[command](homeworks)
+
+
+def safe_answer(tenant, command, get=None):
+    """Ответ на команду или текст ошибки, если ответить не удалось."""
+    try:
+        return answer(tenant, command, get)
+    except Exception as error:
+        text = homework.MESSAGE_ERROR.format(error=error)
+        logging.error(text)
+        return text
+
+
+def reply(tenant, bot, command, get=None, chat_id=None):
+    """Отвечаем на команду в чат, из которого она пришла."""
+    return reply_all([tenant], bot, command, get, chat_id)
+
+
+def reply_all(tenants, bot, command, get=None, chat_id=None, labelled=None):
+    """Отвечаем одним сообщением за всех студентов, на которых подписан чат.
+
+    Если студентов несколько (labelled), ответ каждого подписан именем.
+    """
+    if labelled is None:
+        labelled = len(tenants) > 1
+    texts = []
+    for tenant in tenants:
+        text = safe_answer(tenant, command, get)
+        if labelled:
+            text = STUDENT_ANSWER.format(
+                name=tenant.name or STUDENT_CHAT.format(
+                    chat_id=tenant.chat_id
+                ),
+                text=text,
+            )
+        texts.append(text)
+    return homework.send_to_chat(
+        bot, chat_id or tenants[0].chat_id, '\n\n'.join(texts)
+    )
+
+
+def schedule_reply(replies, tenants, bot, command, get=None, chat_id=None,
+                   labelled=None):
+    """Отвечаем на команду в фоне, не задерживая чтение обновлений."""
+    task = asyncio.create_task(asyncio.to_thread(
+        reply_all, tenants, bot, command, get, chat_id, labelled
+    ))
+    replies.add(task)
+    task.add_done_callback(replies.discard)
+
+
+async def listen(bot, route, timeout=COMMAND_POLL_TIMEOUT):
+    """Читаем команды из Telegram и передаём route(chat_id, команда)."""
+    offset = None
+    while True:
+        try:
+            updates = await asyncio.to_thread(
+                bot.get_updates, offset=offset, timeout=timeout,
+                allowed_updates=['message'],
+            )
+        except Exception as error:
+            logging.warning(UPDATES_ERROR.format(error=error))
+            await asyncio.sleep(COMMAND_RETRY_PERIOD)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            message = update.effective_message
+            command = parse_command(message.text if message else None)
+            if command in COMMANDS:
+                route(str(message.chat_id), command)
@@ -0,0 +1,73 @@
+"""
+Общий бюджет времени на цикл опроса.
+Цикл открывает дедлайн (with cycle_deadline(...)), и запрос к API и
+отправки в Telegram берут таймауты из его остатка, поэтому один
+зависший вызов не растягивает цикл дольше бюджета. Дедлайн хранится в
+contextvars: у каждого потока и задачи он свой.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEADLINE_EXCEEDED = 'Бюджет времени цикла опроса ({seconds:.0f} с) исчерпан'
+
+_current = ContextVar('deadline', default=None)
+
+
+class Deadline:
+    """Момент, к которому цикл опроса должен завершиться."""
+
+    def __init__(self, seconds, clock=time.monotonic):
+        """Дедлайн через seconds секунд."""
+        self.seconds = seconds
+        self.clock = clock
+        self.expires = clock() + seconds
+
+    def remaining(self):
+        """Сколько секунд осталось."""
+        return max(self.expires - self.clock(), 0)
+
+    def limit(self, timeout=None):
+        """Таймаут, не выходящий за дедлайн; TimeoutError, если он истёк."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise TimeoutError(DEADLINE_EXCEEDED.format(seconds=self.seconds))
+        return remaining if timeout is None else min(timeout, remaining)
+
+
+@contextmanager
+def cycle_deadline(seconds):
+    """Дедлайн для вызовов внутри блока."""
+    with use_deadline(Deadline(seconds)) as deadline:
+        yield deadline
+
+
+@contextmanager
+def use_deadline(deadline):
+    """Продолжаем уже открытый дедлайн deadline, например в другой стадии."""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def current_deadline():
+    """Дедлайн текущего цикла или None."""
+    return _current.get()
+
+
+def limit(timeout=None):
+    """Таймаут, урезанный до остатка дедлайна текущего цикла."""
+    deadline = _current.get()
+    if deadline is None:
+        return timeout
+    return deadline.limit(timeout)
+
+
+def check():
+    """TimeoutError, если дедлайн текущего цикла истёк."""
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.limit()
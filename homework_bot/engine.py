@@ -0,0 +1,313 @@
+"""
+Асинхронный опрос множества студентов из одного процесса.
+Каждый студент (тенант) опрашивается своей корутиной с той же
+семантикой, что и main() в модуле homework.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import homework
+from homework_bot import commands, metrics
+from homework_bot.cache import StatusCache
+from homework_bot.client import POOL_STATS, PracticumClient
+from homework_bot.deadline import cycle_deadline
+from homework_bot.errors import ErrorCache, fingerprint
+from homework_bot.fanout import Delivery, fan_out
+from homework_bot.health import HEALTH
+from homework_bot.index import ChangeIndex
+from homework_bot.outbound import QUEUE_DEPTH, OutboundQueue, make_bot
+from homework_bot.scheduler import IDLE_MAX_PERIOD, PollScheduler
+from homework_bot.shutdown import (SHUTDOWN_DONE, SHUTDOWN_GRACE,
+                                   SHUTDOWN_SIGNALS)
+from homework_bot.state import StateStore, tenant_key
+from homework_bot.tracing import span, start_tracing, stop_tracing
+from homework_bot.validator import check_response
+from homework_bot.watchdog import start_memory_watchdog, stop_memory_watchdog
+
+CONCURRENCY = int(os.getenv('ENGINE_CONCURRENCY', 100))
+CYCLE_FAILED = 'Цикл опроса студента {tenant} прерван: {error}'
+SHUTDOWN_STARTED = 'Остановка: ждём завершения циклов опроса до {grace:.0f} с'
+START_ENGINE = 'Движок запущен, студентов: {count}'
+START_SPREAD = 60
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+TENANTS_FILE = os.getenv('TENANTS_FILE', 'tenants.json')
+TENANTS_ERROR = 'Ожидается список студентов, получен {type_data}'
+TENANT_KEY_ERROR = 'Описание студента не содержит ключа "{key}"'
+
+
+@dataclass
+class Tenant:
+    """Студент: токен Практикума, чаты подписчиков и состояние опроса."""
+
+    token: str
+    chat_id: str
+    subscribers: tuple = ()
+    name: str = ''
+    timestamp: int = field(default_factory=lambda: int(time.time()))
+    errors: ErrorCache = field(default_factory=ErrorCache)
+    scheduler: PollScheduler = field(
+        default_factory=lambda: PollScheduler(homework.RETRY_PERIOD)
+    )
+    index: ChangeIndex = field(default_factory=ChangeIndex)
+    status: StatusCache = field(default_factory=StatusCache)
+    delivery: Delivery = field(default_factory=Delivery)
+
+    @property
+    def headers(self):
+        """Заголовки запроса к API для студента."""
+        return homework.make_headers(self.token)
+
+    @property
+    def key(self):
+        """Ключ студента в хранилище состояния."""
+        return tenant_key(self.token)
+
+    @property
+    def chat_ids(self):
+        """Чат студента и чаты остальных подписчиков."""
+        return (self.chat_id, *self.subscribers)
+
+    def subscribe(self, chat_ids):
+        """Добавляем подписчиков, пропуская уже подписанные чаты."""
+        self.subscribers += tuple(
+            chat_id for chat_id in dict.fromkeys(chat_ids)
+            if chat_id not in self.chat_ids
+        )
+
+    def restore(self, store):
+        """Восстанавливаем состояние студента из хранилища."""
+        self.timestamp, error_cache = store.load(
+            self.key, self.timestamp, self.errors.dumps()
+        )
+        self.errors = ErrorCache.loads(error_cache)
+        self.index = ChangeIndex.load(store, self.key)
+
+    def send(self, bot, message, key=None):
+        """Отправляем сообщение подписчикам, которым оно ещё не дошло."""
+        return fan_out(
+            homework.deliver_to_chat, bot, self.chat_ids, message,
+            self.delivery, key
+        )
+
+    def send_error(self, bot, message):
+        """Отправляем ошибку; повтор с другими деталями считается той же."""
+        return self.send(bot, message, fingerprint(message))
+
+
+def load_tenants(path):
+    """Загружаем студентов из JSON-файла.
+
+    Записи с одним токеном объединяются: токен опрашивается один раз,
+    а сообщения уходят всем чатам (chat_id и список subscribers).
+    """
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise TypeError(TENANTS_ERROR.format(type_data=type(data)))
+    tenants = {}
+    for item in data:
+        for key in ('token', 'chat_id'):
+            if key not in item:
+                raise KeyError(TENANT_KEY_ERROR.format(key=key))
+        chat_ids = [
+            str(chat_id)
+            for chat_id in [item['chat_id'], *item.get('subscribers', ())]
+        ]
+        tenant = tenants.setdefault(
+            item['token'], Tenant(token=item['token'], chat_id=chat_ids[0])
+        )
+        tenant.subscribe(chat_ids)
+        tenant.name = tenant.name or item.get('name', '')
+    return list(tenants.values())
+
+
+def poll_changes(tenant, bot, get=None):
+    """Запрос к API и уведомления об изменениях в пределах дедлайна."""
+    response = homework.request_api_answer(
+        tenant.timestamp, tenant.headers, get
+    )
+    with span('check_response'), metrics.VALIDATION_SECONDS.time():
+        homeworks = check_response(response)
+    metrics.LAST_POLL_AGE.touch(tenant=tenant.key)
+    tenant.status.merge(homeworks)
+    tenant.scheduler.observe(homeworks)
+    if homework.send_changes(bot, homeworks, tenant.index, tenant.send):
+        tenant.timestamp = response.get('current_date', tenant.timestamp)
+
+
+def poll_once(tenant, bot, get=None, store=None):
+    """Один цикл опроса студента."""
+    try:
+        with cycle_deadline(homework.CYCLE_DEADLINE), span(
+            'poll_cycle', {'tenant.id': tenant.key}
+        ):
+            poll_changes(tenant, bot, get)
+    except Exception as error:
+        metrics.ERRORS.inc(path='cycle')
+        tenant.scheduler.fail()
+        homework.report_error(bot, tenant.errors, error, tenant.send_error)
+    homework.send_error_summary(bot, tenant.errors, tenant.send)
+    if store is not None:
+        store.save(tenant.key, tenant.timestamp, tenant.errors.dumps())
+
+
+def watch_health(outbound):
+    """Проверки живости учитывают очередь и самый долгий интервал опроса."""
+    HEALTH.add_queue('telegram', outbound.depth)
+    HEALTH.expect(IDLE_MAX_PERIOD)
+
+
+async def stopped(stop, delay):
+    """Ждём delay секунд; True, если за это время пришёл сигнал остановки."""
+    try:
+        await asyncio.wait_for(stop.wait(), delay)
+    except asyncio.TimeoutError:
+        return False
+    return True
+
+
+async def poll_tenant(tenant, bot, semaphore, get=None, store=None,
+                      stop=None):
+    """Опрос одного студента по его расписанию до сигнала остановки.
+
+    Сбой цикла вне запроса (запись состояния, отправка ошибки) логируется,
+    и опрос продолжается: он не останавливает остальных студентов.
+    """
+    stop = stop or asyncio.Event()
+    if await stopped(stop, random.uniform(0, START_SPREAD)):
+        return
+    while True:
+        async with semaphore:
+            try:
+                await asyncio.to_thread(poll_once, tenant, bot, get, store)
+            except Exception as error:
+                metrics.ERRORS.inc(path='cycle')
+                tenant.scheduler.fail()
+                logging.error(
+                    CYCLE_FAILED.format(tenant=tenant.key, error=error),
+                    exc_info=True,
+                )
+            HEALTH.cycled()
+        if await stopped(stop, tenant.scheduler.next_delay()):
+            return
+
+
+async def flush_state(store, stop=None):
+    """Периодически записываем накопленное состояние на диск."""
+    stop = stop or asyncio.Event()
+    while not await stopped(stop, store.flush_period):
+        await asyncio.to_thread(store.flush)
+    await asyncio.to_thread(store.flush)
+
+
+async def run(tenants, bot, concurrency=CONCURRENCY, get=None, store=None,
+              stop=None):
+    """Опрашиваем всех студентов, не более concurrency запросов сразу."""
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=concurrency)
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    stop = stop or asyncio.Event()
+    tasks = [
+        poll_tenant(tenant, bot, semaphore, get, store, stop)
+        for tenant in tenants
+    ]
+    if store is not None:
+        for tenant in tenants:
+            tenant.restore(store)
+        tasks.append(flush_state(store, stop))
+    logging.debug(START_ENGINE.format(count=len(tenants)))
+    await asyncio.gather(*tasks)
+
+
+async def log_stats(client, outbound, period=homework.RETRY_PERIOD):
+    """Периодически логируем состояние пула соединений и очереди."""
+    while True:
+        await asyncio.sleep(period)
+        logging.info(POOL_STATS.format(**client.stats()))
+        logging.info(QUEUE_DEPTH.format(depth=outbound.depth()))
+
+
+async def serve(tenants, bot, client, store, grace=SHUTDOWN_GRACE):
+    """Опрос студентов через общий пул и очередь сообщений.
+
+    Параллельно читаются команды студентов (/status, /last). По сигналу
+    остановки новые циклы не начинаются, а начатые дорабатывают не
+    дольше grace секунд, пока очередь доставляет их сообщения.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in SHUTDOWN_SIGNALS:
+        loop.add_signal_handler(signum, stop.set)
+    outbound = OutboundQueue(bot)
+    outbound.start()
+    watch_health(outbound)
+    dispatcher = asyncio.create_task(outbound.run())
+    stats = asyncio.create_task(log_stats(client, outbound))
+    by_chat = {}
+    for tenant in tenants:
+        for chat_id in tenant.chat_ids:
+            by_chat.setdefault(chat_id, []).append(tenant)
+    replies = set()
+
+    def route(chat_id, command):
+        if chat_id in by_chat:
+            commands.schedule_reply(
+                replies, by_chat[chat_id], outbound, command, client.get,
+                chat_id
+            )
+
+    listener = asyncio.create_task(commands.listen(bot, route))
+    polling = asyncio.create_task(
+        run(tenants, outbound, get=client.get, store=store, stop=stop)
+    )
+    waiter = asyncio.create_task(stop.wait())
+    try:
+        await asyncio.wait(
+            (polling, waiter),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if stop.is_set():
+            logging.info(SHUTDOWN_STARTED.format(grace=grace))
+            await asyncio.wait((polling,), timeout=grace)
+        if polling.done():
+            polling.result()
+    finally:
+        for task in (waiter, polling, listener, stats, dispatcher):
+            task.cancel()
+        for signum in SHUTDOWN_SIGNALS:
+            loop.remove_signal_handler(signum)
+
+
+def check_token():
+    """Движку нужен только токен бота: токены студентов в TENANTS_FILE."""
+    if not homework.TELEGRAM_TOKEN:
+        logging.critical(homework.TOKENS_ERROR.format('TELEGRAM_TOKEN'))
+        raise ValueError(homework.TOKENS_ERROR.format('TELEGRAM_TOKEN'))
+
+
+def main():
+    """Запуск движка для студентов из TENANTS_FILE."""
+    check_token()
+    tenants = load_tenants(TENANTS_FILE)
+    metrics.start_metrics_server()
+    bot = make_bot(homework.TELEGRAM_TOKEN, TELEGRAM_API_URL)
+    client = PracticumClient(pool_maxsize=CONCURRENCY)
+    store = StateStore()
+    start_tracing()
+    start_memory_watchdog()
+    try:
+        asyncio.run(serve(tenants, bot, client, store))
+    finally:
+        client.close()
+        store.close()
+        stop_tracing()
+        stop_memory_watchdog()
+    logging.info(SHUTDOWN_DONE)
@@ -0,0 +1,121 @@
+"""
+Кэш отпечатков ошибок для сообщений в Telegram.
+Из текста ошибки убираются переменные части (from_date, токен, таймауты,
+адреса объектов, длинные числа), по оставшемуся тексту строится отпечаток.
+Повтор отпечатка в пределах ERROR_WINDOW секунд не отправляется, а
+считается; раз в ERROR_SUMMARY_PERIOD секунд отправляется сводка с
+числом подавленных повторов. Кэш ограничен ERROR_CACHE_SIZE отпечатками
+и вытесняет давно не встречавшиеся.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+
+ERROR_CACHE_SIZE = int(os.getenv('ERROR_CACHE_SIZE', 64))
+ERROR_SUMMARY = 'Повторяющиеся ошибки за {minutes:.0f} мин:\n{lines}'
+ERROR_SUMMARY_LINE = '{count} раз: {text}'
+ERROR_SUMMARY_PERIOD = int(os.getenv('ERROR_SUMMARY_PERIOD', 3600))
+ERROR_TEXT_LIMIT = 200
+ERROR_WINDOW = int(os.getenv('ERROR_WINDOW', 3600))
+VARIABLE_PARTS = (
+    (re.compile(r"('from_date': )-?\d+"), r'\1#'),
+    (re.compile(r'(OAuth )[^\s\'"]+'), r'\1***'),
+    (re.compile(r'(timeout: )\([^)]*\)'), r'\1#'),
+    (re.compile(r'0x[0-9a-fA-F]+'), '0x#'),
+    (re.compile(r'\d{6,}'), '#'),
+)
+
+
+def normalize(message):
+    """Текст ошибки без переменных частей."""
+    for pattern, replacement in VARIABLE_PARTS:
+        message = pattern.sub(replacement, message)
+    return message
+
+
+def fingerprint(message):
+    """Отпечаток ошибки: одинаков для ошибок, различающихся деталями."""
+    return hashlib.sha1(normalize(message).encode()).hexdigest()[:16]
+
+
+class ErrorCache:
+    """Недавно отправленные ошибки: отпечаток -> [текст, время, повторы]."""
+
+    def __init__(self, window=ERROR_WINDOW,
+                 summary_period=ERROR_SUMMARY_PERIOD, size=ERROR_CACHE_SIZE,
+                 clock=time.time):
+        """Повторы подавляются window секунд, сводка раз в summary_period."""
+        self.window = window
+        self.summary_period = summary_period
+        self.size = size
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.summary_at = clock()
+
+    def check(self, message):
+        """Нужно ли отправлять ошибку; подавленный повтор учитывается."""
+        key = fingerprint(message)
+        entry = self.entries.get(key)
+        if entry is None or self.clock() - entry[1] >= self.window:
+            return True
+        entry[2] += 1
+        self.entries.move_to_end(key)
+        return False
+
+    def remember(self, message):
+        """Запоминаем отправленную ошибку."""
+        key = fingerprint(message)
+        entry = self.entries.pop(key, None)
+        self.entries[key] = [
+            normalize(message)[:ERROR_TEXT_LIMIT], self.clock(),
+            entry[2] if entry else 0,
+        ]
+        while len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+
+    def summary(self):
+        """Текст сводки подавленных повторов, если пора её отправить."""
+        if self.clock() - self.summary_at < self.summary_period:
+            return None
+        lines = [
+            ERROR_SUMMARY_LINE.format(count=count, text=text)
+            for text, _, count in self.entries.values() if count
+        ]
+        if not lines:
+            self.summary_at = self.clock()
+            return None
+        return ERROR_SUMMARY.format(
+            minutes=(self.clock() - self.summary_at) / 60,
+            lines='\n'.join(lines)
+        )
+
+    def summarized(self):
+        """Сводка отправлена: обнуляем счётчики повторов."""
+        for entry in self.entries.values():
+            entry[2] = 0
+        self.summary_at = self.clock()
+
+    def dumps(self):
+        """Кэш в виде строки для хранилища состояния."""
+        return json.dumps({
+            'summary_at': self.summary_at,
+            'entries': list(self.entries.items()),
+        }, ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, data, **kwargs):
+        """Кэш из строки хранилища; прежний формат - текст одной ошибки."""
+        cache = cls(**kwargs)
+        if not data:
+            return cache
+        try:
+            saved = json.loads(data)
+            cache.summary_at = saved['summary_at']
+            cache.entries.update(saved['entries'])
+        except (ValueError, TypeError, KeyError):
+            cache.remember(data)
+        return cache
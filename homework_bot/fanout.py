@@ -0,0 +1,142 @@
+"""
+Рассылка одного сообщения всем подписчикам студента.
+Токен Практикума опрашивается и сообщение форматируется один раз, а
+отправки в чаты подписчиков (наставники, команда) идут параллельно в
+общем пуле из FANOUT_WORKERS потоков. Каждая отправка выполняется в
+контексте вызывающего потока, поэтому действуют дедлайн цикла и трасса.
+Доставка учитывается по каждому чату: повтор уходит только тем, кому
+сообщение не дошло, а чат, который заблокировал бота или не существует,
+отключается от рассылки и не задерживает остальных.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from homework_bot import metrics
+from homework_bot.bounded import BoundedDict
+from homework_bot.lazy import lazy_import
+
+telegram = lazy_import('telegram')
+
+CHAT_DISABLED = 'Чат {chat_id} отключён от рассылки: {error}'
+DELIVERY_SIZE = int(os.getenv('DELIVERY_SIZE', 256))
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', 16))
+NO_LIVE_CHATS = 'Сообщение не доставлено: все чаты {chat_ids} отключены'
+PERMANENT_ERRORS = (
+    'chat not found', 'bot was blocked', 'bot was kicked',
+    'user is deactivated', 'chat_id is empty',
+)
+SEND_FAILED = 'Не удалось отправить сообщение в чат {chat_id}: {error}'
+
+DELIVERED = 'delivered'
+FAILED = 'failed'
+GONE = 'gone'
+
+_executor = ThreadPoolExecutor(
+    max_workers=FANOUT_WORKERS, thread_name_prefix='fanout'
+)
+
+
+def parse_chat_ids(value):
+    """Чаты подписчиков из строки через запятую: '1, 2' -> ('1', '2')."""
+    return tuple(
+        chat_id.strip() for chat_id in str(value).split(',')
+        if chat_id.strip()
+    )
+
+
+def permanent_failure(error):
+    """Ошибка, которую повтор не исправит: нет чата или бот заблокирован.
+
+    Unauthorized без такого текста (401) означает неверный токен бота,
+    а не недоступный чат, и считается обычным сбоем отправки.
+    """
+    return isinstance(
+        error, (telegram.error.Unauthorized, telegram.error.BadRequest)
+    ) and any(text in str(error).lower() for text in PERMANENT_ERRORS)
+
+
+class Delivery:
+    """Какие чаты уже получили сообщение и какие отключены."""
+
+    def __init__(self, size=DELIVERY_SIZE):
+        """Учёт не больше size недоставленных всем сообщений."""
+        self.delivered = BoundedDict(size, 'fanout')
+        self.disabled = set()
+        self._lock = threading.Lock()
+
+    def pending(self, chat_ids, key):
+        """Чаты, которым сообщение key ещё нужно отправить."""
+        with self._lock:
+            done = self.delivered.get(key, frozenset())
+            return [
+                chat_id for chat_id in dict.fromkeys(chat_ids)
+                if chat_id not in done and chat_id not in self.disabled
+            ]
+
+    def record(self, key, outcomes, chat_ids):
+        """Учитываем результаты; True, если сообщение получили все.
+
+        Если живых чатов среди chat_ids не осталось, сообщение
+        не доставлено никому и успехом не считается.
+        """
+        with self._lock:
+            done = set(self.delivered.pop(key, ()))
+            for chat_id, outcome in outcomes.items():
+                if outcome == DELIVERED:
+                    done.add(chat_id)
+                elif outcome == GONE:
+                    self.disabled.add(chat_id)
+            if FAILED in outcomes.values():
+                self.delivered[key] = frozenset(done)
+                return False
+            return not self.disabled.issuperset(chat_ids)
+
+
+def attempt(send, bot, chat_id, message):
+    """Одна отправка в чат: DELIVERED, FAILED или GONE."""
+    try:
+        send(bot, chat_id, message)
+    except telegram.TelegramError as error:
+        metrics.ERRORS.inc(path='telegram_send')
+        if permanent_failure(error):
+            logging.warning(CHAT_DISABLED.format(chat_id=chat_id, error=error))
+            return GONE
+        logging.error(
+            SEND_FAILED.format(chat_id=chat_id, error=error), exc_info=True
+        )
+        return FAILED
+    return DELIVERED
+
+
+def fan_out(send, bot, chat_ids, message, delivery=None, key=None):
+    """Отправляем message в чаты chat_ids; True, если получили все.
+
+    send(bot, chat_id, message) поднимает TelegramError при неудаче.
+    С delivery повтор уходит только в чаты, где отправка не удалась;
+    доставка учитывается по тексту сообщения или по ключу key.
+    Единственный чат обслуживается в вызывающем потоке без пула.
+    """
+    delivery = delivery or Delivery()
+    key = message if key is None else key
+    targets = delivery.pending(chat_ids, key)
+    if len(targets) == 1:
+        outcomes = {targets[0]: attempt(send, bot, targets[0], message)}
+    else:
+        futures = {
+            chat_id: _executor.submit(
+                contextvars.copy_context().run,
+                attempt, send, bot, chat_id, message
+            )
+            for chat_id in targets
+        }
+        outcomes = {
+            chat_id: future.result() for chat_id, future in futures.items()
+        }
+    delivered = delivery.record(key, outcomes, chat_ids)
+    if not delivered and not targets:
+        logging.error(NO_LIVE_CHATS.format(chat_ids=', '.join(chat_ids)))
+    return delivered
@@ -0,0 +1,18 @@
+"""
+Быстрый разбор JSON.
+Если установлен orjson, тело ответа разбирается им напрямую из байтов,
+иначе используется стандартный разбор requests.
+"""
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def decode_json(response):
+    """Тело HTTP-ответа в виде JSON."""
+    content = getattr(response, 'content', None)
+    if orjson is None or not isinstance(content, (bytes, bytearray)):
+        return response.json()
+    return orjson.loads(content)
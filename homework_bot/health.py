@@ -0,0 +1,128 @@
+"""
+Проверки живости и готовности.
+Цикл опроса отмечает завершённые попытки опроса, успешные запросы к API
+и отправки в Telegram, а сервер метрик отдаёт по /health/live и
+/health/ready их время, глубину очередей и состояние предохранителей.
+Живость (live) не проходит (503), если последняя попытка опроса, удачная
+или нет, завершилась больше HEALTH_STALE_FACTOR интервалов назад: процесс,
+зависший в запросе, оркестратор может перезапустить, а сбой Практикума
+или разомкнутый предохранитель к перезапуску не ведут. Готовность (ready)
+требует ещё и свежего успешного ответа API.
+"""
+
+import os
+import threading
+import time
+
+from homework_bot.breaker import circuit_states
+
+HEALTH_STALE_FACTOR = float(os.getenv('HEALTH_STALE_FACTOR', 3))
+LIVE_PATH = '/health/live'
+READY_PATH = '/health/ready'
+
+
+def age(moment, now):
+    """Сколько секунд прошло с moment или None."""
+    return None if moment is None else now - moment
+
+
+class Health:
+    """Отметки цикла опроса для проверок живости и готовности."""
+
+    def __init__(self, factor=HEALTH_STALE_FACTOR, clock=time.time):
+        """Отметка устаревает через factor интервалов опроса."""
+        self.factor = factor
+        self.clock = clock
+        self.started = clock()
+        self.interval = None
+        self.last_poll = None
+        self.last_cycle = None
+        self.last_send = None
+        self.queues = {}
+        self._lock = threading.Lock()
+
+    def expect(self, interval):
+        """Следующий опрос ожидается через interval секунд."""
+        self.interval = interval
+
+    def polled(self):
+        """Успешный запрос к API."""
+        self.last_poll = self.clock()
+
+    def cycled(self):
+        """Попытка опроса завершилась, успешно или с ошибкой."""
+        self.last_cycle = self.clock()
+
+    def sent(self):
+        """Успешная отправка в Telegram."""
+        self.last_send = self.clock()
+
+    def add_queue(self, name, depth):
+        """Очередь name, глубину которой возвращает depth()."""
+        with self._lock:
+            self.queues[name] = depth
+
+    def snapshot(self):
+        """Состояние процесса для ответа на проверку."""
+        now = self.clock()
+        max_age = None
+        if self.interval is not None:
+            max_age = self.factor * self.interval
+        live = max_age is None or (
+            age(self.last_cycle or self.started, now) <= max_age
+        )
+        fresh = self.last_poll is not None and (
+            max_age is None or age(self.last_poll, now) <= max_age
+        )
+        with self._lock:
+            queues = {name: depth() for name, depth in self.queues.items()}
+        return {
+            'live': live,
+            'ready': live and fresh,
+            'last_poll': self.last_poll,
+            'last_cycle': self.last_cycle,
+            'last_cycle_age': age(self.last_cycle, now),
+            'last_poll_age': age(self.last_poll, now),
+            'last_send': self.last_send,
+            'last_send_age': age(self.last_send, now),
+            'interval': self.interval,
+            'max_age': max_age,
+            'queues': queues,
+            'circuits': circuit_states(),
+        }
+
+
+class MergedHealth:
+    """Состояние нескольких процессов: живы и готовы, только если все."""
+
+    def __init__(self):
+        """Отчётов ещё нет."""
+        self._lock = threading.Lock()
+        self.snapshots = {}
+
+    def update(self, source, snapshot):
+        """Последний отчёт процесса source."""
+        with self._lock:
+            self.snapshots[source] = snapshot
+
+    def retire(self, source):
+        """Процесс source завершился."""
+        with self._lock:
+            self.snapshots.pop(source, None)
+
+    def snapshot(self):
+        """Сводное состояние для ответа на проверку."""
+        with self._lock:
+            snapshots = dict(self.snapshots)
+        return {
+            'live': bool(snapshots) and all(
+                snapshot['live'] for snapshot in snapshots.values()
+            ),
+            'ready': bool(snapshots) and all(
+                snapshot['ready'] for snapshot in snapshots.values()
+            ),
+            'workers': snapshots,
+        }
+
+
+HEALTH = Health()
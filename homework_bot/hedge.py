@@ -0,0 +1,91 @@
+"""
+Дублирующие (hedged) запросы к API.
+Если запрос выполняется дольше наблюдаемого p95, параллельно
+отправляется второй такой же, и используется ответ, пришедший первым.
+Хвост задержек срезается ценой небольшой доли лишних запросов.
+Включается переменной HEDGE_REQUESTS=1.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from homework_bot import metrics
+
+HEDGE_MIN_SAMPLES = 20
+HEDGE_QUANTILE = float(os.getenv('HEDGE_QUANTILE', 0.95))
+HEDGE_REQUESTS = os.getenv('HEDGE_REQUESTS', '0') == '1'
+HEDGE_WINDOW = 256
+HEDGE_WORKERS = int(os.getenv('HEDGE_WORKERS', 64))
+
+HEDGED = metrics.Counter(
+    'homework_hedged_requests_total',
+    'Дублирующие запросы к API, отправленные после порога p95.'
+)
+
+_hedgers = {}
+_hedgers_lock = threading.Lock()
+
+
+class Hedger:
+    """Дублирование медленных запросов по скользящему окну задержек."""
+
+    def __init__(self, quantile=HEDGE_QUANTILE, window=HEDGE_WINDOW,
+                 min_samples=HEDGE_MIN_SAMPLES, workers=HEDGE_WORKERS):
+        """Порог дублирования — quantile последних window задержек."""
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.latencies = deque(maxlen=window)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='hedge'
+        )
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Учитываем задержку успешного запроса."""
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def threshold(self):
+        """Задержка, после которой запрос дублируется, или None."""
+        with self._lock:
+            if len(self.latencies) < self.min_samples:
+                return None
+            latencies = sorted(self.latencies)
+        return latencies[min(
+            int(len(latencies) * self.quantile), len(latencies) - 1
+        )]
+
+    def _timed(self, get, kwargs):
+        """Запрос с учётом задержки."""
+        start = time.perf_counter()
+        response = get(**kwargs)
+        self.observe(time.perf_counter() - start)
+        return response
+
+    def call(self, get, **kwargs):
+        """Запрос get; после порога — второй параллельный, берём первый."""
+        threshold = self.threshold()
+        if threshold is None:
+            return self._timed(get, kwargs)
+        attempts = [self.executor.submit(self._timed, get, kwargs)]
+        done, _ = wait(attempts, timeout=threshold)
+        if not done:
+            HEDGED.inc()
+            attempts.append(self.executor.submit(self._timed, get, kwargs))
+        pending = attempts
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for attempt in done:
+                if attempt.exception() is None or not pending:
+                    return attempt.result()
+
+
+def get_hedger(endpoint):
+    """Общий дублирователь запросов к адресу endpoint."""
+    with _hedgers_lock:
+        if endpoint not in _hedgers:
+            _hedgers[endpoint] = Hedger()
+        return _hedgers[endpoint]
@@ -0,0 +1,49 @@
+"""
+Индекс последних известных статусов работ студента.
+Каждая работа из ответа API сравнивается с индексом по ключу работы,
+поэтому стоимость цикла пропорциональна числу работ в окне from_date,
+а не всей истории студента. Индекс ограничен INDEX_SIZE работами.
+"""
+
+import os
+
+from homework_bot.bounded import BoundedDict
+from homework_bot.state import homework_key
+
+INDEX_SIZE = int(os.getenv('INDEX_SIZE', 1000))
+
+
+class ChangeIndex:
+    """Статусы работ студента: ключ работы -> статус."""
+
+    def __init__(self, statuses=None, store=None, tenant=None,
+                 size=INDEX_SIZE):
+        """Индекс с сохранением изменений в store под ключом tenant."""
+        self.statuses = BoundedDict(
+            size, 'change_index', (statuses or {}).items()
+        )
+        self.store = store
+        self.tenant = tenant
+
+    @classmethod
+    def load(cls, store, tenant):
+        """Индекс, восстановленный из хранилища состояния."""
+        return cls(store.load_statuses(tenant), store, tenant)
+
+    def changed(self, homework):
+        """Отличается ли статус работы от известного."""
+        return (
+            self.statuses.get(homework_key(homework))
+            != homework.get('status')
+        )
+
+    def changes(self, homeworks):
+        """Работы, статус которых отличается от известного."""
+        return [homework for homework in homeworks if self.changed(homework)]
+
+    def commit(self, homework):
+        """Запоминаем статус работы, о котором сообщили студенту."""
+        key = homework_key(homework)
+        self.statuses[key] = homework.get('status')
+        if self.store is not None:
+            self.store.save_status(self.tenant, key, self.statuses[key])
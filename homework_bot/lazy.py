@@ -0,0 +1,24 @@
+"""
+Отложенный импорт тяжёлых зависимостей.
+Модуль регистрируется в sys.modules сразу, а выполняется при первом
+обращении к его атрибуту (importlib.util.LazyLoader), поэтому запуск
+бота не платит за python-telegram-bot и requests, пока они не нужны.
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Модуль name, который загрузится при первом обращении к атрибуту."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f'No module named {name!r}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
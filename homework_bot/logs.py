@@ -0,0 +1,102 @@
+"""
+Неблокирующее логирование.
+Рабочий код только кладёт записи в очередь (QueueHandler), а фоновый
+QueueListener пишет их в поток вывода и в файл. Файл ротируется по
+размеру и по времени, старые части сжимаются gzip в том же фоновом
+потоке.
+"""
+
+import atexit
+import glob
+import gzip
+import logging
+import os
+import queue
+import shutil
+import sys
+import time
+from logging.handlers import BaseRotatingHandler, QueueHandler, QueueListener
+
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', 7))
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_ROTATE_INTERVAL = int(os.getenv('LOG_ROTATE_INTERVAL', 24 * 60 * 60))
+ROTATED_SUFFIX = '%Y%m%d-%H%M%S'
+
+
+def compress(source, destination):
+    """Сжимаем ротированный файл лога."""
+    with open(source, 'rb') as log_file:
+        with gzip.open(destination, 'wb') as archive:
+            shutil.copyfileobj(log_file, archive)
+    os.remove(source)
+
+
+class RotatingLogHandler(BaseRotatingHandler):
+    """Файл лога с ротацией по размеру и по времени и сжатием архивов."""
+
+    def __init__(self, filename, max_bytes=LOG_MAX_BYTES,
+                 interval=LOG_ROTATE_INTERVAL, backup_count=LOG_BACKUP_COUNT):
+        """Ротация при max_bytes байт или раз в interval секунд."""
+        super().__init__(filename, 'a', encoding='utf-8', delay=True)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.rollover_at = time.time() + interval
+        self.namer = lambda name: name + '.gz'
+        self.rotator = compress
+
+    def shouldRollover(self, record):
+        """Пора ли начинать новый файл."""
+        if time.time() >= self.rollover_at:
+            return True
+        if not self.max_bytes:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        size = len(self.format(record).encode(self.encoding)) + 1
+        return self.stream.tell() + size >= self.max_bytes
+
+    def doRollover(self):
+        """Переименовываем и сжимаем текущий файл, удаляем старые архивы."""
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        name = '{}.{}'.format(
+            self.baseFilename, time.strftime(ROTATED_SUFFIX)
+        )
+        number = 0
+        destination = self.rotation_filename(name)
+        while os.path.exists(destination):
+            number += 1
+            destination = self.rotation_filename(f'{name}.{number}')
+        if os.path.exists(self.baseFilename):
+            self.rotate(self.baseFilename, destination)
+        archives = sorted(
+            glob.glob(glob.escape(self.baseFilename) + '.*.gz'),
+            key=os.path.getmtime
+        )
+        for old in archives[:max(len(archives) - self.backup_count, 0)]:
+            os.remove(old)
+        self.rollover_at = time.time() + self.interval
+
+
+def stop_log_listener(listener):
+    """Дописываем оставшиеся записи и останавливаем фоновый поток."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def start_log_listener(filename, log_format, stream=sys.stdout):
+    """Запускаем фоновую запись логов; возвращаем обработчик-очередь."""
+    formatter = logging.Formatter(log_format)
+    handlers = [RotatingLogHandler(filename), logging.StreamHandler(stream)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_log_listener, listener)
+    handler = QueueHandler(records)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler.listener = listener
+    return handler
@@ -0,0 +1,320 @@
+"""
+Метрики бота в текстовом формате Prometheus.
+Задержки HTTP-запроса, разбора JSON, проверки ответа и отправки в
+Telegram, счётчики ошибок и давность последнего успешного опроса.
+Отдаются небольшим HTTP-сервером (metrics_server) в фоновом потоке
+по адресу /metrics.
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60
+)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+RETIRED = 'retired'
+TENANT_LABEL = re.compile(r'tenant="([^"]*)"')
+
+
+def format_labels(labels):
+    """Метки в формате Prometheus: {name="value",...}."""
+    if not labels:
+        return ''
+    return '{' + ','.join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n')
+        )
+        for name, value in labels
+    ) + '}'
+
+
+def render_metric(name, documentation, kind, samples):
+    """Текст одной метрики в формате Prometheus."""
+    lines = [f'# HELP {name} {documentation}', f'# TYPE {name} {kind}']
+    lines.extend(f'{sample} {value}' for sample, value in samples)
+    return '\n'.join(lines)
+
+
+class Metric:
+    """Базовая метрика с метками."""
+
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, registry=None):
+        """Метрика name регистрируется в registry."""
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._values = {}
+        (REGISTRY if registry is None else registry).register(self)
+
+    def samples(self):
+        """Пары (имя с метками, значение)."""
+        with self._lock:
+            values = dict(self._values)
+        return [
+            (self.name + format_labels(labels), value)
+            for labels, value in sorted(values.items())
+        ]
+
+    def render(self):
+        """Текст метрики в формате Prometheus."""
+        return render_metric(
+            self.name, self.documentation, self.kind, self.samples()
+        )
+
+
+class Counter(Metric):
+    """Монотонно растущий счётчик."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Увеличиваем счётчик."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Текущее значение счётчика."""
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+
+class Gauge(Metric):
+    """Произвольное значение."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        """Устанавливаем значение."""
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def remove(self, **labels):
+        """Убираем значение с метками labels, если оно было."""
+        with self._lock:
+            self._values.pop(tuple(sorted(labels.items())), None)
+
+
+class AgeGauge(Gauge):
+    """Сколько секунд прошло с отмеченного момента."""
+
+    def touch(self, **labels):
+        """Отмечаем текущий момент."""
+        self.set(time.time(), **labels)
+
+    def samples(self):
+        """Давность отметок на момент чтения."""
+        now = time.time()
+        return [(name, now - moment) for name, moment in super().samples()]
+
+
+class Histogram(Metric):
+    """Распределение значений по корзинам."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS,
+                 registry=None):
+        """Гистограмма с верхними границами корзин buckets."""
+        super().__init__(name, documentation, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """Учитываем одно наблюдение."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0, 0)
+            )
+            counts = [
+                number + (value <= bound)
+                for number, bound in zip(counts, self.buckets)
+            ]
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Измеряем время выполнения блока."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        """Корзины, сумма и число наблюдений."""
+        with self._lock:
+            values = dict(self._values)
+        samples = []
+        for labels, (counts, total, count) in sorted(values.items()):
+            for bound, number in zip(self.buckets, counts):
+                samples.append((
+                    self.name + '_bucket'
+                    + format_labels(labels + (('le', bound),)),
+                    number
+                ))
+            samples.append((
+                self.name + '_bucket'
+                + format_labels(labels + (('le', '+Inf'),)),
+                count
+            ))
+            samples.append((self.name + '_sum' + format_labels(labels), total))
+            samples.append(
+                (self.name + '_count' + format_labels(labels), count)
+            )
+        return samples
+
+
+class Registry:
+    """Набор метрик процесса."""
+
+    def __init__(self):
+        """Пустой набор метрик."""
+        self.metrics = []
+
+    def register(self, metric):
+        """Добавляем метрику."""
+        self.metrics.append(metric)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+    def collect(self):
+        """Снимок метрик для передачи в другой процесс."""
+        return [
+            (metric.name, metric.documentation, metric.kind, metric.samples())
+            for metric in self.metrics
+        ]
+
+
+def merge_snapshots(snapshots):
+    """Снимки метрик нескольких процессов в один: счётчики складываются."""
+    merged = {}
+    for snapshot in snapshots:
+        for name, documentation, kind, samples in snapshot:
+            _, _, values = merged.setdefault(
+                name, (documentation, kind, {})
+            )
+            for sample, value in samples:
+                if sample not in values:
+                    values[sample] = value
+                elif kind == 'gauge':
+                    values[sample] = max(values[sample], value)
+                else:
+                    values[sample] += value
+    return [
+        (name, documentation, kind, list(values.items()))
+        for name, (documentation, kind, values) in merged.items()
+    ]
+
+
+def owns(sample, tenants):
+    """Сэмпл без метки tenant или со студентом из tenants."""
+    match = TENANT_LABEL.search(sample)
+    return match is None or match.group(1) in tenants
+
+
+def owned_gauges(snapshot, tenants):
+    """Снимок без gauge студентов, которых нет среди tenants."""
+    owned = []
+    for name, documentation, kind, samples in snapshot:
+        if kind == 'gauge':
+            samples = [
+                (sample, value) for sample, value in samples
+                if owns(sample, tenants)
+            ]
+        owned.append((name, documentation, kind, samples))
+    return owned
+
+
+class MergedRegistry:
+    """Метрики нескольких процессов: счётчики складываются.
+
+    Для gauge берётся максимум. Счётчики завершившихся процессов
+    складываются в один снимок без gauge, чтобы сумма не уменьшалась,
+    а число снимков не росло с каждым перезапуском процесса.
+    """
+
+    def __init__(self, owned=None):
+        """Снимков ещё нет.
+
+        owned(source) — студенты (метка tenant), которых опрашивает
+        процесс source; gauge остальных студентов в его снимке
+        устарели и не учитываются.
+        """
+        self._lock = threading.Lock()
+        self.owned = owned
+        self.snapshots = {}
+
+    def update(self, source, snapshot):
+        """Последний снимок метрик процесса source."""
+        with self._lock:
+            self.snapshots[source] = snapshot
+
+    def retire(self, source):
+        """Процесс source завершился: добавляем его счётчики к итогу."""
+        with self._lock:
+            snapshot = self.snapshots.pop(source, [])
+            self.snapshots[RETIRED] = merge_snapshots([
+                self.snapshots.get(RETIRED, []),
+                [metric for metric in snapshot if metric[2] != 'gauge'],
+            ])
+
+    def render(self):
+        """Сводные метрики в текстовом формате Prometheus."""
+        with self._lock:
+            snapshots = dict(self.snapshots)
+        if self.owned is not None:
+            snapshots = {
+                source: owned_gauges(snapshot, self.owned(source))
+                for source, snapshot in snapshots.items()
+            }
+        return '\n'.join(
+            render_metric(name, documentation, kind, samples)
+            for name, documentation, kind, samples
+            in merge_snapshots(snapshots.values())
+        ) + '\n'
+
+
+REGISTRY = Registry()
+ERRORS = Counter(
+    'homework_errors_total', 'Ошибки по месту возникновения.'
+)
+HTTP_SECONDS = Histogram(
+    'homework_http_request_seconds', 'Время запроса к API Практикума.'
+)
+JSON_SECONDS = Histogram(
+    'homework_json_parse_seconds', 'Время разбора JSON ответа.'
+)
+LAST_POLL_AGE = AgeGauge(
+    'homework_last_successful_poll_age_seconds',
+    'Секунд с последнего успешного опроса API.'
+)
+SEND_SECONDS = Histogram(
+    'homework_telegram_send_seconds', 'Время отправки сообщения в Telegram.'
+)
+VALIDATION_SECONDS = Histogram(
+    'homework_validation_seconds', 'Время проверки ответа API.'
+)
+
+
+def start_metrics_server():
+    """Сервер метрик, если задан METRICS_PORT.
+
+    Модуль сервера импортируется только здесь: без METRICS_PORT
+    запуск бота не платит за импорт http.server.
+    """
+    if METRICS_PORT:
+        from homework_bot.metrics_server import serve_metrics
+        return serve_metrics()
+    return None
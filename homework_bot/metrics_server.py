@@ -0,0 +1,62 @@
+"""
+HTTP-сервер метрик Prometheus и проверок живости и готовности.
+Вынесен из metrics, чтобы http.server импортировался только при
+заданном METRICS_PORT.
+"""
+
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from homework_bot import metrics
+from homework_bot.health import HEALTH, LIVE_PATH, READY_PATH
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+HEALTH_CONTENT_TYPE = 'application/json'
+METRICS_PATH = '/metrics'
+METRICS_STARTED = 'Метрики доступны на http://{host}:{port}/metrics'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Отдаём метрики по GET /metrics и проверки по /health/*."""
+
+    registry = metrics.REGISTRY
+    health = HEALTH
+
+    def do_GET(self):
+        """Ответ на запрос метрик или проверки."""
+        path = self.path.split('?')[0]
+        if path == METRICS_PATH:
+            self.reply(200, CONTENT_TYPE, self.registry.render())
+        elif path in (LIVE_PATH, READY_PATH):
+            snapshot = self.health.snapshot()
+            passed = snapshot['live' if path == LIVE_PATH else 'ready']
+            self.reply(
+                200 if passed else 503, HEALTH_CONTENT_TYPE,
+                json.dumps(snapshot, ensure_ascii=False)
+            )
+        else:
+            self.send_error(404)
+
+    def reply(self, status, content_type, text):
+        """Отправляем ответ с телом text."""
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Не пишем в лог каждый запрос метрик."""
+
+
+def serve_metrics(port=metrics.METRICS_PORT, host=metrics.METRICS_HOST,
+                  handler=None):
+    """Запускаем сервер метрик в фоновом потоке."""
+    server = ThreadingHTTPServer((host, port), handler or MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info(METRICS_STARTED.format(host=host, port=server.server_port))
+    return server
@@ -0,0 +1,312 @@
+"""
+Очередь исходящих сообщений Telegram с ограничением скорости.
+Общий token bucket держит скорость бота в пределах глобального лимита
+Telegram, а bucket каждого чата — в пределах лимита на чат. Ответ
+RetryAfter блокирует чат на указанное время, остальные ошибки, кроме
+недоступности чата, повторяются с экспоненциальной задержкой. Сообщения
+разных чатов отправляются параллельно, не больше TELEGRAM_CONCURRENCY
+одновременно, в собственном пуле потоков через пул keep-alive
+соединений бота.
+"""
+
+import asyncio
+import concurrent.futures
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from telegram import Bot
+from telegram.error import NetworkError, RetryAfter
+from telegram.utils.request import Request
+
+import homework
+from homework_bot.fanout import permanent_failure
+
+CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+MAX_SEND_ATTEMPTS = 5
+QUEUE_DEPTH = 'Сообщений в очереди Telegram: {depth}'
+QUEUE_CLOSED = 'Очередь сообщений остановлена'
+QUEUE_NOT_STARTED = 'Очередь сообщений не запущена'
+QUEUE_TIMEOUT = 'Сообщение не отправлено за {timeout:.1f} с'
+RETRY_DELAY = 1
+TELEGRAM_CONCURRENCY = int(os.getenv('TELEGRAM_CONCURRENCY', 8))
+SEND_RETRY = 'Повторная отправка в чат {chat_id} через {delay} с: {error}'
+WAIT_STEP = 0.5
+
+Outgoing = namedtuple('Outgoing', ('text', 'future', 'attempts'))
+
+
+def make_bot(token, base_url=None, concurrency=TELEGRAM_CONCURRENCY):
+    """Бот с пулом соединений на все одновременные отправки.
+
+    Одно соединение сверх concurrency занимает long polling команд.
+    """
+    return Bot(
+        token=token, base_url=base_url,
+        request=Request(con_pool_size=concurrency + 1),
+    )
+
+
+class TokenBucket:
+    """Token bucket: rate токенов в секунду, не больше capacity."""
+
+    def __init__(self, rate, capacity=1):
+        """Полный bucket на capacity токенов."""
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+
+    def _refill(self, now):
+        """Начисляем токены за прошедшее время."""
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    def wait_time(self, now=None):
+        """Сколько секунд ждать до появления токена."""
+        now = time.monotonic() if now is None else now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now=None):
+        """Забираем один токен."""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+    def block(self, seconds, now=None):
+        """Запрещаем отправку на seconds секунд."""
+        now = time.monotonic() if now is None else now
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class OutboundQueue:
+    """Очередь отправки с глобальным лимитом и лимитом на каждый чат.
+
+    Повторяет интерфейс бота (send_message), поэтому может
+    использоваться вместо него в send_to_chat из рабочих потоков.
+    """
+
+    def __init__(self, bot, global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+                 max_attempts=MAX_SEND_ATTEMPTS,
+                 concurrency=TELEGRAM_CONCURRENCY):
+        """Очередь отправки сообщений через bot."""
+        self.bot = bot
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix='telegram'
+        )
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.loop = None
+        self.closed = False
+        self._buckets = {}
+        self._chats = {}
+        self._ready = []
+        self._scheduled = set()
+        self._inflight = set()
+        self._pending = 0
+        self._counter = itertools.count()
+        self._wakeup = None
+
+    def depth(self):
+        """Число сообщений в очереди, включая отправляемые."""
+        return self._pending
+
+    def bucket(self, chat_id):
+        """Token bucket чата."""
+        if chat_id not in self._buckets:
+            self._buckets[chat_id] = TokenBucket(self.chat_rate)
+        return self._buckets[chat_id]
+
+    async def send(self, chat_id, text):
+        """Ставим сообщение в очередь и ждём подтверждения отправки."""
+        if self.loop is None:
+            raise NetworkError(QUEUE_NOT_STARTED)
+        if self.closed:
+            raise NetworkError(QUEUE_CLOSED)
+        future = self.loop.create_future()
+        self._chats.setdefault(chat_id, deque()).append(
+            Outgoing(text, future, 0)
+        )
+        self._pending += 1
+        self._schedule(chat_id)
+        return await future
+
+    def send_message(self, chat_id, text, timeout=None):
+        """Синхронная отправка из рабочего потока через очередь.
+
+        Если сообщение не отправлено за timeout секунд или очередь
+        остановлена, оно снимается с очереди и поднимается NetworkError,
+        как при любой другой неудачной отправке.
+        """
+        if self.loop is None:
+            raise NetworkError(QUEUE_NOT_STARTED)
+        coroutine = self.send(chat_id, text)
+        try:
+            future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        except RuntimeError:
+            coroutine.close()
+            raise NetworkError(QUEUE_CLOSED)
+        expires = None if timeout is None else time.monotonic() + timeout
+        while True:
+            step = WAIT_STEP
+            if expires is not None:
+                step = min(step, max(expires - time.monotonic(), 0))
+            try:
+                return future.result(step)
+            except concurrent.futures.TimeoutError:
+                if self.closed:
+                    future.cancel()
+                    raise NetworkError(QUEUE_CLOSED)
+                if expires is not None and time.monotonic() >= expires:
+                    future.cancel()
+                    raise NetworkError(QUEUE_TIMEOUT.format(timeout=timeout))
+
+    def _schedule(self, chat_id):
+        """Планируем чат к отправке, когда у него появится токен."""
+        if (
+            chat_id in self._scheduled or chat_id in self._inflight
+            or not self._chats.get(chat_id)
+        ):
+            return
+        now = time.monotonic()
+        heapq.heappush(self._ready, (
+            now + self.bucket(chat_id).wait_time(now),
+            next(self._counter),
+            chat_id,
+        ))
+        self._scheduled.add(chat_id)
+        self._wakeup.set()
+
+    async def _sleep(self, seconds):
+        """Ждём seconds секунд или появления нового сообщения."""
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def start(self):
+        """Привязываем очередь к работающему event loop."""
+        self.loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+
+    async def run(self):
+        """Диспетчер: отправляет сообщения, соблюдая лимиты."""
+        if self.loop is None:
+            self.start()
+        try:
+            await self._dispatch()
+        finally:
+            self.close()
+
+    def close(self):
+        """Останавливаем очередь: неотправленные сообщения завершаются."""
+        self.closed = True
+        self.executor.shutdown(wait=False)
+        for chat in self._chats.values():
+            for item in chat:
+                if not item.future.done():
+                    item.future.set_exception(NetworkError(QUEUE_CLOSED))
+        self._chats.clear()
+        self._ready.clear()
+        self._scheduled.clear()
+        self._pending = len(self._inflight)
+
+    async def _dispatch(self):
+        """Цикл отправки сообщений по готовности чатов."""
+        while True:
+            if not self._ready or len(self._inflight) >= self.concurrency:
+                await self._sleep(None)
+                continue
+            now = time.monotonic()
+            ready_at, _, chat_id = self._ready[0]
+            if ready_at > now:
+                await self._sleep(ready_at - now)
+                continue
+            wait = max(
+                self.global_bucket.wait_time(now),
+                self.bucket(chat_id).wait_time(now),
+            )
+            if wait:
+                heapq.heapreplace(
+                    self._ready, (now + wait, next(self._counter), chat_id)
+                )
+                continue
+            heapq.heappop(self._ready)
+            self._scheduled.discard(chat_id)
+            if not self._drop_cancelled(chat_id):
+                continue
+            self.global_bucket.consume(now)
+            self.bucket(chat_id).consume(now)
+            self._inflight.add(chat_id)
+            asyncio.create_task(
+                self._deliver(chat_id, self._chats[chat_id].popleft())
+            )
+
+    def _drop_cancelled(self, chat_id):
+        """Убираем из начала очереди чата сообщения с истёкшим ожиданием."""
+        chat = self._chats.get(chat_id)
+        while chat and chat[0].future.cancelled():
+            chat.popleft()
+            self._pending -= 1
+        if not chat:
+            self._chats.pop(chat_id, None)
+        return bool(chat)
+
+    async def _deliver(self, chat_id, item):
+        """Отправляем одно сообщение и разбираем результат."""
+        try:
+            await self.loop.run_in_executor(
+                self.executor, self.bot.send_message, chat_id, item.text
+            )
+        except RetryAfter as error:
+            self._retry(chat_id, item, error.retry_after, error)
+        except Exception as error:
+            item = item._replace(attempts=item.attempts + 1)
+            if item.attempts >= self.max_attempts or permanent_failure(error):
+                self._pending -= 1
+                if not item.future.done():
+                    item.future.set_exception(error)
+            else:
+                self._retry(
+                    chat_id, item, RETRY_DELAY * 2 ** item.attempts, error
+                )
+        else:
+            self._pending -= 1
+            logging.debug(homework.BOT_ADVANCE.format(message=item.text))
+            if not item.future.done():
+                item.future.set_result(True)
+        finally:
+            self._inflight.discard(chat_id)
+            if self._chats.get(chat_id):
+                self._schedule(chat_id)
+            else:
+                self._chats.pop(chat_id, None)
+            self._wakeup.set()
+
+    def _retry(self, chat_id, item, delay, error):
+        """Возвращаем сообщение в начало очереди чата."""
+        logging.warning(
+            SEND_RETRY.format(chat_id=chat_id, delay=delay, error=error)
+        )
+        if self.closed:
+            self._pending -= 1
+            if not item.future.done():
+                item.future.set_exception(NetworkError(QUEUE_CLOSED))
+            return
+        self.bucket(chat_id).block(delay)
+        self._chats.setdefault(chat_id, deque()).appendleft(item)
@@ -0,0 +1,106 @@
+"""
+Конвейер стадий цикла опроса.
+Каждая стадия — поток, который берёт задания из своей очереди и
+передаёт результат следующей. Очереди ограничены PIPELINE_QUEUE_SIZE
+заданиями: если поздняя стадия не успевает, ранняя ждёт места, а память
+не растёт. Задание выполняется в контексте (contextvars) места, где оно
+было поставлено, поэтому span'ы стадий входят в трассу своего цикла.
+"""
+
+import contextvars
+import logging
+import os
+import queue
+import threading
+import time
+
+from homework_bot.shutdown import SHUTDOWN_GRACE
+
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', 4))
+STAGE_ERROR = 'Сбой стадии {stage}: {error}'
+
+STOP = object()
+
+
+class Pipeline:
+    """Цепочка стадий-потоков, связанных ограниченными очередями."""
+
+    def __init__(self, *stages, size=PIPELINE_QUEUE_SIZE):
+        """Стадии stages — функции от результата предыдущей стадии."""
+        self.queues = [queue.Queue(maxsize=size) for _ in stages]
+        self.results = queue.Queue()
+        self.pending = 0
+        self._idle = threading.Condition()
+        outboxes = self.queues[1:] + [self.results]
+        self.threads = [
+            threading.Thread(
+                target=self._run, args=(stage, inbox, outbox),
+                name=f'pipeline-{number}', daemon=True,
+            )
+            for number, (stage, inbox, outbox)
+            in enumerate(zip(stages, self.queues, outboxes))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, item):
+        """Ставим задание; ждём места, если первая стадия не успевает."""
+        with self._idle:
+            self.pending += 1
+        self.queues[0].put((contextvars.copy_context(), item))
+
+    def _done(self):
+        """Задание прошло конвейер или выбыло из него."""
+        with self._idle:
+            self.pending -= 1
+            self._idle.notify_all()
+
+    def _run(self, stage, inbox, outbox):
+        """Цикл потока стадии."""
+        while True:
+            job = inbox.get()
+            if job is STOP:
+                outbox.put(STOP)
+                return
+            context, item = job
+            try:
+                result = context.run(stage, item)
+            except Exception as error:
+                logging.error(STAGE_ERROR.format(
+                    stage=threading.current_thread().name, error=error
+                ), exc_info=True)
+                self._done()
+                continue
+            if outbox is self.results:
+                outbox.put(result)
+                self._done()
+            else:
+                outbox.put((context, result))
+
+    def join(self, timeout=None):
+        """Ждём, пока все поставленные задания пройдут конвейер."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self.pending, timeout)
+
+    def latest(self, default, wait=False):
+        """Результат последнего завершённого задания или default."""
+        if wait:
+            self.join()
+        result = default
+        while True:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                return result
+            if item is not STOP:
+                result = item
+
+    def close(self, timeout=SHUTDOWN_GRACE):
+        """Доделываем поставленные задания и останавливаем потоки."""
+        deadline = time.monotonic() + timeout
+        try:
+            self.queues[0].put(STOP, timeout=timeout)
+        except queue.Full:
+            return
+        for thread in self.threads:
+            thread.join(max(deadline - time.monotonic(), 0))
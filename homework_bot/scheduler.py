@@ -0,0 +1,75 @@
+"""
+Адаптивное расписание опроса API.
+Пока работа на ревью, API опрашивается чаще; когда статусы давно
+не меняются, интервал растёт; после ошибок действует экспоненциальная
+задержка со случайным разбросом.
+"""
+
+import random
+import time
+from collections import deque
+
+ACTIVE_STATUS = 'reviewing'
+CHANGE_HISTORY = 16
+CHANGE_WINDOW = 3600
+ERROR_BASE_PERIOD = 60
+ERROR_MAX_PERIOD = 1800
+IDLE_BACKOFF = 1.5
+IDLE_MAX_PERIOD = 1800
+REVIEW_PERIOD = 120
+
+
+class PollScheduler:
+    """Время следующего опроса по последнему статусу и частоте изменений."""
+
+    def __init__(self, period, review_period=REVIEW_PERIOD,
+                 idle_max_period=IDLE_MAX_PERIOD, clock=time.time):
+        """Базовый интервал period, ускоренный review_period."""
+        self.clock = clock
+        self.period = period
+        self.review_period = review_period
+        self.idle_max_period = idle_max_period
+        self.status = None
+        self.errors = 0
+        self.idle_cycles = 0
+        self.changes = deque(maxlen=CHANGE_HISTORY)
+
+    def observe(self, homeworks, now=None):
+        """Учитываем успешный ответ API со списком изменённых работ."""
+        now = self.clock() if now is None else now
+        self.errors = 0
+        if not homeworks:
+            self.idle_cycles += 1
+            return
+        self.idle_cycles = 0
+        self.changes.append(now)
+        if any(item.get('status') == ACTIVE_STATUS for item in homeworks):
+            self.status = ACTIVE_STATUS
+        else:
+            self.status = homeworks[0].get('status', self.status)
+
+    def fail(self):
+        """Учитываем неудачный цикл опроса."""
+        self.errors += 1
+
+    def change_rate(self, now=None):
+        """Число изменений статусов за последние CHANGE_WINDOW секунд."""
+        now = self.clock() if now is None else now
+        return sum(1 for moment in self.changes
+                   if now - moment <= CHANGE_WINDOW)
+
+    def next_delay(self, now=None):
+        """Задержка до следующего опроса в секундах."""
+        if self.errors:
+            ceiling = min(
+                ERROR_MAX_PERIOD, ERROR_BASE_PERIOD * 2 ** (self.errors - 1)
+            )
+            return ceiling / 2 + random.uniform(0, ceiling / 2)
+        if self.status == ACTIVE_STATUS:
+            return self.review_period
+        if self.change_rate(now):
+            return self.period
+        return min(
+            self.period * IDLE_BACKOFF ** max(self.idle_cycles - 1, 0),
+            self.idle_max_period,
+        )
@@ -0,0 +1,58 @@
+"""
+Корректная остановка бота по сигналу.
+Сигнал во время ожидания следующего опроса будит бота сразу, а сигнал
+посреди цикла опроса откладывает выход до конца цикла: начатые отправки
+в Telegram завершаются, timestamp сохраняется, и только потом бот
+выходит, не дожидаясь конца интервала.
+"""
+
+import logging
+import os
+import signal
+from contextlib import contextmanager
+
+SHUTDOWN_DONE = 'Бот остановлен, состояние сохранено'
+SHUTDOWN_GRACE = float(os.getenv('SHUTDOWN_GRACE', 25))
+SHUTDOWN_REQUESTED = 'Получен сигнал {signal}, бот завершает работу'
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class Shutdown:
+    """Запрос остановки: прерывает ожидание, но не цикл опроса."""
+
+    def __init__(self):
+        """Остановка ещё не запрошена."""
+        self.requested = False
+        self.sleeping = False
+        self._previous = {}
+
+    def install(self, signals=SHUTDOWN_SIGNALS):
+        """Перехватываем сигналы остановки."""
+        for signum in signals:
+            self._previous[signum] = signal.signal(signum, self.handle)
+
+    def restore(self):
+        """Возвращаем прежние обработчики сигналов."""
+        for signum, handler in self._previous.items():
+            signal.signal(signum, handler)
+        self._previous.clear()
+
+    def handle(self, signum, frame):
+        """Обработчик сигнала: во время ожидания выходим сразу."""
+        logging.info(
+            SHUTDOWN_REQUESTED.format(signal=signal.Signals(signum).name)
+        )
+        self.requested = True
+        if self.sleeping:
+            raise SystemExit(0)
+
+    @contextmanager
+    def interruptible(self):
+        """Ожидание, которое прерывается сигналом остановки."""
+        if self.requested:
+            raise SystemExit(0)
+        self.sleeping = True
+        try:
+            yield
+        finally:
+            self.sleeping = False
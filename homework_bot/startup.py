@@ -0,0 +1,122 @@
+"""
+Профиль холодного старта бота.
+Запускает свежий интерпретатор с -X importtime, в нём по шагам
+проходит путь от импорта homework до первого опроса API и печатает
+время каждого шага и самые дорогие по импорту модули.
+
+Запуск:
+    python homework.py --profile-startup
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_TIME_PREFIX = 'import time:'
+MODULE_REPORT = '{cumulative:9.1f} {own:9.1f}  {name}'
+MODULE_HEADER = 'Импорт, мс (всего / сам модуль), самые дорогие модули:'
+PROFILE_ROWS = 20
+STAGE_ERROR = '{stage:<28} ошибка: {error}'
+STAGE_HEADER = 'Шаги запуска, мс:'
+STAGE_REPORT = '{stage:<28} {milliseconds:9.1f}'
+TOTAL_STAGE = 'до первого опроса'
+
+
+def run_stages():
+    """Шаги запуска бота с замером времени каждого."""
+    stages = []
+    start = time.perf_counter()
+    context = {}
+
+    def import_homework():
+        context['homework'] = __import__('homework')
+
+    def create_bot():
+        homework = context['homework']
+        context['bot'] = homework.telegram.Bot(token=homework.TELEGRAM_TOKEN)
+
+    def open_state():
+        homework = context['homework']
+        store = homework.StateStore()
+        context['timestamp'], _ = store.load(
+            homework.tenant_key(homework.PRACTICUM_TOKEN), int(time.time())
+        )
+
+    def first_poll():
+        homework = context['homework']
+        homework.check_response(
+            homework.get_api_answer(context['timestamp'])
+        )
+
+    for stage, step in (
+        ('import homework', import_homework),
+        ('check_tokens', lambda: context['homework'].check_tokens()),
+        ('telegram.Bot', create_bot),
+        ('StateStore', open_state),
+        ('get_api_answer', first_poll),
+    ):
+        stage_start = time.perf_counter()
+        try:
+            step()
+        except Exception as error:
+            stages.append({'stage': stage, 'error': str(error)[:200]})
+            break
+        stages.append({
+            'stage': stage,
+            'milliseconds': (time.perf_counter() - stage_start) * 1000,
+        })
+    stages.append({
+        'stage': TOTAL_STAGE,
+        'milliseconds': (time.perf_counter() - start) * 1000,
+    })
+    return stages
+
+
+def parse_import_times(lines):
+    """Строки -X importtime: (всего, сам модуль, имя) в миллисекундах."""
+    modules = []
+    for line in lines:
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            continue
+        own, cumulative, name = line[len(IMPORT_TIME_PREFIX):].split('|')
+        if not own.strip().isdigit():
+            continue
+        modules.append(
+            (int(cumulative) / 1000, int(own) / 1000, name.rstrip())
+        )
+    return modules
+
+
+def profile_startup(rows=PROFILE_ROWS, stream=sys.stdout):
+    """Профилируем холодный старт в отдельном процессе и печатаем отчёт."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', __name__],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    if result.returncode:
+        print(result.stderr, file=stream)
+        return result.returncode
+    stages = json.loads(result.stdout.splitlines()[-1])
+    print(STAGE_HEADER, file=stream)
+    for stage in stages[:-1]:
+        template = STAGE_ERROR if 'error' in stage else STAGE_REPORT
+        print(template.format(**stage), file=stream)
+    print(STAGE_REPORT.format(**stages[-1]), file=stream)
+    print(MODULE_HEADER, file=stream)
+    modules = sorted(
+        parse_import_times(result.stderr.splitlines()), reverse=True
+    )
+    for cumulative, own, name in modules[:rows]:
+        print(
+            MODULE_REPORT.format(cumulative=cumulative, own=own, name=name),
+            file=stream
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, BASE_DIR)
+    print(json.dumps(run_stages(), ensure_ascii=False))
@@ -0,0 +1,136 @@
+"""
+Сохранение состояния опроса между перезапусками.
+Хранит current_date, кэш ошибки и последний известный статус каждой
+работы в SQLite; изменения копятся в памяти и записываются одной
+транзакцией с fsync (synchronous=FULL).
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+FLUSH_PERIOD = 5
+FLUSH_SIZE = 100
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS tenants ('
+    'tenant TEXT PRIMARY KEY, from_date INTEGER, error_cache TEXT)',
+    'CREATE TABLE IF NOT EXISTS homeworks ('
+    'tenant TEXT, homework TEXT, status TEXT, '
+    'PRIMARY KEY (tenant, homework))',
+)
+STATE_FILE = os.getenv('STATE_FILE', 'state.sqlite3')
+STATE_SAVED = 'Состояние сохранено, записей: {count}'
+
+
+def tenant_key(token):
+    """Ключ студента в хранилище: токен не сохраняется в открытом виде."""
+    return hashlib.sha256(str(token).encode()).hexdigest()[:32]
+
+
+def homework_key(homework):
+    """Идентификатор работы: id, а при его отсутствии название."""
+    return str(homework.get('id', homework.get('homework_name')))
+
+
+class StateStore:
+    """Хранилище состояния опроса с пакетной записью."""
+
+    def __init__(self, path=STATE_FILE, flush_size=FLUSH_SIZE,
+                 flush_period=FLUSH_PERIOD):
+        """Открываем (или создаём) базу состояния."""
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=FULL')
+        for statement in SCHEMA:
+            self.connection.execute(statement)
+        self.connection.commit()
+        self.flush_size = flush_size
+        self.flush_period = flush_period
+        self._lock = threading.Lock()
+        self._tenants = {}
+        self._homeworks = {}
+        self._flushed_at = time.monotonic()
+
+    def load(self, tenant, current_date, error_cache=''):
+        """Сохранённые current_date и кэш ошибки или значения по умолчанию."""
+        with self._lock:
+            if tenant in self._tenants:
+                return self._tenants[tenant]
+            row = self.connection.execute(
+                'SELECT from_date, error_cache FROM tenants '
+                'WHERE tenant = ?', (tenant,)
+            ).fetchone()
+        if row is None:
+            return current_date, error_cache
+        return row[0], row[1]
+
+    def load_statuses(self, tenant):
+        """Последние известные статусы работ студента."""
+        with self._lock:
+            statuses = dict(self.connection.execute(
+                'SELECT homework, status FROM homeworks WHERE tenant = ?',
+                (tenant,)
+            ).fetchall())
+            for (key, homework), status in self._homeworks.items():
+                if key == tenant:
+                    statuses[homework] = status
+        return statuses
+
+    def save(self, tenant, current_date, error_cache):
+        """Запоминаем состояние студента до следующей записи на диск."""
+        with self._lock:
+            self._tenants[tenant] = (current_date, error_cache)
+        self._maybe_flush()
+
+    def save_status(self, tenant, homework, status):
+        """Запоминаем статус работы до следующей записи на диск."""
+        with self._lock:
+            self._homeworks[(tenant, homework)] = status
+        self._maybe_flush()
+
+    def pending(self):
+        """Число изменений, ещё не записанных на диск."""
+        with self._lock:
+            return len(self._tenants) + len(self._homeworks)
+
+    def _maybe_flush(self):
+        """Пишем на диск, если накопилось много изменений или прошло время."""
+        if (
+            self.pending() >= self.flush_size
+            or time.monotonic() - self._flushed_at >= self.flush_period
+        ):
+            self.flush()
+
+    def flush(self):
+        """Записываем накопленные изменения одной транзакцией."""
+        with self._lock:
+            tenants, self._tenants = self._tenants, {}
+            homeworks, self._homeworks = self._homeworks, {}
+            self._flushed_at = time.monotonic()
+            if not tenants and not homeworks:
+                return
+            try:
+                with self.connection:
+                    self.connection.executemany(
+                        'INSERT OR REPLACE INTO tenants VALUES (?, ?, ?)',
+                        [(key, *value) for key, value in tenants.items()]
+                    )
+                    self.connection.executemany(
+                        'INSERT OR REPLACE INTO homeworks VALUES (?, ?, ?)',
+                        [(*key, value) for key, value in homeworks.items()]
+                    )
+            except sqlite3.Error:
+                self._tenants = {**tenants, **self._tenants}
+                self._homeworks = {**homeworks, **self._homeworks}
+                raise
+        logging.debug(
+            STATE_SAVED.format(count=len(tenants) + len(homeworks))
+        )
+
+    def close(self):
+        """Сбрасываем изменения и закрываем базу."""
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,499 @@
+"""
+Опрос студентов несколькими процессами.
+Супервизор делит студентов между рабочими процессами по кольцу
+согласованного хеширования токена, поэтому разбор JSON, проверка
+ответов и форматирование сообщений не упираются в GIL одного процесса.
+Если процесс завершился, его студенты сразу переходят к соседям по
+кольцу, а через RESPAWN_DELAY секунд запускается замена и забирает
+свою долю. Живой процесс передаёт студента в два этапа: дорабатывает
+текущий цикл, записывает состояние в общий STATE_FILE и подтверждает
+передачу, и только после этого новый владелец читает состояние и
+начинает опрос. Рабочие процессы присылают снимки метрик, супервизор
+отдаёт их сумму на своём /metrics.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import itertools
+import logging
+import os
+import signal
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing import connection, get_context
+
+from telegram import Bot
+
+import homework
+from homework_bot import commands, engine, metrics
+from homework_bot.client import PracticumClient
+from homework_bot.health import HEALTH, MergedHealth
+from homework_bot.outbound import GLOBAL_RATE, OutboundQueue, make_bot
+from homework_bot.shutdown import (SHUTDOWN_DONE, SHUTDOWN_GRACE,
+                                   SHUTDOWN_SIGNALS)
+from homework_bot.state import STATE_FILE, StateStore, tenant_key
+from homework_bot.tracing import start_tracing, stop_tracing
+from homework_bot.watchdog import start_memory_watchdog, stop_memory_watchdog
+
+HANDOFF_ERROR = 'Не удалось записать состояние перед передачей: {error}'
+METRICS_PUSH_PERIOD = 5
+RESPAWN_DELAY = 5
+RING_REPLICAS = 64
+WORKER_DIED = 'Процесс {node} завершился с кодом {code}, студентов: {count}'
+WORKER_STARTED = 'Процесс {node} запущен, студентов: {count}'
+WORKERS = int(os.getenv('ENGINE_WORKERS', 1))
+WORKERS_STARTED = 'Супервизор запущен: процессов {workers}, студентов {count}'
+SHARED_STATE_REQUIRED = (
+    'Процессам нужно общее состояние: задайте файл в STATE_FILE, а не {path}'
+)
+
+Worker = namedtuple('Worker', ('process', 'conn'))
+
+
+def ring_hash(value):
+    """Положение значения на кольце."""
+    return int(hashlib.md5(value.encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Кольцо согласованного хеширования с виртуальными узлами."""
+
+    def __init__(self, nodes=(), replicas=RING_REPLICAS):
+        """Кольцо из nodes, у каждого узла replicas точек."""
+        self.replicas = replicas
+        self.points = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        """Добавляем узел: он забирает часть ключей у соседей."""
+        for replica in range(self.replicas):
+            bisect.insort(self.points, (ring_hash(f'{node}#{replica}'), node))
+
+    def remove(self, node):
+        """Убираем узел: его ключи переходят к следующим по кольцу."""
+        self.points = [point for point in self.points if point[1] != node]
+
+    def nodes(self):
+        """Узлы кольца."""
+        return {node for _, node in self.points}
+
+    def node(self, key):
+        """Узел, которому принадлежит ключ."""
+        if not self.points:
+            raise LookupError(key)
+        index = bisect.bisect(self.points, (ring_hash(key),))
+        return self.points[index % len(self.points)][1]
+
+
+class Supervisor:
+    """Рабочие процессы и распределение студентов между ними."""
+
+    def __init__(self, tenants, workers=WORKERS, respawn_delay=RESPAWN_DELAY,
+                 names=None):
+        """Студенты tenants — пары (токен, чаты) — на workers процессах."""
+        self.tenants = dict(tenants)
+        self.names = dict(names or {})
+        self.size = workers
+        self.respawn_delay = respawn_delay
+        self.context = get_context('spawn')
+        self.log_queue = self.context.Queue()
+        self.ring = HashRing()
+        self.owners = {}
+        self.handoffs = {}
+        self.workers = {}
+        self.respawns = []
+        self.keys = {token: tenant_key(token) for token in self.tenants}
+        self.metrics = metrics.MergedRegistry(self.polled_by)
+        self.health = MergedHealth()
+        self.stopped = False
+        self.chats = {}
+        for token, chat_ids in self.tenants.items():
+            for chat_id in chat_ids:
+                self.chats.setdefault(chat_id, []).append(token)
+        self._names = itertools.count()
+        self._send_lock = threading.Lock()
+
+    def polled_by(self, node):
+        """Ключи студентов, которых сейчас опрашивает процесс node."""
+        return {
+            self.keys[token] for token, owner in list(self.owners.items())
+            if self.handoffs.get(token, owner) == node
+        }
+
+    def new_node(self):
+        """Имя нового рабочего процесса."""
+        return f'worker-{next(self._names)}'
+
+    def spawn(self, node, tenants):
+        """Запускаем рабочий процесс для студентов tenants."""
+        conn, child_conn = self.context.Pipe()
+        process = self.context.Process(
+            target=worker_main, name=node, daemon=True,
+            args=(tenants, child_conn, self.log_queue, self.size),
+        )
+        process.start()
+        child_conn.close()
+        self.workers[node] = Worker(process, conn)
+        logging.info(WORKER_STARTED.format(node=node, count=len(tenants)))
+
+    def specs(self, tokens):
+        """Описания студентов для рабочего процесса: токен, чаты, имя."""
+        return [
+            (token, self.tenants[token], self.names.get(token, ''))
+            for token in tokens
+        ]
+
+    def send(self, node, command, tokens):
+        """Команда рабочему процессу: assign или release студентов."""
+        payload = tokens
+        if command == 'assign':
+            payload = self.specs(tokens)
+        try:
+            with self._send_lock:
+                self.workers[node].conn.send((command, payload))
+        except (BrokenPipeError, EOFError, KeyError, OSError):
+            pass
+
+    def route(self, chat_id, command):
+        """Пересылаем команду процессам, которые опрашивают студентов чата.
+
+        Каждый процесс отвечает за своих студентов; ответы подписаны
+        именами, если чат подписан на нескольких студентов.
+        """
+        tokens = self.chats.get(chat_id, [])
+        by_owner = {}
+        for token in tokens:
+            by_owner.setdefault(self.owners.get(token), []).append(token)
+        for node, owned in by_owner.items():
+            self.send(
+                node, 'command', (owned, command, chat_id, len(tokens) > 1)
+            )
+
+    def listen(self, bot):
+        """Читаем команды студентов в фоновом потоке."""
+        threading.Thread(
+            target=asyncio.run, args=(commands.listen(bot, self.route),),
+            daemon=True,
+        ).start()
+
+    def rebalance(self):
+        """Приводим распределение студентов к текущему кольцу.
+
+        Студент живого процесса назначается новому владельцу только
+        после подтверждения release (см. released).
+        """
+        gained, lost = {}, {}
+        for token in self.tenants:
+            owner = self.ring.node(token)
+            previous = self.owners.get(token)
+            if owner == previous:
+                continue
+            self.owners[token] = owner
+            if token in self.handoffs:
+                continue
+            if previous in self.workers:
+                lost.setdefault(previous, []).append(token)
+                self.handoffs[token] = previous
+            else:
+                gained.setdefault(owner, []).append(token)
+        for node, tokens in lost.items():
+            self.send(node, 'release', tokens)
+        for node in self.ring.nodes():
+            if node not in self.workers:
+                self.spawn(node, self.specs(gained.get(node, [])))
+            elif node in gained:
+                self.send(node, 'assign', gained[node])
+
+    def assign(self, tokens):
+        """Назначаем студентов tokens их текущим владельцам."""
+        gained = {}
+        for token in tokens:
+            gained.setdefault(self.owners[token], []).append(token)
+        for node, tokens in gained.items():
+            self.send(node, 'assign', tokens)
+
+    def released(self, node, tokens):
+        """Процесс node дописал состояние студентов: передаём их дальше."""
+        done = [token for token in tokens if self.handoffs.get(token) == node]
+        for token in done:
+            del self.handoffs[token]
+        self.assign(done)
+
+    def start(self):
+        """Запускаем все рабочие процессы."""
+        for _ in range(self.size):
+            self.ring.add(self.new_node())
+        self.rebalance()
+        logging.info(
+            WORKERS_STARTED.format(workers=self.size, count=len(self.tenants))
+        )
+
+    def worker_died(self, node):
+        """Процесс завершился: раздаём его студентов и планируем замену."""
+        worker = self.workers.pop(node)
+        worker.conn.close()
+        self.metrics.retire(node)
+        self.health.retire(node)
+        if self.stopped:
+            return
+        logging.error(WORKER_DIED.format(
+            node=node, code=worker.process.exitcode,
+            count=sum(owner == node for owner in self.owners.values())
+        ))
+        for token, source in list(self.handoffs.items()):
+            if source == node:
+                del self.handoffs[token]
+                self.owners.pop(token)
+        self.ring.remove(node)
+        if self.ring.points:
+            self.rebalance()
+        self.respawns.append(time.monotonic() + self.respawn_delay)
+
+    def respawn(self, now=None):
+        """Запускаем замену завершившимся процессам, если пора."""
+        now = time.monotonic() if now is None else now
+        due = [moment for moment in self.respawns if moment <= now]
+        if not due:
+            return
+        self.respawns = [moment for moment in self.respawns if moment > now]
+        for _ in due:
+            self.ring.add(self.new_node())
+        self.rebalance()
+
+    def receive(self, node):
+        """Сообщение рабочего процесса: снимок метрик или подтверждение."""
+        try:
+            kind, payload = self.workers[node].conn.recv()
+        except (EOFError, OSError):
+            return
+        if kind == 'released':
+            self.released(node, payload)
+        elif kind == 'metrics':
+            self.metrics.update(node, payload)
+        elif kind == 'health':
+            self.health.update(node, payload)
+
+    def poll(self, timeout=1):
+        """Ждём сообщений и завершения рабочих процессов."""
+        handles = {}
+        for node, worker in self.workers.items():
+            handles[worker.conn] = (self.receive, node)
+            handles[worker.process.sentinel] = (self.worker_died, node)
+        for handle in connection.wait(list(handles), timeout):
+            handler, node = handles[handle]
+            if node in self.workers:
+                handler(node)
+        self.respawn()
+
+    def stop(self, *args):
+        """Останавливаем рабочие процессы сигналом SIGTERM."""
+        self.stopped = True
+        for worker in self.workers.values():
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def run(self, grace=SHUTDOWN_GRACE):
+        """Работаем до сигнала остановки, затем ждём процессы grace секунд."""
+        listener = QueueListener(
+            self.log_queue, *logging.getLogger().handlers
+        )
+        listener.start()
+        for signum in SHUTDOWN_SIGNALS:
+            signal.signal(signum, self.stop)
+        try:
+            self.start()
+            while not self.stopped:
+                self.poll()
+            deadline = time.monotonic() + grace
+            for worker in list(self.workers.values()):
+                worker.process.join(max(deadline - time.monotonic(), 0))
+                if worker.process.is_alive():
+                    worker.process.kill()
+        finally:
+            listener.stop()
+
+
+class Shard:
+    """Студенты одного рабочего процесса."""
+
+    def __init__(self, bot, client, store, semaphore, released=None):
+        """Пустой набор студентов; released(tokens) подтверждает передачу."""
+        self.bot = bot
+        self.client = client
+        self.store = store
+        self.semaphore = semaphore
+        self.released = released or (lambda tokens: None)
+        self.polls = {}
+        self.tenants = {}
+        self.replies = set()
+
+    def assign(self, tenants):
+        """Начинаем опрос студентов tenants."""
+        for token, chat_ids, name in tenants:
+            if token in self.polls and not self.polls[token][1].is_set():
+                continue
+            tenant = engine.Tenant(
+                token=token, chat_id=chat_ids[0],
+                subscribers=tuple(chat_ids[1:]), name=name,
+            )
+            tenant.restore(self.store)
+            self.tenants[token] = tenant
+            stop = asyncio.Event()
+            task = asyncio.create_task(engine.poll_tenant(
+                tenant, self.bot, self.semaphore, self.client.get,
+                self.store, stop
+            ))
+            self.polls[token] = (task, stop)
+            task.add_done_callback(
+                lambda done, token=token: self.forget(token, done)
+            )
+
+    def release(self, tokens):
+        """Прекращаем опрос студентов после текущего цикла."""
+        for token in tokens:
+            if token in self.polls:
+                self.polls[token][1].set()
+        task = asyncio.create_task(self.handoff(tokens, [
+            self.polls[token][0] for token in tokens if token in self.polls
+        ]))
+        self.replies.add(task)
+        task.add_done_callback(self.replies.discard)
+
+    async def handoff(self, tokens, tasks):
+        """Дожидаемся циклов, пишем состояние и подтверждаем передачу."""
+        if tasks:
+            await asyncio.wait(tasks)
+        try:
+            await asyncio.to_thread(self.store.flush)
+        except Exception as error:
+            logging.error(HANDOFF_ERROR.format(error=error))
+        self.released(tokens)
+
+    def forget(self, token, task):
+        """Опрос студента завершён: его gauge больше не ведём."""
+        if self.polls.get(token, (None,))[0] is task:
+            del self.polls[token]
+            metrics.LAST_POLL_AGE.remove(tenant=self.tenants.pop(token).key)
+
+    def command(self, payload):
+        """Отвечаем на команду студента, пересланную супервизором."""
+        tokens, command, chat_id, labelled = payload
+        tenants = [
+            self.tenants[token] for token in tokens if token in self.tenants
+        ]
+        if tenants:
+            commands.schedule_reply(
+                self.replies, tenants, self.bot, command, self.client.get,
+                chat_id, labelled
+            )
+
+    def tasks(self):
+        """Задачи опроса."""
+        return [task for task, _ in self.polls.values()]
+
+
+async def push_metrics(conn, stop, period=METRICS_PUSH_PERIOD):
+    """Периодически отправляем снимок метрик супервизору."""
+    while not await engine.stopped(stop, period):
+        try:
+            conn.send(('metrics', metrics.REGISTRY.collect()))
+            conn.send(('health', HEALTH.snapshot()))
+        except (BrokenPipeError, OSError):
+            stop.set()
+
+
+async def serve_shard(tenants, conn, bot, client, store, shards=1,
+                      grace=SHUTDOWN_GRACE):
+    """Опрос студентов рабочего процесса по командам супервизора."""
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(engine.CONCURRENCY))
+    stop = asyncio.Event()
+    for signum in SHUTDOWN_SIGNALS:
+        loop.add_signal_handler(signum, stop.set)
+    outbound = OutboundQueue(bot, global_rate=GLOBAL_RATE / shards)
+    outbound.start()
+    engine.watch_health(outbound)
+
+    def released(tokens):
+        try:
+            conn.send(('released', tokens))
+        except (BrokenPipeError, OSError):
+            stop.set()
+
+    shard = Shard(
+        outbound, client, store, asyncio.Semaphore(engine.CONCURRENCY),
+        released,
+    )
+
+    def on_command():
+        try:
+            command, payload = conn.recv()
+        except (EOFError, OSError):
+            loop.remove_reader(conn.fileno())
+            stop.set()
+            return
+        getattr(shard, command)(payload)
+
+    loop.add_reader(conn.fileno(), on_command)
+    shard.assign(tenants)
+    background = [
+        asyncio.create_task(outbound.run()),
+        asyncio.create_task(engine.flush_state(store, stop)),
+        asyncio.create_task(push_metrics(conn, stop)),
+    ]
+    try:
+        await stop.wait()
+        shard.release(list(shard.polls))
+        if shard.tasks():
+            await asyncio.wait(shard.tasks(), timeout=grace)
+    finally:
+        for task in shard.tasks() + background:
+            task.cancel()
+
+
+def worker_main(tenants, conn, log_queue, shards=1):
+    """Точка входа рабочего процесса."""
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    root.addHandler(QueueHandler(log_queue))
+    bot = make_bot(homework.TELEGRAM_TOKEN, engine.TELEGRAM_API_URL)
+    client = PracticumClient(pool_maxsize=engine.CONCURRENCY)
+    store = StateStore()
+    start_tracing()
+    start_memory_watchdog()
+    try:
+        asyncio.run(serve_shard(tenants, conn, bot, client, store, shards))
+    finally:
+        client.close()
+        store.close()
+        stop_tracing()
+        stop_memory_watchdog()
+
+
+def main(workers=WORKERS):
+    """Запуск супервизора для студентов из TENANTS_FILE."""
+    engine.check_token()
+    if STATE_FILE == ':memory:':
+        logging.critical(SHARED_STATE_REQUIRED.format(path=STATE_FILE))
+        raise ValueError(SHARED_STATE_REQUIRED.format(path=STATE_FILE))
+    tenants = engine.load_tenants(engine.TENANTS_FILE)
+    supervisor = Supervisor(
+        [(tenant.token, tenant.chat_ids) for tenant in tenants], workers,
+        names={tenant.token: tenant.name for tenant in tenants},
+    )
+    supervisor.listen(
+        Bot(token=homework.TELEGRAM_TOKEN, base_url=engine.TELEGRAM_API_URL)
+    )
+    if metrics.METRICS_PORT:
+        from homework_bot.metrics_server import MetricsHandler, serve_metrics
+        serve_metrics(handler=type(
+            'MergedMetricsHandler', (MetricsHandler,),
+            {'registry': supervisor.metrics, 'health': supervisor.health}
+        ))
+    supervisor.run()
+    logging.info(SHUTDOWN_DONE)
@@ -0,0 +1,218 @@
+"""
+Трассировка цикла опроса.
+Каждый цикл — трасса из span'ов: запрос к API, разбор JSON, проверка
+ответа, разбор статуса и отправка в Telegram. Законченные span'ы
+складываются в ограниченную очередь, фоновый поток пишет их пачками в
+TRACE_FILE — по строке JSON в формате OTLP (как файловый экспортёр
+OpenTelemetry Collector). Без TRACE_FILE span'ы не создаются.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from homework_bot import metrics
+
+INHERITED_ATTRIBUTES = ('tenant.id',)
+SERVICE_NAME = 'homework_bot'
+STATUS_ERROR = 2
+TRACE_BATCH_SIZE = int(os.getenv('TRACE_BATCH_SIZE', 512))
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+TRACE_FLUSH_PERIOD = float(os.getenv('TRACE_FLUSH_PERIOD', 5))
+TRACE_QUEUE_SIZE = 10000
+
+SPANS_DROPPED = metrics.Counter(
+    'homework_trace_spans_dropped_total',
+    'Span\'ы, не записанные из-за переполнения очереди экспорта.'
+)
+
+_current = ContextVar('span', default=None)
+_exporter = None
+
+
+def otlp_value(value):
+    """Значение атрибута в формате OTLP JSON."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def otlp_attributes(attributes):
+    """Атрибуты в формате OTLP JSON."""
+    return [
+        {'key': key, 'value': otlp_value(value)}
+        for key, value in attributes.items()
+    ]
+
+
+class Span:
+    """Участок трассы."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        """Span name, дочерний для parent."""
+        self.name = name
+        self.attributes = {}
+        if parent is None:
+            self.trace_id = os.urandom(16).hex()
+            self.parent_id = ''
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            for key in INHERITED_ATTRIBUTES:
+                if key in parent.attributes:
+                    self.attributes[key] = parent.attributes[key]
+        self.attributes.update(attributes or {})
+        self.span_id = os.urandom(8).hex()
+        self.start = time.time_ns()
+        self.end = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        """Добавляем атрибут."""
+        self.attributes[key] = value
+
+    def to_otlp(self):
+        """Span в формате OTLP JSON."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': otlp_attributes(self.attributes),
+        }
+        if self.error is not None:
+            span['status'] = {'code': STATUS_ERROR, 'message': self.error}
+        return span
+
+
+class NoopSpan:
+    """Span при выключенной трассировке: атрибуты никуда не пишутся."""
+
+    def set_attribute(self, key, value):
+        """Ничего не делаем."""
+
+
+NOOP_SPAN = NoopSpan()
+
+
+def otlp_batch(spans):
+    """Пачка span'ов — одна строка файла в формате OTLP JSON."""
+    return {'resourceSpans': [{
+        'resource': {'attributes': otlp_attributes(
+            {'service.name': SERVICE_NAME, 'process.pid': os.getpid()}
+        )},
+        'scopeSpans': [{
+            'scope': {'name': SERVICE_NAME},
+            'spans': [span.to_otlp() for span in spans],
+        }],
+    }]}
+
+
+class BatchExporter:
+    """Фоновая запись span'ов в файл пачками."""
+
+    def __init__(self, path, batch_size=TRACE_BATCH_SIZE,
+                 flush_period=TRACE_FLUSH_PERIOD, queue_size=TRACE_QUEUE_SIZE):
+        """Пачка пишется при batch_size span'ах или раз в flush_period с."""
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_period = flush_period
+        self.spans = queue.Queue(maxsize=queue_size)
+        self.thread = threading.Thread(
+            target=self._run, name='trace-exporter', daemon=True
+        )
+        self.thread.start()
+        atexit.register(self.close)
+
+    def export(self, span):
+        """Кладём законченный span в очередь, не блокируя цикл опроса."""
+        try:
+            self.spans.put_nowait(span)
+        except queue.Full:
+            SPANS_DROPPED.inc()
+
+    def _collect(self):
+        """Следующая пачка и признак остановки."""
+        batch = []
+        deadline = time.monotonic() + self.flush_period
+        while len(batch) < self.batch_size:
+            try:
+                span = self.spans.get(
+                    timeout=max(deadline - time.monotonic(), 0)
+                )
+            except queue.Empty:
+                break
+            if span is None:
+                return batch, True
+            batch.append(span)
+        return batch, False
+
+    def _run(self):
+        """Цикл фонового потока."""
+        stopped = False
+        while not stopped:
+            batch, stopped = self._collect()
+            if batch:
+                self.write(batch)
+
+    def write(self, batch):
+        """Дописываем пачку в файл."""
+        line = json.dumps(otlp_batch(batch), ensure_ascii=False) + '\n'
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(line)
+
+    def close(self, timeout=5):
+        """Дописываем оставшиеся span'ы и останавливаем поток."""
+        if self.thread.is_alive():
+            self.spans.put(None)
+            self.thread.join(timeout)
+
+
+def start_tracing(path=TRACE_FILE, **kwargs):
+    """Включаем трассировку с записью в path, если он задан."""
+    global _exporter
+    stop_tracing()
+    if path:
+        _exporter = BatchExporter(path, **kwargs)
+    return _exporter
+
+
+def stop_tracing():
+    """Выключаем трассировку, дописав накопленные span'ы."""
+    global _exporter
+    if _exporter is not None:
+        _exporter.close()
+        atexit.unregister(_exporter.close)
+        _exporter = None
+
+
+@contextmanager
+def span(name, attributes=None):
+    """Span name, дочерний для текущего span'а потока или задачи."""
+    exporter = _exporter
+    if exporter is None:
+        yield NOOP_SPAN
+        return
+    current = Span(name, _current.get(), attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as error:
+        current.error = str(error)
+        raise
+    finally:
+        _current.reset(token)
+        current.end = time.time_ns()
+        exporter.export(current)
@@ -0,0 +1,111 @@
+"""
+Проверка ответа API по схеме.
+Схема один раз собирается в набор вложенных функций, которые проверяют
+весь ответ за один проход и выбрасывают те же исключения с теми же
+сообщениями и теми же метками счётчика ошибок, что check_response и
+parse_status.
+"""
+
+import logging
+
+import homework
+from homework_bot import metrics
+
+
+def counted(path, error, log=False):
+    """Фабрика исключения, которая учитывает его в ERRORS с меткой path."""
+    def make(*args):
+        exception = error(*args)
+        if log:
+            logging.error(exception.args[0])
+        metrics.ERRORS.inc(path=path)
+        return exception
+    return make
+
+
+RESPONSE_SCHEMA = {
+    'type': dict,
+    'type_error': counted('response_type', lambda value: TypeError(
+        homework.DATA_ERROR.format(type_data={type(value)})
+    )),
+    'keys': {
+        'homeworks': {
+            'allow_none': True,
+            'missing': counted('homeworks_key', lambda: KeyError(
+                homework.ANS_KEY_ERROR.format(key='homeworks')
+            )),
+            'type': list,
+            'type_error': counted('homeworks_type', lambda value: TypeError(
+                homework.TYPE_KEY_ERROR.format(type_key={type(value)})
+            ), log=True),
+            'items': {
+                'keys': {
+                    'homework_name': {
+                        'missing': counted('homework_name', lambda: KeyError(
+                            homework.JOB_KEY_ERROR.format(
+                                key='homeworks_name'
+                            )
+                        )),
+                    },
+                    'status': {
+                        'missing': counted(
+                            'homework_status', lambda: KeyError(
+                                homework.JOB_KEY_ERROR.format(
+                                    key='homeworks_status'
+                                )
+                            )
+                        ),
+                        'enum': homework.HOMEWORK_VERDICTS,
+                        'enum_error': counted(
+                            'unknown_status', lambda value: ValueError(
+                                homework.STATUS_JOB_ERROR.format(
+                                    status=value
+                                )
+                            )
+                        ),
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+def compile_schema(schema):
+    """Собираем функцию проверки значения по схеме."""
+    expected_type = schema.get('type')
+    type_error = schema.get('type_error')
+    enum = schema.get('enum')
+    enum_error = schema.get('enum_error')
+    keys = tuple(
+        (name, compile_schema(spec), spec.get('allow_none', False),
+         spec['missing'])
+        for name, spec in schema.get('keys', {}).items()
+    )
+    items = compile_schema(schema['items']) if 'items' in schema else None
+
+    def validate(value):
+        if expected_type is not None and not isinstance(value, expected_type):
+            raise type_error(value)
+        if enum is not None and value not in enum:
+            raise enum_error(value)
+        for name, validate_key, allow_none, missing in keys:
+            if name not in value or (
+                value[name] is None and not allow_none
+            ):
+                raise missing()
+            validate_key(value[name])
+        if items is not None:
+            for item in value:
+                items(item)
+        return value
+
+    return validate
+
+
+validate_response = compile_schema(RESPONSE_SCHEMA)
+
+
+def check_response(response):
+    """Проверяем весь ответ API и возвращаем список работ."""
+    return validate_response(response)['homeworks']
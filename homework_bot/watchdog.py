@@ -0,0 +1,129 @@
+"""
+Сторож памяти.
+Фоновый поток раз в MEMORY_CHECK_PERIOD секунд обновляет метрику
+резидентной памяти процесса (RSS). С MEMORY_TRACE=1 он также включает
+tracemalloc, снимает снимок самых крупных мест выделения памяти и
+пишет в лог рост с прошлого снимка, чтобы утечка была видна задолго
+до того, как процесс упрётся в лимит памяти.
+"""
+
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+
+from homework_bot import metrics
+
+MEMORY_CHECK_PERIOD = float(os.getenv('MEMORY_CHECK_PERIOD', 60))
+MEMORY_GROWTH = 'Рост памяти: {place} {diff:+.1f} КБ (всего {size:.1f} КБ)'
+MEMORY_REPORT = 'Память: RSS {rss:.1f} МБ, tracemalloc {traced:.1f} МБ'
+MEMORY_TOP = int(os.getenv('MEMORY_TOP', 10))
+MEMORY_TRACE = os.getenv('MEMORY_TRACE', '0') == '1'
+MEMORY_TRACE_FRAMES = int(os.getenv('MEMORY_TRACE_FRAMES', 1))
+IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+)
+
+RESIDENT_MEMORY = metrics.Gauge(
+    'homework_process_resident_memory_bytes',
+    'Резидентная память процесса.'
+)
+TRACED_MEMORY = metrics.Gauge(
+    'homework_traced_memory_bytes', 'Память, выделенная Python (tracemalloc).'
+)
+
+_watchdog = None
+
+
+def rss_bytes():
+    """Резидентная память процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryWatchdog:
+    """Периодическая проверка памяти процесса."""
+
+    def __init__(self, period=MEMORY_CHECK_PERIOD, trace=MEMORY_TRACE,
+                 top=MEMORY_TOP, frames=MEMORY_TRACE_FRAMES):
+        """Проверка раз в period секунд; trace включает tracemalloc."""
+        self.period = period
+        self.trace = trace
+        self.top = top
+        self.frames = frames
+        self.snapshot = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def check(self):
+        """Обновляем метрики памяти; при трассировке — пишем рост."""
+        rss = rss_bytes()
+        RESIDENT_MEMORY.set(rss)
+        if not self.trace:
+            return []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        snapshot = tracemalloc.take_snapshot().filter_traces(IGNORED_TRACES)
+        traced = tracemalloc.get_traced_memory()[0]
+        TRACED_MEMORY.set(traced)
+        logging.info(MEMORY_REPORT.format(
+            rss=rss / 2 ** 20, traced=traced / 2 ** 20
+        ))
+        growth = []
+        if self.snapshot is not None:
+            growth = [
+                stat for stat in snapshot.compare_to(self.snapshot, 'lineno')
+                if stat.size_diff > 0
+            ][:self.top]
+            for stat in growth:
+                logging.info(MEMORY_GROWTH.format(
+                    place=stat.traceback, diff=stat.size_diff / 1024,
+                    size=stat.size / 1024
+                ))
+        self.snapshot = snapshot
+        return growth
+
+    def _run(self):
+        """Цикл фонового потока."""
+        while not self.stopped.wait(self.period):
+            self.check()
+
+    def start(self):
+        """Первая проверка сразу, дальше — в фоновом потоке."""
+        self.check()
+        self.thread = threading.Thread(
+            target=self._run, name='memory-watchdog', daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем проверки."""
+        self.stopped.set()
+        if self.trace and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def start_memory_watchdog(**kwargs):
+    """Запускаем сторож памяти, если задан период проверки."""
+    global _watchdog
+    stop_memory_watchdog()
+    if kwargs.get('period', MEMORY_CHECK_PERIOD) > 0:
+        _watchdog = MemoryWatchdog(**kwargs).start()
+    return _watchdog
+
+
+def stop_memory_watchdog():
+    """Останавливаем сторож памяти."""
+    global _watchdog
+    if _watchdog is not None:
+        _watchdog.stop()
+        _watchdog = None
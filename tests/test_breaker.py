@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import homework
+import utils
+from homework_bot import breaker
+from homework_bot.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def respond(http_status):
+    def get(*args, **kwargs):
+        return utils.MockResponseGET(http_status=http_status, data={})
+    return get
+
+
+def timeout(*args, **kwargs):
+    raise requests.exceptions.Timeout('timeout')
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_threshold(self):
+        circuit = CircuitBreaker('api', threshold=3, reset=10, clock=Clock())
+        for _ in range(2):
+            circuit.call(respond(HTTPStatus.INTERNAL_SERVER_ERROR))
+        assert circuit.state == CLOSED
+        with pytest.raises(requests.exceptions.Timeout):
+            circuit.call(timeout)
+        assert circuit.state == OPEN, (
+            'После серии ошибок подряд предохранитель должен размыкаться.'
+        )
+        calls = []
+        with pytest.raises(ConnectionError):
+            circuit.call(lambda **kwargs: calls.append(kwargs))
+        assert not calls, (
+            'Пока цепь разомкнута, запрос не должен отправляться.'
+        )
+
+    def test_client_errors_do_not_count(self):
+        circuit = CircuitBreaker('api', threshold=2, clock=Clock())
+        for _ in range(5):
+            circuit.call(respond(HTTPStatus.UNAUTHORIZED))
+        assert circuit.state == CLOSED, (
+            'Ответы 4xx не говорят о недоступности сервиса.'
+        )
+
+    def test_single_half_open_probe(self):
+        clock = Clock()
+        circuit = CircuitBreaker('api', threshold=1, reset=10, clock=clock)
+        circuit.call(respond(HTTPStatus.BAD_GATEWAY))
+        clock.now = 10
+        circuit.acquire()
+        assert circuit.state == HALF_OPEN
+        with pytest.raises(ConnectionError):
+            circuit.acquire()
+        circuit.failure()
+        assert circuit.state == OPEN, (
+            'Неудачная проба должна снова размыкать цепь.'
+        )
+        clock.now = 20
+        circuit.call(respond(HTTPStatus.OK))
+        assert circuit.state == CLOSED, (
+            'Удачная проба должна замыкать цепь.'
+        )
+
+    def test_breaker_is_shared_by_endpoint(self, current_timestamp):
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs)
+            return utils.MockResponseGET(
+                http_status=HTTPStatus.SERVICE_UNAVAILABLE, data={}
+            )
+
+        for number in range(breaker.BREAKER_THRESHOLD + 2):
+            with pytest.raises((ValueError, ConnectionError)):
+                homework.request_api_answer(
+                    current_timestamp, homework.make_headers(f't{number}'), get
+                )
+        assert len(calls) == breaker.BREAKER_THRESHOLD, (
+            'Предохранитель должен быть общим для всех студентов.'
+        )
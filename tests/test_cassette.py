@@ -0,0 +1,130 @@
+import io
+import json
+from functools import partial
+
+import pytest
+
+import homework
+import utils
+from homework_bot import cassette
+from homework_bot.cassette import REPLAY, Recorder, Replayed
+from homework_bot.errors import ERROR_WINDOW
+from homework_bot.state import StateStore, tenant_key
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+
+
+def answers():
+    return iter([
+        Replayed(200, json.dumps({'homeworks': [], 'current_date': 100})),
+        Replayed(200, json.dumps(
+            {'homeworks': [HOMEWORK], 'current_date': 200}
+        )),
+        Replayed(500, '{}'),
+    ])
+
+
+class TestCassette:
+
+    def record(self, path):
+        recorder = Recorder(path)
+        responses = answers()
+        bot = recorder.bot(utils.MockTelegramBot())
+        timestamp = 0
+        for _ in range(3):
+            response = recorder.get(
+                lambda **kwargs: next(responses), url=homework.ENDPOINT,
+                params={'from_date': timestamp}
+            )
+            if response.status_code != 200:
+                continue
+            data = response.json()
+            for item in data['homeworks']:
+                bot.send_message('1', homework.parse_status(item))
+            timestamp = data['current_date']
+        recorder.close()
+
+    def test_replay_reproduces_messages(self, tmp_path, monkeypatch):
+        recorded = tmp_path / 'cassette.jsonl'
+        output = tmp_path / 'replay.jsonl'
+        self.record(recorded)
+        monkeypatch.setattr(homework, 'open_cassette', partial(
+            cassette.open_cassette, REPLAY, recorded, output
+        ))
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework.telegram, 'Bot', utils.MockTelegramBot)
+        with pytest.raises(SystemExit):
+            homework.main()
+        sent = cassette.messages(output)
+        assert sent[0] == homework.parse_status(HOMEWORK), (
+            'При воспроизведении бот должен отправить те же уведомления.'
+        )
+        assert sent[1].startswith(
+            homework.MESSAGE_ERROR.format(error='')
+        ), 'Ошибки из кассеты должны обрабатываться как в работе.'
+        stream = io.StringIO()
+        assert cassette.compare(recorded, output, stream) == 1
+        assert 'Сообщение 2' in stream.getvalue()
+        assert not cassette.replaying(), 'Кассета должна выключаться.'
+
+    def replay(self, monkeypatch, recorded, output, entries):
+        recorded.write_text(''.join(
+            json.dumps(entry) + '\n' for entry in entries
+        ))
+        monkeypatch.setattr(homework, 'open_cassette', partial(
+            cassette.open_cassette, REPLAY, recorded, output
+        ))
+        monkeypatch.setattr(homework, 'PRACTICUM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_TOKEN', 'token')
+        monkeypatch.setattr(homework, 'TELEGRAM_CHAT_ID', '1')
+        monkeypatch.setattr(homework.telegram, 'Bot', utils.MockTelegramBot)
+        with pytest.raises(SystemExit):
+            homework.main()
+        return cassette.messages(output)
+
+    def test_replay_ignores_stored_state(self, tmp_path, monkeypatch):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path)
+        store.save(tenant_key('token'), 999999, '')
+        store.flush()
+        store.close()
+        monkeypatch.setattr(
+            homework, 'StateStore', lambda path=path: StateStore(path)
+        )
+        sent = self.replay(
+            monkeypatch, tmp_path / 'cassette.jsonl',
+            tmp_path / 'replay.jsonl',
+            [{'type': 'request', 'at': 0, 'params': {'from_date': 100},
+              'status': 200, 'body': json.dumps(
+                  {'homeworks': [HOMEWORK], 'current_date': 200}
+              )}],
+        )
+        assert sent == [homework.parse_status(HOMEWORK)], (
+            'Воспроизведение начинается с from_date кассеты.'
+        )
+        store = StateStore(path)
+        assert store.load(tenant_key('token'), 0)[0] == 999999, (
+            'Воспроизведение не должно менять рабочее состояние.'
+        )
+        store.close()
+
+    def test_replay_uses_recorded_time(self, tmp_path, monkeypatch):
+        failure = {'type': 'request', 'params': {'from_date': 0},
+                   'status': 500, 'body': '{}'}
+        sent = self.replay(
+            monkeypatch, tmp_path / 'cassette.jsonl',
+            tmp_path / 'replay.jsonl',
+            [{**failure, 'at': 0}, {**failure, 'at': 10},
+             {**failure, 'at': ERROR_WINDOW + 10}],
+        )
+        errors = [text for text in sent if text.startswith(
+            homework.MESSAGE_ERROR.format(error='')
+        )]
+        assert len(errors) == 2, (
+            'Окно повторов ошибок отсчитывается по записанному времени.'
+        )
+        assert sent[-1].startswith('Повторяющиеся ошибки'), (
+            'Сводка повторов приходит по записанному времени.'
+        )
@@ -0,0 +1,47 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from homework_bot.client import PracticumClient
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'{"homeworks": [], "current_date": 1}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/'
+    server.shutdown()
+    server.server_close()
+
+
+class TestPracticumClient:
+
+    def test_connection_is_reused(self, local_server):
+        client = PracticumClient(pool_maxsize=2)
+        try:
+            for _ in range(5):
+                response = client.get(url=local_server, timeout=(1, 1))
+                assert response.json()['current_date'] == 1
+            stats = client.stats()
+        finally:
+            client.close()
+        assert stats == {'requests': 5, 'hits': 4, 'misses': 1}, (
+            'Проверьте, что соединение с сервером переиспользуется.'
+        )
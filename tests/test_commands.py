@@ -0,0 +1,122 @@
+import threading
+import time
+from http import HTTPStatus
+
+import utils
+from homework_bot import commands, engine
+from homework_bot.cache import StatusCache
+
+HOMEWORKS = [
+    {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+     'date_updated': '2024-01-02T10:00:00Z'},
+    {'id': 2, 'homework_name': 'hw2', 'status': 'reviewing',
+     'date_updated': '2024-01-05T10:00:00Z'},
+]
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestStatusCache:
+
+    def test_concurrent_misses_are_coalesced(self):
+        cache = StatusCache()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            time.sleep(0.1)
+            return HOMEWORKS
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                cache.fetch(loader)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Одновременные промахи должны ждать один общий запрос.'
+        )
+        assert results == [HOMEWORKS] * 5
+
+    def test_ttl_and_merge(self):
+        clock = Clock()
+        cache = StatusCache(ttl=60, clock=clock)
+        cache.merge(HOMEWORKS[:1])
+        assert cache.get() is None, (
+            'Частичный ответ цикла опроса не заполняет пустой кэш.'
+        )
+        cache.replace(HOMEWORKS)
+        clock.now = 59
+        cache.merge([{**HOMEWORKS[1], 'status': 'approved'}])
+        clock.now = 100
+        assert [hw['status'] for hw in cache.get()] == [
+            'approved', 'approved'
+        ], 'Цикл опроса должен обновлять и продлевать кэш.'
+        clock.now = 200
+        assert cache.get() is None
+
+
+class TestCommands:
+
+    def test_parse_command(self):
+        assert commands.parse_command('/Status@homework_bot 1') == '/status'
+        assert commands.parse_command('привет') is None
+
+    def test_status_is_served_from_cache(self, current_timestamp):
+        tenant = engine.Tenant(token='t1', chat_id='42')
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs)
+            return utils.MockResponseGET(
+                http_status=HTTPStatus.OK,
+                data={'homeworks': HOMEWORKS, 'current_date': 1}
+            )
+
+        bot = utils.MockTelegramBot()
+        for command in ('/status', '/last', '/status'):
+            commands.reply(tenant, bot, command, get)
+        assert len(calls) == 1, 'Команды должны отвечать из кэша.'
+        assert calls[0]['params'] == {'from_date': 0}
+        assert bot.chat_id == '42'
+        assert 'hw1' in bot.text and 'hw2' in bot.text
+        commands.reply(tenant, bot, '/last', get)
+        assert bot.text.startswith('Последняя работа "hw2"')
+
+    def test_reply_goes_to_requesting_chat(self):
+        tenant = engine.Tenant(token='t1', chat_id='42', subscribers=('43',))
+        tenant.status.replace(HOMEWORKS)
+        bot = utils.MockTelegramBot()
+        commands.reply(tenant, bot, '/status', chat_id='43')
+        assert bot.chat_id == '43', (
+            'Ответ на команду должен уходить только в чат подписчика.'
+        )
+
+    def test_mentor_chat_gets_every_student(self):
+        first = engine.Tenant(token='t1', chat_id='42', subscribers=('99',),
+                              name='Анна')
+        second = engine.Tenant(token='t2', chat_id='43', subscribers=('99',))
+        first.status.replace(HOMEWORKS[:1])
+        second.status.replace(HOMEWORKS[1:])
+        bot = utils.MockTelegramBot()
+        commands.reply_all([first, second], bot, '/status', chat_id='99')
+        assert bot.chat_id == '99'
+        assert bot.text.startswith('Анна:\n'), (
+            'Ответ каждого студента должен быть подписан.'
+        )
+        assert 'Студент из чата 43:\n' in bot.text
+        assert 'hw1' in bot.text and 'hw2' in bot.text, (
+            'Чат наставника получает ответ за всех своих студентов.'
+        )
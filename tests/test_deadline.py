@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+import homework
+import utils
+from homework_bot.deadline import Deadline, cycle_deadline, limit
+from homework_bot.hedge import Hedger
+from homework_bot.index import ChangeIndex
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline:
+
+    def test_timeouts_are_clamped(self):
+        clock = Clock()
+        deadline = Deadline(10, clock=clock)
+        assert deadline.limit(5) == 5
+        clock.now = 8
+        assert deadline.limit(5) == 2, (
+            'Таймаут не должен выходить за дедлайн цикла.'
+        )
+        clock.now = 10
+        with pytest.raises(TimeoutError):
+            deadline.limit(5)
+
+    def test_request_uses_split_timeouts(self, monkeypatch):
+        calls = []
+
+        def get(**kwargs):
+            calls.append(kwargs['timeout'])
+            return utils.MockResponseGET(data={'homeworks': []})
+
+        monkeypatch.setattr(homework, 'CONNECT_TIMEOUT', 3)
+        monkeypatch.setattr(homework, 'READ_TIMEOUT', 20)
+        homework.request_api_answer(0, {}, get)
+        with cycle_deadline(10):
+            homework.request_api_answer(0, {}, get)
+        assert calls[0] == (3, 20)
+        assert calls[1][0] == 3 and 9 < calls[1][1] <= 10, (
+            'Таймаут чтения должен ограничиваться остатком дедлайна.'
+        )
+        assert limit(7) == 7
+
+    def test_sending_stops_at_deadline(self):
+        homeworks = [
+            {'id': number, 'homework_name': f'hw{number}',
+             'status': 'approved'}
+            for number in range(3)
+        ]
+        index = ChangeIndex()
+        sent = []
+
+        def send(bot, message):
+            sent.append(message)
+            time.sleep(0.05)
+            return True
+
+        with pytest.raises(TimeoutError):
+            with cycle_deadline(0.08):
+                homework.send_changes(None, homeworks, index, send)
+        assert len(sent) == 2, (
+            'После дедлайна цикла новые сообщения не должны отправляться.'
+        )
+        assert len(list(index.changes(homeworks))) == 1, (
+            'Неотправленные изменения должны остаться для следующего цикла.'
+        )
+
+
+class TestHedger:
+
+    def test_slow_request_is_hedged(self):
+        hedger = Hedger(quantile=0.95, min_samples=5, workers=4)
+        for _ in range(5):
+            hedger.observe(0.01)
+        calls = []
+        release = threading.Event()
+
+        def get(**kwargs):
+            calls.append(kwargs)
+            if len(calls) == 1:
+                release.wait(1)
+                return 'slow'
+            return 'fast'
+
+        start = time.monotonic()
+        assert hedger.call(get, url='api') == 'fast', (
+            'Должен использоваться ответ, пришедший первым.'
+        )
+        assert time.monotonic() - start < 0.5
+        assert len(calls) == 2
+        release.set()
+
+    def test_no_hedging_without_samples(self):
+        hedger = Hedger(min_samples=5, workers=1)
+        calls = []
+
+        def get(**kwargs):
+            calls.append(kwargs)
+            return 'ok'
+
+        assert hedger.call(get) == 'ok'
+        assert len(calls) == 1
+        assert hedger.threshold() is None
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import sqlite3
+from http import HTTPStatus
+
+import pytest
+from telegram.error import NetworkError, Unauthorized
+
+import utils
+from homework_bot import engine
+from homework_bot.outbound import OutboundQueue
+
+
+def mock_get(data, http_status=HTTPStatus.OK):
+    calls = []
+
+    def get(*args, **kwargs):
+        calls.append(kwargs)
+        return utils.MockResponseGET(http_status=http_status, data=data)
+
+    get.calls = calls
+    return get
+
+
+class TestEngine:
+
+    def test_load_tenants(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 't1', 'chat_id': 1}]))
+        tenants = engine.load_tenants(path)
+        assert [(t.token, t.chat_id) for t in tenants] == [('t1', '1')], (
+            'Проверьте загрузку студентов из файла.'
+        )
+
+    def test_load_tenants_merges_subscribers(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'token': 't1', 'chat_id': 1, 'subscribers': [2, 3]},
+            {'token': 't2', 'chat_id': 4},
+            {'token': 't1', 'chat_id': 5, 'subscribers': [2]},
+        ]))
+        tenants = engine.load_tenants(path)
+        assert [(t.token, t.chat_ids) for t in tenants] == [
+            ('t1', ('1', '2', '3', '5')), ('t2', ('4',))
+        ], 'Подписчики одного токена должны объединяться в одного студента.'
+
+    def test_load_tenants_without_key(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'token': 't1'}]))
+        with pytest.raises(KeyError):
+            engine.load_tenants(path)
+
+    def test_poll_once_uses_tenant_state(self, data_with_new_hw_status,
+                                         random_timestamp):
+        tenant = engine.Tenant(token='t1', chat_id='42', timestamp=1)
+        bot = utils.MockTelegramBot()
+        get = mock_get(data_with_new_hw_status)
+        engine.poll_once(tenant, bot, get)
+        assert get.calls[0]['headers']['Authorization'] == 'OAuth t1', (
+            'Проверьте, что запрос отправляется с токеном студента.'
+        )
+        assert get.calls[0]['params'] == {'from_date': 1}
+        assert bot.chat_id == '42', (
+            'Проверьте, что сообщение отправляется в чат студента.'
+        )
+        assert tenant.timestamp == random_timestamp, (
+            'Проверьте, что после отправки сообщения timestamp обновляется.'
+        )
+
+    def test_poll_once_error_is_cached(self):
+        tenant = engine.Tenant(token='t1', chat_id='42', timestamp=1)
+        bot = utils.MockTelegramBot()
+        get = mock_get({}, HTTPStatus.INTERNAL_SERVER_ERROR)
+        engine.poll_once(tenant, bot, get)
+        assert bot.text, 'Первая ошибка должна отправляться в Telegram.'
+        bot.text = None
+        engine.poll_once(tenant, bot, get)
+        assert bot.text is None, (
+            'Повторная ошибка не должна отправляться в Telegram.'
+        )
+
+    def test_subscribers_share_one_poll(self, data_with_new_hw_status):
+        tenant = engine.Tenant(
+            token='t1', chat_id='42', subscribers=('43', '44'), timestamp=1
+        )
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                sent.append((chat_id, text))
+
+        get = mock_get(data_with_new_hw_status)
+        engine.poll_once(tenant, Bot(), get)
+        assert len(get.calls) == 1, (
+            'Токен должен опрашиваться один раз на всех подписчиков.'
+        )
+        assert sorted(chat_id for chat_id, _ in sent) == ['42', '43', '44']
+        assert len({text for _, text in sent}) == 1
+
+    def test_blocked_subscriber_does_not_repeat_others(
+        self, data_with_new_hw_status, random_timestamp
+    ):
+        tenant = engine.Tenant(
+            token='t1', chat_id='42', subscribers=('43', '44'), timestamp=1
+        )
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                if chat_id == '43':
+                    raise Unauthorized('Forbidden: bot was blocked by the user')
+                sent.append(chat_id)
+
+        for _ in range(3):
+            engine.poll_once(tenant, Bot(), mock_get(data_with_new_hw_status))
+        assert sorted(sent) == ['42', '44'], (
+            'Заблокировавший бота подписчик не должен вызывать повторы '
+            'остальным.'
+        )
+        assert tenant.timestamp == random_timestamp
+
+    def test_error_is_resent_only_to_failed_chat(self):
+        tenant = engine.Tenant(
+            token='t1', chat_id='42', subscribers=('43',), timestamp=1
+        )
+        sent = []
+
+        class Bot:
+            def send_message(self, chat_id, text, **kwargs):
+                sent.append(chat_id)
+                if chat_id == '43' and sent.count('43') == 1:
+                    raise NetworkError('timeout')
+
+        get = mock_get({}, HTTPStatus.INTERNAL_SERVER_ERROR)
+        for _ in range(3):
+            engine.poll_once(tenant, Bot(), get)
+        assert sorted(sent) == ['42', '43', '43'], (
+            'Ошибка должна повторяться только в чат, куда не дошла, и '
+            'запоминаться после доставки всем.'
+        )
+
+    def test_run_polls_all_tenants(self, monkeypatch, random_timestamp):
+        tenants = [
+            engine.Tenant(token=f't{i}', chat_id=str(i)) for i in range(5)
+        ]
+        get = mock_get({'homeworks': [], 'current_date': random_timestamp})
+
+        async def run():
+            await asyncio.wait_for(
+                engine.run(tenants, utils.MockTelegramBot(), get=get),
+                timeout=0.3
+            )
+
+        monkeypatch.setattr(engine, 'START_SPREAD', 0)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(run())
+        tokens = {call['headers']['Authorization'] for call in get.calls}
+        assert tokens == {f'OAuth t{i}' for i in range(5)}, (
+            'Проверьте, что опрашиваются все студенты.'
+        )
+
+    def test_poll_once_through_outbound_queue(self, data_with_new_hw_status,
+                                              random_timestamp):
+        tenant = engine.Tenant(token='t1', chat_id='42', timestamp=1)
+        bot = utils.MockTelegramBot()
+        outbound = OutboundQueue(bot)
+
+        async def run():
+            outbound.start()
+            dispatcher = asyncio.create_task(outbound.run())
+            await asyncio.to_thread(
+                engine.poll_once, tenant, outbound,
+                mock_get(data_with_new_hw_status)
+            )
+            dispatcher.cancel()
+
+        asyncio.run(run())
+        assert bot.chat_id == '42'
+        assert tenant.timestamp == random_timestamp, (
+            'Проверьте, что подтверждение из очереди обновляет timestamp.'
+        )
+
+    def test_cycle_failure_keeps_polling(self, monkeypatch, random_timestamp):
+        tenant = engine.Tenant(token='t1', chat_id='42')
+        get = mock_get({'homeworks': [], 'current_date': random_timestamp})
+
+        class BrokenStore:
+            def save(self, *args):
+                raise sqlite3.OperationalError('database is locked')
+
+        async def run():
+            stop = asyncio.Event()
+            task = asyncio.create_task(engine.poll_tenant(
+                tenant, utils.MockTelegramBot(), asyncio.Semaphore(1), get,
+                BrokenStore(), stop
+            ))
+            while len(get.calls) < 3 and not task.done():
+                await asyncio.sleep(0.01)
+            stop.set()
+            await task
+
+        monkeypatch.setattr(engine, 'START_SPREAD', 0)
+        monkeypatch.setattr(tenant.scheduler, 'next_delay', lambda: 0.01)
+        asyncio.run(run())
+        assert len(get.calls) >= 3, (
+            'Сбой записи состояния не должен останавливать опрос студента.'
+        )
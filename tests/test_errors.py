@@ -0,0 +1,87 @@
+import homework
+import utils
+from homework_bot.errors import ErrorCache, fingerprint
+
+SERVER_ERROR = homework.SERVER_ERROR.format(
+    url=homework.ENDPOINT, headers={'Authorization': 'OAuth secret'},
+    params={'from_date': 1000198000}, timeout=(30, 30),
+    error='Read timed out'
+)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestErrorCache:
+
+    def test_variable_parts_are_ignored(self):
+        other = SERVER_ERROR.replace('1000198000', '1000198600')
+        assert fingerprint(SERVER_ERROR) == fingerprint(other), (
+            'Ошибки, различающиеся только from_date, должны совпадать.'
+        )
+        assert fingerprint(SERVER_ERROR) != fingerprint(
+            SERVER_ERROR.replace('Read timed out', 'Connection refused')
+        )
+
+    def test_alternating_errors_are_suppressed(self):
+        clock = Clock()
+        cache = ErrorCache(window=600, clock=clock)
+        bot = utils.MockTelegramBot()
+        sent = []
+
+        def send(bot, message):
+            sent.append(message)
+            return True
+
+        for number in range(6):
+            error = ValueError('Ошибка {}'.format('A' if number % 2 else 'B'))
+            homework.report_error(bot, cache, error, send)
+        assert len(sent) == 2, (
+            'Чередующиеся ошибки должны отправляться по одному разу.'
+        )
+        clock.now += 600
+        homework.report_error(bot, cache, ValueError('Ошибка A'), send)
+        assert len(sent) == 3, 'После окна ошибка отправляется снова.'
+
+    def test_summary_counts_repeats(self):
+        clock = Clock()
+        cache = ErrorCache(window=600, summary_period=60, clock=clock)
+        cache.remember('Ошибка A')
+        for _ in range(3):
+            cache.check('Ошибка A')
+        assert cache.summary() is None
+        clock.now += 60
+        assert '3 раз: Ошибка A' in cache.summary(), (
+            'Сводка должна содержать число подавленных повторов.'
+        )
+        cache.summarized()
+        clock.now += 60
+        assert cache.summary() is None
+
+    def test_cache_is_bounded(self):
+        cache = ErrorCache(size=3)
+        for number in 'ABCDE':
+            cache.remember(f'Ошибка {number}')
+        assert len(cache.entries) == 3
+        assert cache.check('Ошибка A'), 'Старые отпечатки вытесняются.'
+
+    def test_dumps_and_loads(self):
+        clock = Clock()
+        cache = ErrorCache(clock=clock)
+        cache.remember(SERVER_ERROR)
+        cache.check(SERVER_ERROR)
+        restored = ErrorCache.loads(cache.dumps(), clock=clock)
+        assert not restored.check(SERVER_ERROR), (
+            'Кэш ошибок должен переживать перезапуск.'
+        )
+        assert 'secret' not in cache.dumps(), (
+            'Токен не должен сохраняться в кэше ошибок.'
+        )
+        legacy = ErrorCache.loads('Сбой в работе программы', clock=clock)
+        assert not legacy.check('Сбой в работе программы')
@@ -0,0 +1,128 @@
+import threading
+
+from telegram.error import BadRequest, NetworkError, Unauthorized
+
+from homework_bot.deadline import current_deadline, cycle_deadline
+from homework_bot.fanout import Delivery, fan_out, parse_chat_ids
+
+
+class TestFanOut:
+
+    def test_parse_chat_ids(self):
+        assert parse_chat_ids('1, 2,,3') == ('1', '2', '3')
+        assert parse_chat_ids(42) == ('42',)
+
+    def test_chats_are_served_concurrently(self):
+        barrier = threading.Barrier(3, timeout=1)
+        sent = []
+
+        def send(bot, chat_id, message):
+            barrier.wait()
+            sent.append(chat_id)
+
+        assert fan_out(send, None, ('1', '2', '3'), 'text'), (
+            'Рассылка должна подтверждаться, когда доставлено всем.'
+        )
+        assert sorted(sent) == ['1', '2', '3'], (
+            'Отправки подписчикам должны идти параллельно.'
+        )
+
+    def test_only_failed_chats_are_retried(self):
+        delivery = Delivery()
+        sent = []
+
+        def send(bot, chat_id, message):
+            sent.append(chat_id)
+            if chat_id == '2' and sent.count('2') == 1:
+                raise NetworkError('timeout')
+
+        assert not fan_out(send, None, ('1', '2', '3'), 'text', delivery)
+        assert fan_out(send, None, ('1', '2', '3'), 'text', delivery)
+        assert sorted(sent) == ['1', '2', '2', '3'], (
+            'Повтор должен уходить только в чат, где отправка не удалась.'
+        )
+
+    def test_unavailable_chat_is_disabled(self):
+        delivery = Delivery()
+        sent = []
+
+        def send(bot, chat_id, message):
+            if chat_id == '2':
+                raise Unauthorized('Forbidden: bot was blocked by the user')
+            if chat_id == '3':
+                raise BadRequest('Chat not found')
+            sent.append(chat_id)
+
+        assert fan_out(send, None, ('1', '2', '3'), 'first', delivery), (
+            'Недоступный чат не должен задерживать остальных подписчиков.'
+        )
+        assert delivery.disabled == {'2', '3'}
+        fan_out(send, None, ('1', '2', '3'), 'second', delivery)
+        assert sent == ['1', '1']
+
+    def test_invalid_bot_token_does_not_disable_chat(self):
+        delivery = Delivery()
+        sent = []
+
+        def send(bot, chat_id, message):
+            sent.append(chat_id)
+            raise Unauthorized('Unauthorized')
+
+        assert not fan_out(send, None, ('1',), 'text', delivery)
+        assert not fan_out(send, None, ('1',), 'text', delivery)
+        assert sent == ['1', '1'] and not delivery.disabled, (
+            'Неверный токен бота не должен отключать чат.'
+        )
+
+    def test_no_live_chats_is_not_delivered(self):
+        delivery = Delivery()
+
+        def send(bot, chat_id, message):
+            raise Unauthorized('Forbidden: bot was kicked from the group')
+
+        assert not fan_out(send, None, ('1',), 'text', delivery)
+        assert not fan_out(send, None, ('1',), 'text', delivery), (
+            'Без живых чатов сообщение не должно считаться доставленным.'
+        )
+
+    def test_messages_differing_in_numbers_are_separate(self):
+        delivery = Delivery()
+        sent = []
+
+        def send(bot, chat_id, message):
+            sent.append(message)
+
+        first = 'Изменился статус проверки работы "hw_1234567". Ура!'
+        second = 'Изменился статус проверки работы "hw_7654321". Ура!'
+        assert fan_out(send, None, ('1',), first, delivery)
+        assert fan_out(send, None, ('1',), second, delivery)
+        assert sent == [first, second], (
+            'Уведомления о разных работах учитываются по точному тексту.'
+        )
+
+    def test_key_groups_retries(self):
+        delivery = Delivery()
+        sent = []
+
+        def send(bot, chat_id, message):
+            sent.append(chat_id)
+            if chat_id == '2' and len(sent) < 3:
+                raise NetworkError('timeout')
+
+        assert not fan_out(send, None, ('1', '2'), 'from 1', delivery, 'e')
+        assert fan_out(send, None, ('1', '2'), 'from 2', delivery, 'e')
+        assert sorted(sent) == ['1', '2', '2'], (
+            'Повтор с тем же ключом уходит только в чат, где не удалось.'
+        )
+
+    def test_sends_keep_cycle_deadline(self):
+        deadlines = []
+
+        def send(bot, chat_id, message):
+            deadlines.append(current_deadline())
+
+        with cycle_deadline(10) as deadline:
+            fan_out(send, None, ('1', '2'), 'text')
+        assert deadlines == [deadline, deadline], (
+            'Отправки должны выполняться в пределах дедлайна цикла.'
+        )
@@ -0,0 +1,61 @@
+import homework
+from homework_bot.index import ChangeIndex
+from homework_bot.state import StateStore
+
+HOMEWORKS = [
+    {'id': 1, 'homework_name': 'hw1', 'status': 'reviewing'},
+    {'id': 2, 'homework_name': 'hw2', 'status': 'approved'},
+    {'id': 3, 'homework_name': 'hw3', 'status': 'rejected'},
+]
+
+
+class TestChangeIndex:
+
+    def test_only_transitions_are_reported(self):
+        index = ChangeIndex({'1': 'reviewing', '2': 'reviewing'})
+        changed = index.changes(HOMEWORKS)
+        assert [hw['id'] for hw in changed] == [2, 3], (
+            'Проверьте, что сообщаются только изменившиеся статусы.'
+        )
+
+    def test_every_homework_is_sent(self):
+        sent = []
+
+        def send(bot, message):
+            sent.append(message)
+            return True
+
+        index = ChangeIndex()
+        assert homework.send_changes(None, HOMEWORKS, index, send)
+        assert len(sent) == 3, (
+            'Проверьте, что бот сообщает обо всех работах из ответа API.'
+        )
+        assert homework.send_changes(None, HOMEWORKS, index, send)
+        assert len(sent) == 3, 'Повторный ответ не должен давать сообщений.'
+
+    def test_failed_send_is_retried(self):
+        index = ChangeIndex()
+        assert not homework.send_changes(
+            None, HOMEWORKS, index, lambda bot, message: 'hw2' not in message
+        )
+        assert [hw['id'] for hw in index.changes(HOMEWORKS)] == [2], (
+            'Неотправленное сообщение должно быть отправлено повторно.'
+        )
+
+    def test_index_is_persisted(self, tmp_path):
+        store = StateStore(str(tmp_path / 'state.sqlite3'))
+        index = ChangeIndex.load(store, 'tenant')
+        index.commit(HOMEWORKS[0])
+        store.flush()
+        assert ChangeIndex.load(store, 'tenant').statuses == {
+            '1': 'reviewing'
+        }
+        store.close()
+
+    def test_index_is_bounded(self):
+        index = ChangeIndex(size=2)
+        for homework_item in HOMEWORKS:
+            index.commit(homework_item)
+        assert list(index.statuses) == ['2', '3'], (
+            'Индекс должен вытеснять давно не обновлявшиеся работы.'
+        )
@@ -0,0 +1,55 @@
+import glob
+import gzip
+import io
+import logging
+
+from homework_bot.logs import (RotatingLogHandler, start_log_listener,
+                               stop_log_listener)
+
+
+def make_record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 1, message,
+                             None, None)
+
+
+class TestRotatingLogHandler:
+
+    def test_rotates_by_size_and_compresses(self, tmp_path):
+        path = str(tmp_path / 'bot.log')
+        handler = RotatingLogHandler(path, max_bytes=100, backup_count=2)
+        for number in range(20):
+            handler.emit(make_record(f'message {number:02} ' + 'x' * 20))
+        handler.close()
+        archives = glob.glob(path + '.*.gz')
+        assert len(archives) == 2, (
+            'Проверьте, что хранится не больше backup_count архивов.'
+        )
+        with gzip.open(archives[0], 'rt') as archive:
+            assert 'message' in archive.read()
+
+    def test_rotates_by_time(self, tmp_path):
+        path = str(tmp_path / 'bot.log')
+        handler = RotatingLogHandler(path, max_bytes=0, interval=0)
+        handler.emit(make_record('first'))
+        handler.emit(make_record('second'))
+        handler.close()
+        assert glob.glob(path + '.*.gz')
+
+
+class TestLogListener:
+
+    def test_records_are_written_in_background(self, tmp_path):
+        stream = io.StringIO()
+        handler = start_log_listener(
+            str(tmp_path / 'bot.log'), '%(levelname)s - %(message)s', stream
+        )
+        logger = logging.getLogger('test_logs')
+        logger.propagate = False
+        logger.addHandler(handler)
+        logger.warning('Сообщение')
+        logger.removeHandler(handler)
+        stop_log_listener(handler.listener)
+        assert stream.getvalue() == 'WARNING - Сообщение\n'
+        assert (tmp_path / 'bot.log').read_text(encoding='utf-8') == (
+            'WARNING - Сообщение\n'
+        )
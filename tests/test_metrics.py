@@ -0,0 +1,143 @@
+from http import HTTPStatus
+
+import requests
+
+import homework
+import utils
+from homework_bot import metrics, metrics_server
+from homework_bot.breaker import OPEN, circuit_states, get_breaker
+from homework_bot.health import HEALTH, Health
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetrics:
+
+    def test_render_prometheus_text(self):
+        registry = metrics.Registry()
+        counter = metrics.Counter('errors_total', 'Ошибки.', registry)
+        histogram = metrics.Histogram('latency_seconds', 'Время.', (0.1, 1),
+                                      registry)
+        counter.inc(path='http')
+        counter.inc(path='http')
+        histogram.observe(0.5)
+        text = registry.render()
+        assert 'errors_total{path="http"} 2' in text
+        assert 'latency_seconds_bucket{le="0.1"} 0' in text
+        assert 'latency_seconds_bucket{le="1"} 1' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+        assert 'latency_seconds_count 1' in text
+        assert '# TYPE latency_seconds histogram' in text
+
+    def test_error_paths_are_counted(self, monkeypatch, current_timestamp):
+        def mock_get(*args, **kwargs):
+            return utils.MockResponseGET(
+                http_status=HTTPStatus.INTERNAL_SERVER_ERROR, data={}
+            )
+
+        monkeypatch.setattr(requests, 'get', mock_get)
+        before = metrics.ERRORS.value(path='response_status')
+        try:
+            homework.get_api_answer(current_timestamp)
+        except ValueError:
+            pass
+        assert metrics.ERRORS.value(path='response_status') == before + 1, (
+            'Проверьте, что ошибки запроса к API учитываются в метриках.'
+        )
+
+    def test_metrics_endpoint(self):
+        registry = metrics.Registry()
+        metrics.Gauge('queue_depth', 'Очередь.', registry).set(3)
+
+        class Handler(metrics_server.MetricsHandler):
+            pass
+
+        Handler.registry = registry
+        server = metrics_server.serve_metrics(0, handler=Handler)
+        try:
+            url = f'http://127.0.0.1:{server.server_port}'
+            response = requests.get(url + '/metrics', timeout=1)
+            assert response.status_code == HTTPStatus.OK
+            assert 'queue_depth 3' in response.text
+            assert requests.get(url + '/other', timeout=1).status_code == (
+                HTTPStatus.NOT_FOUND
+            )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_health_endpoint(self):
+        clock = Clock()
+        health = Health(factor=3, clock=clock)
+        health.add_queue('telegram', lambda: 2)
+
+        class Handler(metrics_server.MetricsHandler):
+            pass
+
+        Handler.health = health
+        server = metrics_server.serve_metrics(0, handler=Handler)
+        url = f'http://127.0.0.1:{server.server_port}'
+        try:
+            health.expect(10)
+            response = requests.get(url + '/health/live', timeout=1)
+            assert response.status_code == HTTPStatus.OK
+            assert response.json()['queues'] == {'telegram': 2}
+            assert requests.get(url + '/health/ready', timeout=1) \
+                .status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+                    'До первого успешного опроса процесс не готов.'
+                )
+            health.polled()
+            clock.now += 20
+            assert requests.get(url + '/health/ready', timeout=1) \
+                .status_code == HTTPStatus.OK
+            clock.now += 20
+            response = requests.get(url + '/health/live', timeout=1)
+            assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+                'Проверка должна падать, если опрос давно не удавался.'
+            )
+            assert response.json()['last_poll_age'] == 40
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_outage_keeps_process_live(self, monkeypatch):
+        clock = Clock()
+        health = Health(factor=3, clock=clock)
+        health.expect(10)
+        health.polled()
+        breaker = get_breaker('http://outage.test/')
+        for _ in range(breaker.threshold):
+            breaker.failure()
+        assert circuit_states()['http://outage.test/'] == OPEN
+        for _ in range(10):
+            clock.now += 10
+            health.cycled()
+        snapshot = health.snapshot()
+        assert snapshot['live'], (
+            'Сбой API при работающем цикле опроса не должен '
+            'нарушать живость.'
+        )
+        assert not snapshot['ready'], (
+            'Без свежего успешного ответа API процесс не готов.'
+        )
+        assert snapshot['circuits']['http://outage.test/'] == OPEN
+        clock.now += 40
+        assert not health.snapshot()['live'], (
+            'Зависший цикл опроса должен нарушать живость.'
+        )
+
+    def test_successful_poll_is_marked(self, monkeypatch):
+        monkeypatch.setattr(HEALTH, 'last_poll', None)
+        homework.request_api_answer(0, {}, lambda **kwargs: (
+            utils.MockResponseGET(data={'homeworks': []})
+        ))
+        assert HEALTH.last_poll is not None, (
+            'Успешный запрос к API должен отмечаться для проверки живости.'
+        )
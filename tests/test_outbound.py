@@ -0,0 +1,169 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from telegram.error import (RetryAfter, NetworkError, TelegramError,
+                            Unauthorized)
+
+from homework_bot.fanout import fan_out
+from homework_bot.outbound import OutboundQueue, TokenBucket, make_bot
+
+
+class FlakyBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text, time.monotonic()))
+
+
+def run_queue(queue, *messages):
+    async def main():
+        queue.start()
+        dispatcher = asyncio.create_task(queue.run())
+        try:
+            return await asyncio.gather(
+                *(queue.send(chat_id, text) for chat_id, text in messages),
+                return_exceptions=True
+            )
+        finally:
+            dispatcher.cancel()
+
+    return asyncio.run(main())
+
+
+class TestTokenBucket:
+
+    def test_rate_is_limited(self):
+        bucket = TokenBucket(rate=2, capacity=1)
+        assert bucket.wait_time(now=bucket.updated) == 0
+        bucket.consume(now=bucket.updated)
+        assert bucket.wait_time(now=bucket.updated) == pytest.approx(0.5)
+
+    def test_block(self):
+        bucket = TokenBucket(rate=100)
+        bucket.block(3, now=10)
+        assert bucket.wait_time(now=11) == 2
+
+
+class TestOutboundQueue:
+
+    def test_messages_are_delivered_in_order(self):
+        bot = FlakyBot()
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=1000)
+        results = run_queue(queue, (1, 'a'), (1, 'b'), (2, 'c'))
+        assert results == [True, True, True]
+        assert [text for chat, text, _ in bot.sent if chat == 1] == [
+            'a', 'b'
+        ], 'Сообщения одного чата должны уходить по порядку.'
+        assert queue.depth() == 0
+
+    def test_chat_rate_is_respected(self):
+        bot = FlakyBot()
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=20)
+        run_queue(queue, (1, 'a'), (1, 'b'), (1, 'c'))
+        moments = [moment for _, _, moment in bot.sent]
+        assert moments[2] - moments[0] >= 0.09, (
+            'Проверьте ограничение скорости отправки в один чат.'
+        )
+
+    def test_retry_after_is_honored(self):
+        bot = FlakyBot([RetryAfter(0.1)])
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=1000)
+        start = time.monotonic()
+        assert run_queue(queue, (1, 'a')) == [True]
+        assert bot.sent[0][2] - start >= 0.1
+
+    def test_failed_send_raises_after_attempts(self, monkeypatch):
+        monkeypatch.setattr('homework_bot.outbound.RETRY_DELAY', 0.001)
+        bot = FlakyBot([TelegramError('fail')] * 3)
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=1000,
+                              max_attempts=3)
+        result, = run_queue(queue, (1, 'a'))
+        assert isinstance(result, TelegramError)
+        assert queue.depth() == 0
+
+    def test_unavailable_chat_is_not_retried(self):
+        bot = FlakyBot([Unauthorized('Forbidden: bot was blocked by the user')])
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=1000)
+        start = time.monotonic()
+        result, = run_queue(queue, (1, 'a'))
+        assert isinstance(result, Unauthorized)
+        assert time.monotonic() - start < 0.5, (
+            'Отправка в недоступный чат не должна повторяться.'
+        )
+
+    def test_send_message_times_out(self):
+        bot = FlakyBot()
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=0.5)
+
+        async def main():
+            queue.start()
+            dispatcher = asyncio.create_task(queue.run())
+            try:
+                assert await asyncio.to_thread(queue.send_message, 1, 'a')
+                with pytest.raises(NetworkError):
+                    await asyncio.to_thread(
+                        queue.send_message, 1, 'b', timeout=0.1
+                    )
+                await asyncio.sleep(0)
+            finally:
+                dispatcher.cancel()
+
+        asyncio.run(main())
+        assert [text for _, text, _ in bot.sent] == ['a'], (
+            'Сообщение с истёкшим ожиданием не должно отправляться.'
+        )
+
+    def test_closed_queue_fails_like_a_send(self):
+        queue = OutboundQueue(FlakyBot(), global_rate=1000, chat_rate=1000)
+
+        def send(bot, chat_id, message):
+            bot.send_message(chat_id, message, timeout=1)
+
+        async def main():
+            queue.start()
+            queue.close()
+            return await asyncio.to_thread(
+                fan_out, send, queue, ('1', '2'), 'text'
+            )
+
+        assert asyncio.run(main()) is False, (
+            'Остановленная очередь должна давать обычную ошибку отправки.'
+        )
+        with pytest.raises(NetworkError):
+            queue.send_message(1, 'text')
+
+    def test_chats_are_sent_in_parallel_within_limit(self):
+        class SlowBot:
+            def __init__(self):
+                self.active = self.peak = 0
+                self.lock = threading.Lock()
+
+            def send_message(self, chat_id, text):
+                with self.lock:
+                    self.active += 1
+                    self.peak = max(self.peak, self.active)
+                time.sleep(0.05)
+                with self.lock:
+                    self.active -= 1
+
+        bot = SlowBot()
+        queue = OutboundQueue(bot, global_rate=1000, chat_rate=1000,
+                              concurrency=3)
+        start = time.monotonic()
+        results = run_queue(queue, *((chat, 'a') for chat in range(9)))
+        assert results == [True] * 9
+        assert bot.peak == 3, (
+            'Сообщения разных чатов должны уходить параллельно, '
+            'но не больше заданного числа одновременно.'
+        )
+        assert time.monotonic() - start < 0.4
+
+    def test_bot_has_connection_pool(self):
+        bot = make_bot('1234:token', concurrency=4)
+        assert bot.request.con_pool_size == 5
@@ -0,0 +1,169 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+
+import homework
+from homework_bot.deadline import Deadline
+from homework_bot.errors import ErrorCache
+from homework_bot.index import ChangeIndex
+from homework_bot.pipeline import Pipeline
+from homework_bot.scheduler import PollScheduler
+from homework_bot.state import StateStore
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'approved'}
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+class TestPipeline:
+
+    def test_timestamp_advances_after_ack(self):
+        release = threading.Event()
+
+        def notify(timestamp):
+            release.wait(1)
+            return timestamp
+
+        pipeline = Pipeline(lambda item: item + 1, notify)
+        try:
+            start = time.monotonic()
+            pipeline.submit(100)
+            assert time.monotonic() - start < 0.1, (
+                'Медленная отправка не должна задерживать опрос.'
+            )
+            assert pipeline.latest(100) == 100, (
+                'Дата опроса не должна сдвигаться до подтверждения отправки.'
+            )
+            release.set()
+            assert pipeline.latest(100, wait=True) == 101
+        finally:
+            pipeline.close(1)
+
+    def test_bounded_queues_apply_backpressure(self):
+        release = threading.Event()
+        pipeline = Pipeline(lambda item: release.wait(1), size=1)
+        try:
+            pipeline.submit(1)
+            pipeline.submit(2)
+            submitter = threading.Thread(target=pipeline.submit, args=(3,))
+            submitter.start()
+            submitter.join(0.1)
+            assert submitter.is_alive(), (
+                'При заполненной очереди постановка задания должна ждать.'
+            )
+            release.set()
+            submitter.join(1)
+            assert pipeline.join(1)
+        finally:
+            pipeline.close(1)
+
+    def test_stage_runs_in_submitter_context(self):
+        pipeline = Pipeline(lambda item: request_id.get())
+        try:
+            token = request_id.set('cycle-1')
+            pipeline.submit(None)
+            request_id.reset(token)
+            assert pipeline.latest(None, wait=True) == 'cycle-1'
+        finally:
+            pipeline.close(1)
+
+
+class TestPollStages:
+
+    def test_delay_follows_current_answer(self):
+        scheduler = PollScheduler(600)
+        index = ChangeIndex()
+        pipeline = Pipeline(partial(homework.parse_answer, scheduler, index,
+                                    'tenant'))
+        reviewing = {**HOMEWORK, 'status': 'reviewing'}
+        delays = []
+        try:
+            for homeworks in ([], [], [reviewing], [], []):
+                delay = Future()
+                pipeline.submit(homework.Fetched(
+                    0, {'homeworks': homeworks, 'current_date': 1}, None,
+                    delay
+                ))
+                delays.append(delay.result(1))
+        finally:
+            pipeline.close(1)
+        assert delays == [600, 900, 120, 120, 120], (
+            'Задержка опроса должна учитывать ответ текущего цикла.'
+        )
+
+    def test_only_changes_are_formatted(self, monkeypatch):
+        index = ChangeIndex()
+        index.commit(HOMEWORK)
+        formatted = []
+        parse_status = homework.parse_status
+
+        def counting_parse_status(item):
+            formatted.append(item)
+            return parse_status(item)
+
+        monkeypatch.setattr(homework, 'parse_status', counting_parse_status)
+        changed = {'id': 2, 'homework_name': 'hw2', 'status': 'rejected'}
+        parsed = homework.parse_answer(
+            PollScheduler(600), index, 'tenant', homework.Fetched(
+                0, {'homeworks': [HOMEWORK, changed], 'current_date': 1},
+                None
+            )
+        )
+        assert formatted == [changed], (
+            'Форматироваться должны только изменившиеся работы.'
+        )
+        assert [item for item, _ in parsed.messages] == [changed]
+
+    def test_failed_send_keeps_timestamp(self):
+        store = StateStore()
+        index = ChangeIndex()
+        parsed = homework.parse_answer(
+            PollScheduler(600), index, 'tenant', homework.Fetched(
+                100, {'homeworks': [HOMEWORK], 'current_date': 200}, None
+            )
+        )
+        assert parsed.messages == [(HOMEWORK, homework.parse_status(HOMEWORK))]
+        sent = []
+
+        def send(bot, message):
+            sent.append(message)
+            return len(sent) > 1
+
+        errors = ErrorCache()
+        original = homework.send_message
+        homework.send_message = send
+        try:
+            assert homework.notify_answer(
+                None, index, errors, store, 'tenant', parsed
+            ) == 100
+            assert homework.notify_answer(
+                None, index, errors, store, 'tenant', parsed
+            ) == 200
+        finally:
+            homework.send_message = original
+            store.close()
+        assert len(sent) == 2
+
+    def test_notify_shares_fetch_deadline(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr(
+            homework, 'send_message', lambda bot, message: sent.append(message)
+        )
+        monkeypatch.setattr(homework, 'send_error', lambda bot, message: True)
+        store = StateStore()
+        parsed = homework.parse_answer(
+            PollScheduler(600), ChangeIndex(), 'tenant', homework.Fetched(
+                100, {'homeworks': [HOMEWORK], 'current_date': 200}, None,
+                None, Deadline(0)
+            )
+        )
+        try:
+            assert homework.notify_answer(
+                None, ChangeIndex(), ErrorCache(), store, 'tenant', parsed
+            ) == 100
+        finally:
+            store.close()
+        assert not sent, (
+            'Уведомления укладываются в дедлайн цикла, начатого запросом.'
+        )
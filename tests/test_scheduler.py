@@ -0,0 +1,66 @@
+from homework_bot.scheduler import (ERROR_MAX_PERIOD, IDLE_MAX_PERIOD,
+                                    PollScheduler)
+
+RETRY_PERIOD = 600
+
+
+class TestPollScheduler:
+
+    def test_first_idle_cycle_uses_retry_period(self):
+        scheduler = PollScheduler(RETRY_PERIOD)
+        scheduler.observe([])
+        assert scheduler.next_delay() == RETRY_PERIOD, (
+            'Без изменений первый интервал должен быть равен RETRY_PERIOD.'
+        )
+
+    def test_idle_backoff_is_capped(self):
+        scheduler = PollScheduler(RETRY_PERIOD)
+        delays = []
+        for _ in range(10):
+            scheduler.observe([])
+            delays.append(scheduler.next_delay())
+        assert delays == sorted(delays), 'Интервал простоя должен расти.'
+        assert delays[-1] == IDLE_MAX_PERIOD
+
+    def test_reviewing_polls_faster(self):
+        scheduler = PollScheduler(RETRY_PERIOD, review_period=60)
+        scheduler.observe([{'homework_name': 'hw', 'status': 'reviewing'}])
+        assert scheduler.next_delay() == 60
+        scheduler.observe([])
+        assert scheduler.next_delay() == 60, (
+            'Пока работа на ревью, опрос должен оставаться частым.'
+        )
+
+    def test_any_reviewing_homework_polls_faster(self):
+        scheduler = PollScheduler(RETRY_PERIOD, review_period=60)
+        scheduler.observe([
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'reviewing'},
+        ])
+        assert scheduler.next_delay() == 60, (
+            'Работа на ревью должна ускорять опрос, где бы она ни была '
+            'в списке.'
+        )
+
+    def test_recent_change_keeps_base_period(self):
+        scheduler = PollScheduler(RETRY_PERIOD)
+        scheduler.observe([{'homework_name': 'hw', 'status': 'approved'}],
+                          now=1000)
+        for _ in range(5):
+            scheduler.observe([], now=1000)
+        assert scheduler.next_delay(now=1000) == RETRY_PERIOD
+        assert scheduler.next_delay(now=10000) > RETRY_PERIOD
+
+    def test_errors_back_off_with_jitter(self):
+        scheduler = PollScheduler(RETRY_PERIOD)
+        ceilings = []
+        for _ in range(12):
+            scheduler.fail()
+            delay = scheduler.next_delay()
+            assert delay <= ERROR_MAX_PERIOD
+            ceilings.append(delay)
+        assert ceilings[-1] >= ERROR_MAX_PERIOD / 2
+        scheduler.observe([])
+        assert scheduler.next_delay() == RETRY_PERIOD, (
+            'После успешного ответа задержка по ошибкам сбрасывается.'
+        )
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import signal
+import time
+
+import pytest
+
+import utils
+from homework_bot import engine
+from homework_bot.shutdown import Shutdown
+
+
+class TestShutdown:
+
+    def test_signal_interrupts_sleep(self):
+        shutdown = Shutdown()
+        shutdown.install()
+        start = time.monotonic()
+        try:
+            with pytest.raises(SystemExit):
+                with shutdown.interruptible():
+                    os.kill(os.getpid(), signal.SIGTERM)
+                    time.sleep(5)
+        finally:
+            shutdown.restore()
+        assert time.monotonic() - start < 1, (
+            'Сигнал должен прерывать ожидание сразу.'
+        )
+
+    def test_signal_during_cycle_is_deferred(self):
+        shutdown = Shutdown()
+        shutdown.install()
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert shutdown.requested, 'Цикл опроса должен дорабатывать.'
+            with pytest.raises(SystemExit):
+                with shutdown.interruptible():
+                    time.sleep(5)
+        finally:
+            shutdown.restore()
+        assert signal.getsignal(signal.SIGTERM) == signal.SIG_DFL
+
+    def test_engine_stops_after_cycle(self, monkeypatch, random_timestamp):
+        tenants = [engine.Tenant(token='t1', chat_id='1')]
+        calls = []
+
+        def get(*args, **kwargs):
+            calls.append(kwargs)
+            return utils.MockResponseGET(data={
+                'homeworks': [], 'current_date': random_timestamp
+            })
+
+        async def run():
+            stop = asyncio.Event()
+            polling = asyncio.create_task(engine.run(
+                tenants, utils.MockTelegramBot(), get=get, stop=stop
+            ))
+            await asyncio.sleep(0.1)
+            stop.set()
+            await asyncio.wait_for(polling, timeout=0.5)
+
+        monkeypatch.setattr(engine, 'START_SPREAD', 0)
+        asyncio.run(run())
+        assert len(calls) == 1, (
+            'После сигнала остановки новые циклы не начинаются.'
+        )
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+
+from homework_bot.lazy import lazy_import
+from homework_bot.startup import parse_import_times
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestStartup:
+
+    def test_lazy_import_defers_execution(self, tmp_path, monkeypatch):
+        (tmp_path / 'heavy_module.py').write_text(
+            'import sys\nsys.heavy_loaded = True\nVALUE = 42\n'
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.delitem(sys.modules, 'heavy_module', raising=False)
+        monkeypatch.setattr(sys, 'heavy_loaded', False, raising=False)
+        module = lazy_import('heavy_module')
+        assert not sys.heavy_loaded, (
+            'Модуль не должен выполняться до первого обращения.'
+        )
+        assert module.VALUE == 42
+        assert sys.heavy_loaded
+        monkeypatch.delitem(sys.modules, 'heavy_module')
+
+    def test_heavy_modules_are_not_imported_on_start(self):
+        result = subprocess.run(
+            [sys.executable, '-c', (
+                'import sys, homework; print(sorted(name for name in '
+                "('telegram.bot', 'requests.sessions', 'http.server') "
+                'if name in sys.modules))'
+            )],
+            cwd=BASE_DIR, capture_output=True, text=True, timeout=10,
+        )
+        assert result.stdout.strip() == '[]', (
+            'telegram, requests и http.server должны загружаться '
+            'при первом использовании.'
+        )
+
+    def test_parse_import_times(self):
+        lines = [
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        450 |   requests',
+            'unrelated line',
+        ]
+        assert parse_import_times(lines) == [(0.45, 0.12, '   requests')]
@@ -0,0 +1,41 @@
+from homework_bot.state import StateStore, homework_key, tenant_key
+
+
+class TestStateStore:
+
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        key = tenant_key('sometoken')
+        store = StateStore(path)
+        store.save(key, 1000, 'Сбой')
+        store.save_status(key, '1', 'reviewing')
+        store.close()
+
+        store = StateStore(path)
+        assert store.load(key, 5) == (1000, 'Сбой'), (
+            'Проверьте, что после перезапуска восстанавливается состояние.'
+        )
+        assert store.load_statuses(key) == {'1': 'reviewing'}
+        assert store.load(tenant_key('other'), 5) == (5, '')
+        store.close()
+
+    def test_writes_are_batched(self, tmp_path):
+        path = str(tmp_path / 'state.sqlite3')
+        store = StateStore(path, flush_size=3, flush_period=3600)
+        for number in range(2):
+            store.save(tenant_key(number), number, '')
+        assert store.pending() == 2, (
+            'Изменения должны копиться до записи на диск.'
+        )
+        assert store.load(tenant_key(1), 0) == (1, '')
+        store.save(tenant_key(2), 2, '')
+        assert store.pending() == 0
+        reader = StateStore(path)
+        assert reader.load(tenant_key(2), 0) == (2, '')
+        reader.close()
+        store.close()
+
+    def test_token_is_not_stored(self, tmp_path):
+        assert 'sometoken' not in tenant_key('sometoken')
+        assert homework_key({'id': 7, 'homework_name': 'hw'}) == '7'
+        assert homework_key({'homework_name': 'hw'}) == 'hw'
@@ -0,0 +1,247 @@
+import asyncio
+from collections import Counter
+from types import SimpleNamespace
+
+from homework_bot import metrics
+from homework_bot.supervisor import HashRing, Shard, Supervisor, Worker
+
+TOKENS = [f'token{number}' for number in range(1000)]
+
+
+class FakeSupervisor(Supervisor):
+
+    def __init__(self, tenants, workers):
+        super().__init__(tenants, workers, respawn_delay=0)
+        self.commands = []
+
+    def spawn(self, node, tenants):
+        self.workers[node] = Worker(
+            SimpleNamespace(exitcode=-9), SimpleNamespace(close=lambda: None)
+        )
+        self.commands.append((node, 'spawn', sorted(tenants)))
+
+    def send(self, node, command, tokens):
+        if command != 'command':
+            tokens = sorted(tokens)
+        self.commands.append((node, command, tokens))
+
+
+class TestHashRing:
+
+    def test_tenants_are_spread_evenly(self):
+        ring = HashRing(['a', 'b', 'c', 'd'])
+        shares = Counter(ring.node(token) for token in TOKENS)
+        assert set(shares) == {'a', 'b', 'c', 'd'}
+        assert max(shares.values()) < 2 * min(shares.values()), (
+            'Студенты должны распределяться между процессами равномерно.'
+        )
+
+    def test_removal_moves_only_its_keys(self):
+        ring = HashRing(['a', 'b', 'c'])
+        before = {token: ring.node(token) for token in TOKENS}
+        ring.remove('b')
+        moved = [
+            token for token in TOKENS if ring.node(token) != before[token]
+        ]
+        assert moved and all(before[token] == 'b' for token in moved), (
+            'При удалении узла переезжают только его студенты.'
+        )
+
+
+class TestSupervisor:
+
+    def test_dead_worker_is_rebalanced_and_replaced(self):
+        tenants = [(token, ('1',)) for token in TOKENS[:100]]
+        supervisor = FakeSupervisor(tenants, workers=3)
+        supervisor.start()
+        assert [command[1] for command in supervisor.commands] == [
+            'spawn'
+        ] * 3
+        assert sum(
+            len(command[2]) for command in supervisor.commands
+        ) == 100
+        dead = 'worker-1'
+        orphans = {
+            token for token, owner in supervisor.owners.items()
+            if owner == dead
+        }
+        supervisor.commands.clear()
+        supervisor.worker_died(dead)
+        assigned = {
+            token for node, command, tokens in supervisor.commands
+            if command == 'assign' for token in tokens
+        }
+        assert assigned == orphans, (
+            'Студенты завершившегося процесса переходят к оставшимся.'
+        )
+        supervisor.commands.clear()
+        supervisor.respawn(now=supervisor.respawns[0])
+        kinds = {command for _, command, _ in supervisor.commands}
+        assert kinds == {'spawn', 'release'}, (
+            'Замена должна забрать свою долю у других процессов.'
+        )
+        assert set(supervisor.owners.values()) == set(supervisor.workers)
+
+    def test_handoff_waits_for_release(self):
+        supervisor = FakeSupervisor(
+            [(token, ('1',)) for token in TOKENS[:100]], workers=2
+        )
+        supervisor.start()
+        supervisor.worker_died('worker-0')
+        supervisor.commands.clear()
+        supervisor.respawn(now=supervisor.respawns[0])
+        releases = [
+            (node, tokens) for node, command, tokens in supervisor.commands
+            if command == 'release'
+        ]
+        assert releases and not any(
+            command == 'assign' for _, command, _ in supervisor.commands
+        ), 'Новый владелец не должен начинать опрос до подтверждения.'
+        supervisor.commands.clear()
+        node, tokens = releases[0]
+        supervisor.released(node, tokens)
+        assert supervisor.commands == [('worker-2', 'assign', tokens)], (
+            'После подтверждения студенты переходят новому владельцу.'
+        )
+        assert not supervisor.handoffs
+
+    def test_handoff_from_dead_worker(self):
+        supervisor = FakeSupervisor(
+            [(token, ('1',)) for token in TOKENS[:100]], workers=2
+        )
+        supervisor.start()
+        supervisor.worker_died('worker-0')
+        supervisor.respawn(now=supervisor.respawns[0])
+        pending = set(supervisor.handoffs)
+        supervisor.commands.clear()
+        supervisor.worker_died('worker-1')
+        assigned = {
+            token for node, command, tokens in supervisor.commands
+            if command == 'assign' for token in tokens
+        }
+        assert pending <= assigned, (
+            'Студенты процесса, завершившегося во время передачи, '
+            'не должны теряться.'
+        )
+        assert not supervisor.handoffs
+
+    def test_shared_chat_is_routed_to_every_owner(self):
+        supervisor = FakeSupervisor(
+            [(token, (token, '99')) for token in TOKENS[:20]], workers=3
+        )
+        supervisor.start()
+        supervisor.commands.clear()
+        supervisor.route('99', '/status')
+        routed = {
+            token: node for node, command, payload in supervisor.commands
+            for token in payload[0]
+        }
+        assert routed == {token: supervisor.owners[token]
+                          for token in TOKENS[:20]}, (
+            'Команда из общего чата должна дойти до всех его студентов.'
+        )
+        assert all(
+            payload[1:] == ('/status', '99', True)
+            for _, _, payload in supervisor.commands
+        )
+
+
+class TestShard:
+
+    def test_release_flushes_before_ack(self):
+        events = []
+
+        class Store:
+            def flush(self):
+                events.append('flush')
+
+        async def run():
+            shard = Shard(None, None, Store(), None, events.append)
+            stop = asyncio.Event()
+
+            async def poll():
+                await stop.wait()
+                await asyncio.sleep(0.01)
+                events.append('cycle')
+
+            shard.polls['t1'] = (asyncio.create_task(poll()), stop)
+            shard.release(['t1'])
+            await asyncio.gather(*shard.replies)
+
+        asyncio.run(run())
+        assert events == ['cycle', 'flush', ['t1']], (
+            'Передача подтверждается после цикла и записи состояния.'
+        )
+
+
+    def test_forget_drops_poll_age(self):
+        async def run():
+            shard = Shard(None, None, None, None)
+            tenant = SimpleNamespace(key='forgotten')
+            task = asyncio.create_task(asyncio.sleep(0))
+            await task
+            shard.polls['t1'] = (task, asyncio.Event())
+            shard.tenants['t1'] = tenant
+            metrics.LAST_POLL_AGE.touch(tenant=tenant.key)
+            shard.forget('t1', task)
+
+        asyncio.run(run())
+        assert 'forgotten' not in metrics.LAST_POLL_AGE.render(), (
+            'Отданный студент не должен оставаться в метриках процесса.'
+        )
+
+
+class TestMergedRegistry:
+
+    def test_moved_tenant_gauge_is_dropped(self):
+        supervisor = FakeSupervisor(
+            [(token, ('1',)) for token in TOKENS[:20]], workers=2
+        )
+        supervisor.start()
+        token = TOKENS[0]
+        owner = supervisor.owners[token]
+        other, = set(supervisor.workers) - {owner}
+        key = supervisor.keys[token]
+        for node, age in ((owner, 5), (other, 900)):
+            registry = metrics.Registry()
+            metrics.Gauge('homework_last_successful_poll_age_seconds', 'Age.',
+                          registry).set(age, tenant=key)
+            supervisor.metrics.update(node, registry.collect())
+        assert f'{{tenant="{key}"}} 5' in supervisor.metrics.render(), (
+            'Gauge студента берётся только у процесса, который его опрашивает.'
+        )
+
+    def test_gauge_labels_can_be_removed(self):
+        gauge = metrics.Gauge('age', 'Age.', metrics.Registry())
+        gauge.set(1, tenant='a')
+        gauge.set(2, tenant='b')
+        gauge.remove(tenant='a')
+        gauge.remove(tenant='missing')
+        assert gauge.samples() == [('age{tenant="b"}', 2)]
+
+    def test_counters_are_summed(self):
+        merged = metrics.MergedRegistry()
+        for source, value in (('w1', 2), ('w2', 3)):
+            registry = metrics.Registry()
+            metrics.Counter('sent_total', 'Отправлено.', registry).inc(value)
+            metrics.Gauge('depth', 'Очередь.', registry).set(value)
+            merged.update(source, registry.collect())
+        assert 'sent_total 5' in merged.render()
+        assert 'depth 3' in merged.render()
+        merged.retire('w2')
+        assert 'sent_total 5' in merged.render(), (
+            'Счётчики завершившегося процесса не должны пропадать.'
+        )
+        assert 'depth 2' in merged.render()
+
+    def test_retired_snapshots_are_folded(self):
+        merged = metrics.MergedRegistry()
+        for number in range(5):
+            registry = metrics.Registry()
+            metrics.Counter('sent_total', 'Отправлено.', registry).inc()
+            merged.update(number, registry.collect())
+            merged.retire(number)
+        assert len(merged.snapshots) == 1, (
+            'Снимки завершившихся процессов должны складываться в один.'
+        )
+        assert 'sent_total 5' in merged.render()
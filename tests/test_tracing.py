@@ -0,0 +1,85 @@
+import json
+
+import homework
+import utils
+from homework_bot import tracing
+from homework_bot.index import ChangeIndex
+from homework_bot.tracing import span, start_tracing, stop_tracing
+
+
+def read_spans(path):
+    with open(path, encoding='utf-8') as file:
+        return [
+            item
+            for line in file
+            for resource in json.loads(line)['resourceSpans']
+            for scope in resource['scopeSpans']
+            for item in scope['spans']
+        ]
+
+
+def attributes(item):
+    return {
+        attribute['key']: list(attribute['value'].values())[0]
+        for attribute in item['attributes']
+    }
+
+
+class TestTracing:
+
+    def test_poll_cycle_is_traced(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        homeworks = [{'id': 1, 'homework_name': 'hw1', 'status': 'approved'}]
+
+        def get(**kwargs):
+            return utils.MockResponseGET(data={
+                'homeworks': homeworks, 'current_date': 1
+            })
+
+        start_tracing(path, flush_period=0.01)
+        try:
+            with span('poll_cycle', {'tenant.id': 'tenant'}):
+                response = homework.request_api_answer(0, {}, get)
+                homework.send_changes(
+                    None, response['homeworks'], ChangeIndex(),
+                    lambda bot, message: True
+                )
+        finally:
+            stop_tracing()
+        spans = {item['name']: item for item in read_spans(path)}
+        assert set(spans) == {
+            'poll_cycle', 'get_api_answer', 'response.json',
+            'parse_status', 'send_message'
+        }
+        root = spans.pop('poll_cycle')
+        for item in spans.values():
+            assert item['traceId'] == root['traceId'], (
+                'Все этапы цикла должны входить в одну трассу.'
+            )
+            assert attributes(item)['tenant.id'] == 'tenant', (
+                'Span\'ы этапов должны содержать идентификатор студента.'
+            )
+        assert spans['response.json']['parentSpanId'] == (
+            spans['get_api_answer']['spanId']
+        )
+        assert attributes(spans['get_api_answer'])['http.status_code'] == (
+            '200'
+        )
+
+    def test_error_is_recorded(self, tmp_path):
+        path = tmp_path / 'trace.jsonl'
+        start_tracing(path, flush_period=0.01)
+        try:
+            with span('poll_cycle'):
+                homework.parse_status({'homework_name': 'hw1'})
+        except KeyError:
+            pass
+        finally:
+            stop_tracing()
+        item, = read_spans(path)
+        assert item['status']['code'] == tracing.STATUS_ERROR
+
+    def test_disabled_tracing_is_noop(self, tmp_path):
+        with span('poll_cycle') as current:
+            current.set_attribute('key', 'value')
+        assert current is tracing.NOOP_SPAN
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+import homework
+from homework_bot import fastjson, metrics
+from homework_bot.validator import check_response
+
+VALID_RESPONSE = {
+    'homeworks': [
+        {'homework_name': 'hw1', 'status': 'approved'},
+        {'homework_name': 'hw2', 'status': 'reviewing'},
+    ],
+    'current_date': 123246,
+}
+ERROR_PATHS = (
+    'response_type', 'homeworks_key', 'homeworks_type', 'homework_name',
+    'homework_status', 'unknown_status',
+)
+INVALID_RESPONSES = (
+    [],
+    {'current_date': 123246},
+    {'homeworks': {'homework_name': 'hw1', 'status': 'approved'}},
+    {'homeworks': None},
+    {'homeworks': [{'status': 'approved'}]},
+    {'homeworks': [{'homework_name': 'hw1'}]},
+    {'homeworks': [{'homework_name': 'hw1', 'status': 'unknown'}]},
+)
+
+
+def reference_check(response):
+    for item in homework.check_response(response):
+        homework.parse_status(item)
+
+
+def reference_errors(response):
+    try:
+        reference_check(response)
+    except Exception as error:
+        return type(error), str(error)
+
+
+def counted_errors(check, response):
+    before = [metrics.ERRORS.value(path=path) for path in ERROR_PATHS]
+    with pytest.raises(Exception):
+        check(response)
+    return [
+        metrics.ERRORS.value(path=path) - value
+        for path, value in zip(ERROR_PATHS, before)
+    ]
+
+
+class TestValidator:
+
+    def test_valid_response(self):
+        assert check_response(VALID_RESPONSE) == VALID_RESPONSE['homeworks']
+
+    @pytest.mark.parametrize('response', INVALID_RESPONSES)
+    def test_same_errors_as_check_response(self, response):
+        with pytest.raises(Exception) as error:
+            check_response(response)
+        assert (error.type, str(error.value)) == reference_errors(response), (
+            'Проверьте, что валидатор выбрасывает те же исключения, '
+            'что check_response и parse_status.'
+        )
+
+    @pytest.mark.parametrize('response', INVALID_RESPONSES)
+    def test_same_error_counters_as_check_response(self, response):
+        assert counted_errors(check_response, response) == counted_errors(
+            reference_check, response
+        ), 'Ошибки валидатора должны учитываться в тех же счётчиках.'
+
+
+class TestFastJson:
+
+    class Response:
+        content = b'{"homeworks": []}'
+
+        def json(self):
+            raise AssertionError('Ожидается разбор через быстрый backend.')
+
+    def test_fast_backend_is_used(self, monkeypatch):
+        monkeypatch.setattr(fastjson, 'orjson', json)
+        assert fastjson.decode_json(self.Response()) == {'homeworks': []}
+
+    def test_fallback_to_response_json(self, monkeypatch):
+        monkeypatch.setattr(fastjson, 'orjson', None)
+        response = self.Response()
+        response.json = lambda: {'homeworks': [1]}
+        assert fastjson.decode_json(response) == {'homeworks': [1]}
@@ -0,0 +1,28 @@
+import logging
+
+from homework_bot import watchdog
+from homework_bot.watchdog import MemoryWatchdog
+
+
+class TestMemoryWatchdog:
+
+    def test_rss_is_reported(self):
+        MemoryWatchdog(trace=False).check()
+        assert watchdog.RESIDENT_MEMORY.samples()[0][1] > 0, (
+            'Проверьте метрику резидентной памяти.'
+        )
+
+    def test_growth_is_logged(self, caplog):
+        memory = MemoryWatchdog(trace=True, top=5)
+        try:
+            memory.check()
+            leak = [bytearray(1024) for _ in range(1000)]
+            with caplog.at_level(logging.INFO):
+                growth = memory.check()
+        finally:
+            memory.stop()
+        assert any(
+            __file__ in str(stat.traceback) for stat in growth
+        ), 'Рост памяти должен указывать на место выделения.'
+        assert 'Рост памяти' in caplog.text
+        assert len(leak) == 1000